@@ -0,0 +1,543 @@
+import asyncio
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set
+import orjson
+from dependencies.config import DefaultConfig
+from .coalesce import BATCH_PROTOCOL, Coalescer
+from .history import HistoryStore
+from .rooms import Room, RoomManager, RoomSettings
+
+CHANNEL_PREFIX = "chat:room:"
+PRESENCE_PREFIX = "chat:presence:"
+ROOM_SETTINGS_PREFIX = "chat:room_settings:"
+ONLINE_PREFIX = "chat:online:"
+QUEUED_PREFIX = "chat:queued:"
+# 방 설정(방송인, moderation 모드, 속도 제한)이 바뀌면 모든 노드에 알리는 채널
+ROOMS_CHANNEL = "chat:rooms"
+OP_PUBLISH = "p"
+OP_RECORD = "r"
+NO_HISTORY = "-"
+
+MessageHandler = Callable[[str, str], None]
+
+
+class Backplane:
+    """방 이벤트를 전달하는 pub/sub 계층. 기본 구현은 같은 프로세스 안에서만 전달한다."""
+
+    def __init__(
+        self,
+        rooms: RoomManager,
+        history: Optional[HistoryStore] = None,
+        coalescer: Optional[Coalescer] = None,
+    ):
+        self._rooms = rooms
+        self.history = history or HistoryStore()
+        self.coalescer = coalescer
+        self.published = 0
+        self.received = 0
+
+    async def start(self) -> None:
+        if self.coalescer is not None:
+            await self.coalescer.start()
+
+    async def close(self) -> None:
+        if self.coalescer is not None:
+            await self.coalescer.close()
+
+    async def publish(
+        self,
+        room_name: str,
+        frame: str,
+        history_id: Optional[str] = None,
+        min_protocol: int = 1,
+        max_protocol: Optional[int] = None,
+    ) -> None:
+        """frame을 방 전체에 전달한다. history_id가 있으면 최근 기록에도 남긴다.
+
+        min_protocol보다 낮은 버전의 연결은 받지 않는다(예전 클라이언트가 모르는 프레임).
+        max_protocol이 있으면 그보다 높은 버전의 연결도 받지 않는다(예전 클라이언트에게만 보내는 프레임).
+        """
+        self.published += 1
+        self._deliver(room_name, frame, min_protocol, max_protocol)
+        if history_id is not None:
+            self.history.record(room_name, history_id, frame)
+
+    async def record(self, room_name: str, history_id: str, frame: str) -> None:
+        """전달 없이 최근 기록에만 남긴다."""
+        self.history.record(room_name, history_id, frame)
+
+    async def load_room(self, room_name: str) -> None:
+        """이 노드에 없는 방의 설정을 공유 저장소에서 읽어 둔다. 한 프로세스뿐이면 할 일이 없다."""
+
+    async def save_room(self, room: Room) -> None:
+        """방 설정을 공유 저장소에 쓰고 다른 노드에 알린다."""
+
+    def _deliver(
+        self, room_name: str, frame: str, min_protocol: int = 1, max_protocol: Optional[int] = None
+    ) -> None:
+        members = self._rooms.members(room_name)
+        if max_protocol is not None:
+            for connection in members:
+                if min_protocol <= connection.protocol_version <= max_protocol:
+                    connection.send(frame)
+            return
+        if (
+            self.coalescer is not None
+            and min_protocol <= BATCH_PROTOCOL
+            and self.coalescer.offer(room_name, frame)
+        ):
+            # 묶음을 받는 클라이언트는 다음 tick에 한 번에 받는다
+            for connection in members:
+                if min_protocol <= connection.protocol_version < BATCH_PROTOCOL:
+                    connection.send(frame)
+            return
+        for connection in members:
+            if connection.protocol_version >= min_protocol:
+                connection.send(frame)
+
+    def _local_counts(self) -> Dict[str, int]:
+        counts = {}
+        for name in self._rooms.names():
+            room = self._rooms.get(name)
+            if room is not None:
+                counts[name] = room.viewers
+        return counts
+
+    async def room_counts(self) -> Dict[str, int]:
+        """전체 노드 기준 방 이름 -> 접속자 수."""
+        return self._local_counts()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class InProcessBackplane(Backplane):
+    pass
+
+
+class MemoryBroker:
+    """Redis 대신 쓰는 프로세스 내 브로커. 여러 BrokerBackplane이 공유하면 여러 노드처럼 동작한다."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._subscribers: Dict[str, set] = {}
+        self._presence: Dict[str, tuple] = {}
+        self._room_settings: Dict[str, tuple] = {}
+        self._online: Dict[str, tuple] = {}
+        self._queued: Dict[str, tuple] = {}
+
+    async def publish(self, channel: str, message: str) -> None:
+        for handler in list(self._subscribers.get(channel, ())):
+            handler(channel, message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._subscribers.setdefault(channel, set()).add(handler)
+
+    async def unsubscribe(self, channel: str, handler: MessageHandler) -> None:
+        handlers = self._subscribers.get(channel)
+        if handlers is not None:
+            handlers.discard(handler)
+            if not handlers:
+                del self._subscribers[channel]
+
+    async def set_presence(self, node_id: str, counts: Dict[str, int], ttl: float) -> None:
+        self._presence[node_id] = (self._clock() + ttl, dict(counts))
+
+    async def get_room(self, name: str) -> Optional[str]:
+        entry = self._room_settings.get(name)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    async def set_room(self, name: str, value: str, ttl: float) -> None:
+        self._room_settings[name] = (self._clock() + ttl, value)
+
+    async def add_online(self, node_id: str, username: str, ttl: float) -> None:
+        _, users = self._online.get(node_id, (0, set()))
+        users.add(username)
+        self._online[node_id] = (self._clock() + ttl, users)
+
+    async def remove_online(self, node_id: str, username: str) -> None:
+        entry = self._online.get(node_id)
+        if entry is not None:
+            entry[1].discard(username)
+
+    async def refresh_online(self, node_id: str, ttl: float) -> None:
+        entry = self._online.get(node_id)
+        if entry is not None:
+            self._online[node_id] = (self._clock() + ttl, entry[1])
+
+    async def clear_online(self, node_id: str) -> None:
+        self._online.pop(node_id, None)
+
+    async def filter_online(self, usernames: List[str]) -> Set[str]:
+        now = self._clock()
+        online = set()
+        for expires_at, users in self._online.values():
+            if expires_at > now:
+                online.update(username for username in usernames if username in users)
+        return online
+
+    async def queue_frames(self, usernames: List[str], frame: str, ttl: float, limit: int) -> None:
+        expires_at = self._clock() + ttl
+        for username in usernames:
+            frames = await self.take_frames(username)
+            if len(frames) < limit:
+                frames.append(frame)
+            self._queued[username] = (expires_at, frames)
+
+    async def take_frames(self, username: str) -> List[str]:
+        expires_at, frames = self._queued.pop(username, (0, []))
+        return frames if expires_at > self._clock() else []
+
+    async def get_presence(self) -> Dict[str, Dict[str, int]]:
+        now = self._clock()
+        return {node: counts for node, (expires_at, counts) in self._presence.items() if expires_at > now}
+
+    async def clear_presence(self, node_id: str) -> None:
+        self._presence.pop(node_id, None)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBroker:
+    """Redis PUBLISH/SUBSCRIBE와 노드별 presence 해시를 쓰는 브로커."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._handlers: Dict[str, MessageHandler] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers[channel] = handler
+        await self._pubsub.subscribe(channel)
+        if self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen())
+
+    async def unsubscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers.pop(channel, None)
+        await self._pubsub.unsubscribe(channel)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                handler = self._handlers.get(message["channel"])
+                if handler is not None:
+                    handler(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Backplane listen error: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    async def set_presence(self, node_id: str, counts: Dict[str, int], ttl: float) -> None:
+        key = PRESENCE_PREFIX + node_id
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if counts:
+                pipe.hset(key, mapping=counts)
+            pipe.expire(key, max(1, int(ttl)))
+            await pipe.execute()
+
+    async def get_presence(self) -> Dict[str, Dict[str, int]]:
+        nodes = {}
+        async for key in self._redis.scan_iter(match=PRESENCE_PREFIX + "*"):
+            counts = await self._redis.hgetall(key)
+            nodes[key[len(PRESENCE_PREFIX):]] = {name: int(viewers) for name, viewers in counts.items()}
+        return nodes
+
+    async def clear_presence(self, node_id: str) -> None:
+        await self._redis.delete(PRESENCE_PREFIX + node_id)
+
+    async def get_room(self, name: str) -> Optional[str]:
+        return await self._redis.get(ROOM_SETTINGS_PREFIX + name)
+
+    async def set_room(self, name: str, value: str, ttl: float) -> None:
+        await self._redis.set(ROOM_SETTINGS_PREFIX + name, value, ex=max(1, int(ttl)))
+
+    async def add_online(self, node_id: str, username: str, ttl: float) -> None:
+        key = ONLINE_PREFIX + node_id
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, username)
+            pipe.expire(key, max(1, int(ttl)))
+            await pipe.execute()
+
+    async def remove_online(self, node_id: str, username: str) -> None:
+        await self._redis.srem(ONLINE_PREFIX + node_id, username)
+
+    async def refresh_online(self, node_id: str, ttl: float) -> None:
+        await self._redis.expire(ONLINE_PREFIX + node_id, max(1, int(ttl)))
+
+    async def clear_online(self, node_id: str) -> None:
+        await self._redis.delete(ONLINE_PREFIX + node_id)
+
+    async def filter_online(self, usernames: List[str]) -> Set[str]:
+        # 노드별 집합에 한 번씩 SMISMEMBER. 죽은 노드의 집합은 TTL로 사라진다
+        keys = [key async for key in self._redis.scan_iter(match=ONLINE_PREFIX + "*")]
+        if not keys or not usernames:
+            return set()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.smismember(key, usernames)
+            results = await pipe.execute()
+        return {username for flags in results for username, flag in zip(usernames, flags) if flag}
+
+    async def queue_frames(self, usernames: List[str], frame: str, ttl: float, limit: int) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for username in usernames:
+                key = QUEUED_PREFIX + username
+                pipe.rpush(key, frame)
+                # 먼저 쌓인 limit개만 남긴다
+                pipe.ltrim(key, 0, limit - 1)
+                pipe.expire(key, max(1, int(ttl)))
+            await pipe.execute()
+
+    async def take_frames(self, username: str) -> List[str]:
+        key = QUEUED_PREFIX + username
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key)
+            frames, _ = await pipe.execute()
+        return frames
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+
+class BrokerBackplane(Backplane):
+    """브로커(Redis 또는 MemoryBroker)를 통해 여러 워커/노드에 방 이벤트를 전달한다.
+
+    이 노드에 접속자가 있는 방의 채널만 구독하고, 자기 노드가 보낸 이벤트는
+    바로 로컬에 전달한 뒤 브로커에서 돌아온 것은 건너뛴다.
+    각 노드는 방별 접속자 수를 presence로 주기적으로 올리고, 방 목록은 이를 합산한다.
+    방 설정은 브로커에 room_ttl 동안 저장하고, 바뀌면 ROOMS_CHANNEL로 모든 노드에 알린다.
+    """
+
+    def __init__(
+        self,
+        rooms: RoomManager,
+        broker,
+        node_id: Optional[str] = None,
+        presence_interval: float = 2.0,
+        history: Optional[HistoryStore] = None,
+        coalescer: Optional[Coalescer] = None,
+        room_ttl: float = 7 * 24 * 3600,
+    ):
+        super().__init__(rooms, history, coalescer)
+        self.node_id = node_id or uuid.uuid4().hex
+        self._broker = broker
+        self._presence_interval = presence_interval
+        self._room_ttl = room_ttl
+        self.room_errors = 0
+        self._subscribed = set()
+        self._dirty = asyncio.Event()
+        self.publish_errors = 0
+        self._tasks = []
+        rooms.add_listener(self._dirty.set)
+
+    @property
+    def broker(self):
+        return self._broker
+
+    @property
+    def presence_interval(self) -> float:
+        return self._presence_interval
+
+    async def start(self) -> None:
+        await super().start()
+        await self._broker.subscribe(ROOMS_CHANNEL, self._on_room)
+        self._dirty.set()
+        self._tasks = [
+            asyncio.ensure_future(self._sync_subscriptions()),
+            asyncio.ensure_future(self._publish_presence()),
+        ]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await super().close()
+        try:
+            await self._broker.clear_presence(self.node_id)
+        finally:
+            await self._broker.close()
+
+    async def publish(
+        self,
+        room_name: str,
+        frame: str,
+        history_id: Optional[str] = None,
+        min_protocol: int = 1,
+        max_protocol: Optional[int] = None,
+    ) -> None:
+        # 로컬 전달을 먼저 하므로 브로커가 실패해도 이 노드의 접속자는 받는다
+        await super().publish(room_name, frame, history_id, min_protocol, max_protocol)
+        await self._broker_publish(
+            room_name, self._envelope(OP_PUBLISH, history_id, frame, min_protocol, max_protocol)
+        )
+
+    async def record(self, room_name: str, history_id: str, frame: str) -> None:
+        await super().record(room_name, history_id, frame)
+        await self._broker_publish(room_name, self._envelope(OP_RECORD, history_id, frame))
+
+    async def _broker_publish(self, room_name: str, envelope: str) -> None:
+        # 브로커 오류가 보낸 사람의 웹소켓까지 끊지 않게 여기서 삼킨다
+        try:
+            await self._broker.publish(CHANNEL_PREFIX + room_name, envelope)
+        except Exception as e:
+            self.publish_errors += 1
+            print(f"Backplane publish error: {str(e)}")
+
+    async def load_room(self, room_name: str) -> None:
+        # 이 노드에 있는 방은 ROOMS_CHANNEL로 이미 최신 설정을 받고 있다
+        if room_name in self._rooms:
+            return
+        try:
+            value = await self._broker.get_room(room_name)
+        except Exception as e:
+            self.room_errors += 1
+            print(f"Backplane room load error: {str(e)}")
+            return
+        if value is not None:
+            self._rooms.apply_settings(room_name, RoomSettings.from_dict(orjson.loads(value)))
+
+    async def save_room(self, room: Room) -> None:
+        value = orjson.dumps(room.settings().to_dict()).decode()
+        try:
+            await self._broker.set_room(room.name, value, self._room_ttl)
+            await self._broker.publish(ROOMS_CHANNEL, f"{self.node_id} {room.name}\n{value}")
+        except Exception as e:
+            self.room_errors += 1
+            print(f"Backplane room save error: {str(e)}")
+
+    def _on_room(self, channel: str, message: str) -> None:
+        header, _, value = message.partition("\n")
+        origin, _, room_name = header.partition(" ")
+        if origin == self.node_id:
+            return
+        self._rooms.apply_settings(room_name, RoomSettings.from_dict(orjson.loads(value)))
+
+    def _envelope(
+        self,
+        op: str,
+        history_id: Optional[str],
+        frame: str,
+        min_protocol: int = 1,
+        max_protocol: Optional[int] = None,
+    ) -> str:
+        # "<node_id> <op> <history_id> <min_protocol> <max_protocol>\n<frame>"
+        header = f"{self.node_id} {op} {history_id or NO_HISTORY} {min_protocol}"
+        if max_protocol is not None:
+            header += f" {max_protocol}"
+        return f"{header}\n{frame}"
+
+    def _on_message(self, channel: str, message: str) -> None:
+        header, _, frame = message.partition("\n")
+        # min_protocol/max_protocol이 없는 이전 형식도 받는다
+        origin, op, history_id, *rest = header.split(" ")
+        min_protocol = int(rest[0]) if rest else 1
+        max_protocol = int(rest[1]) if len(rest) > 1 else None
+        if origin == self.node_id:
+            return
+        self.received += 1
+        room_name = channel[len(CHANNEL_PREFIX):]
+        if op == OP_PUBLISH:
+            self._deliver(room_name, frame, min_protocol, max_protocol)
+        if history_id != NO_HISTORY:
+            self.history.record(room_name, history_id, frame)
+
+    async def _sync_subscriptions(self) -> None:
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            try:
+                wanted = set(self._rooms.names())
+                for name in wanted - self._subscribed:
+                    await self._broker.subscribe(CHANNEL_PREFIX + name, self._on_message)
+                    self._subscribed.add(name)
+                for name in self._subscribed - wanted:
+                    await self._broker.unsubscribe(CHANNEL_PREFIX + name, self._on_message)
+                    self._subscribed.discard(name)
+            except Exception as e:
+                print(f"Backplane subscribe error: {str(e)}")
+                await asyncio.sleep(1.0)
+                self._dirty.set()
+
+    async def _publish_presence(self) -> None:
+        while True:
+            try:
+                await self._broker.set_presence(
+                    self.node_id, self._local_counts(), ttl=self._presence_interval * 3
+                )
+            except Exception as e:
+                print(f"Backplane presence error: {str(e)}")
+            await asyncio.sleep(self._presence_interval)
+
+    async def room_counts(self) -> Dict[str, int]:
+        nodes = await self._broker.get_presence()
+        # 이 노드는 presence 주기를 기다리지 않고 현재 값을 쓴다
+        nodes[self.node_id] = self._local_counts()
+        counts: Dict[str, int] = {}
+        for node_counts in nodes.values():
+            for name, viewers in node_counts.items():
+                counts[name] = counts.get(name, 0) + viewers
+        return counts
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["node_id"] = self.node_id
+        stats["subscribed_rooms"] = len(self._subscribed)
+        stats["publish_errors"] = self.publish_errors
+        stats["room_errors"] = self.room_errors
+        return stats
+
+
+def create_backplane(config: DefaultConfig, rooms: RoomManager) -> Backplane:
+    history = HistoryStore(
+        max_messages=config.chat_history_size,
+        max_bytes=config.chat_history_max_bytes,
+        max_rooms=config.chat_history_max_rooms,
+    )
+    coalescer = Coalescer.from_config(config, rooms) if config.chat_coalesce_enabled else None
+    if config.chat_backplane == "inprocess":
+        return InProcessBackplane(rooms, history, coalescer)
+    if config.chat_backplane == "redis":
+        broker = RedisBroker(config.redis_url)
+    elif config.chat_backplane == "memory":
+        broker = MemoryBroker()
+    else:
+        raise ValueError(f"Unknown chat backplane: {config.chat_backplane}")
+    return BrokerBackplane(
+        rooms,
+        broker,
+        node_id=config.chat_node_id or None,
+        presence_interval=config.chat_presence_interval_seconds,
+        history=history,
+        coalescer=coalescer,
+        room_ttl=config.chat_room_settings_ttl_seconds,
+    )
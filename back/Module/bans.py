@@ -0,0 +1,212 @@
+import asyncio
+import math
+import sys
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from dependencies.config import DefaultConfig
+
+
+# is_banned() 몇 번에 한 번 조회 시간을 잴지
+LATENCY_SAMPLE_EVERY = 64
+
+
+class BloomFilter:
+    """(방송인, 사용자) 쌍의 Bloom filter. 없다고 하면 확실히 없고, 있다고 하면 set에서 다시 확인한다."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        # double hashing: 해시 한 번을 두 값으로 나눠 k개의 위치를 만든다
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = value & 0xFFFFFFFF, (value >> 32) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key) -> None:
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key) -> bool:
+        array = self._array
+        for position in self._positions(key):
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+
+class BanIndex:
+    """방송인(username) -> 밴된 username 집합. 채팅 메시지마다 DB 대신 여기서 확인한다.
+
+    시작할 때 loader로 전부 읽고, 밴/해제는 ban()/unban()으로 바로 반영한다.
+    다른 노드에서 생긴 변경은 refresh_seconds마다 다시 읽어서 맞춘다. 읽는 동안 들어온
+    ban()/unban()은 기록해 두었다가 새로 읽은 내용 위에 다시 적용한다.
+    전체 밴 수가 bloom_threshold 이상이면 set 앞에 Bloom filter를 둔다(0이면 사용 안 함).
+    """
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[], Awaitable[Iterable[Tuple[str, str]]]]] = None,
+        refresh_seconds: float = 60.0,
+        bloom_threshold: int = 0,
+        bloom_error_rate: float = 0.01,
+    ):
+        self._loader = loader
+        self._refresh = refresh_seconds
+        self._bloom_threshold = bloom_threshold
+        self._bloom_error_rate = bloom_error_rate
+        self._bans: Dict[str, Set[str]] = {}
+        self._bloom: Optional[BloomFilter] = None
+        self._task: Optional[asyncio.Task] = None
+        # reload 중이면 그 사이의 (밴 여부, 방송인, 사용자) 변경 목록
+        self._pending: Optional[List[Tuple[bool, str, str]]] = None
+        self._lookup_ns = 0
+        self._lookup_samples = 0
+        self.checks = 0
+        self.hits = 0
+        self.bloom_negatives = 0
+        self.loads = 0
+        self.last_load_ms = 0.0
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig, loader=None) -> "BanIndex":
+        return cls(
+            loader,
+            refresh_seconds=config.chat_ban_refresh_seconds,
+            bloom_threshold=config.chat_ban_bloom_threshold,
+            bloom_error_rate=config.chat_ban_bloom_error_rate,
+        )
+
+    async def start(self) -> None:
+        if self._loader is None:
+            return
+        await self.reload()
+        if self._refresh > 0:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh)
+            await self.reload()
+
+    async def reload(self) -> None:
+        # loader는 DB를 읽는 동안 양보하므로 그 사이의 ban()/unban()이 덮어써지지 않게 다시 적용한다
+        self._pending = []
+        try:
+            pairs = await self._loader()
+        except Exception as e:
+            print(f"Error loading bans: {str(e)}")
+            return
+        finally:
+            pending, self._pending = self._pending, None
+        self.load(pairs)
+        for banned, streamer, username in pending:
+            if banned:
+                self.ban(streamer, username)
+            else:
+                self.unban(streamer, username)
+
+    def load(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        start = time.perf_counter()
+        bans: Dict[str, Set[str]] = {}
+        for streamer, username in pairs:
+            bans.setdefault(streamer, set()).add(username)
+        bloom = None
+        total = sum(len(users) for users in bans.values())
+        if self._bloom_threshold and total >= self._bloom_threshold:
+            # 이후 ban()으로 늘어날 여유를 두고 만든다
+            bloom = BloomFilter(total * 2, self._bloom_error_rate)
+            for streamer, users in bans.items():
+                for username in users:
+                    bloom.add((streamer, username))
+        # 통째로 바꿔서 읽는 쪽이 중간 상태를 보지 않게
+        self._bans, self._bloom = bans, bloom
+        self.loads += 1
+        self.last_load_ms = (time.perf_counter() - start) * 1000
+
+    def ban(self, streamer: str, username: str) -> None:
+        if self._pending is not None:
+            self._pending.append((True, streamer, username))
+        self._bans.setdefault(streamer, set()).add(username)
+        if self._bloom is not None:
+            self._bloom.add((streamer, username))
+
+    def unban(self, streamer: str, username: str) -> None:
+        # Bloom filter에서는 지울 수 없다. 남은 비트는 다음 reload에서 정리된다
+        if self._pending is not None:
+            self._pending.append((False, streamer, username))
+        users = self._bans.get(streamer)
+        if users is not None:
+            users.discard(username)
+            if not users:
+                del self._bans[streamer]
+
+    def has_bans(self, streamer: Optional[str]) -> bool:
+        return streamer is not None and streamer in self._bans
+
+    def is_banned(self, streamer: Optional[str], username: str) -> bool:
+        self.checks += 1
+        if self.checks % LATENCY_SAMPLE_EVERY:
+            return self._lookup(streamer, username)
+        # 시간 재기도 비용이라 일부 조회만 잰다
+        start = time.perf_counter_ns()
+        banned = self._lookup(streamer, username)
+        self._lookup_ns += time.perf_counter_ns() - start
+        self._lookup_samples += 1
+        return banned
+
+    def _lookup(self, streamer: Optional[str], username: str) -> bool:
+        if streamer is None:
+            return False
+        if self._bloom is not None and (streamer, username) not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+        users = self._bans.get(streamer)
+        if users is not None and username in users:
+            self.hits += 1
+            return True
+        return False
+
+    def memory_bytes(self) -> int:
+        # dict, set, 문자열 객체 크기의 합. 같은 username이 여러 방에 있으면 중복으로 센다
+        size = sys.getsizeof(self._bans)
+        for streamer, users in self._bans.items():
+            size += sys.getsizeof(streamer) + sys.getsizeof(users)
+            size += sum(sys.getsizeof(username) for username in users)
+        if self._bloom is not None:
+            size += self._bloom.nbytes
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "streamers": len(self._bans),
+            "bans": sum(len(users) for users in self._bans.values()),
+            "memory_bytes": self.memory_bytes(),
+            "bloom": {
+                "bits": self._bloom.bits,
+                "hashes": self._bloom.hashes,
+                "bytes": self._bloom.nbytes,
+            } if self._bloom is not None else None,
+            "checks": self.checks,
+            "lookup_ns_avg": round(self._lookup_ns / self._lookup_samples) if self._lookup_samples else None,
+            "hits": self.hits,
+            "bloom_negatives": self.bloom_negatives,
+            "loads": self.loads,
+            "last_load_ms": self.last_load_ms,
+        }
@@ -1,37 +1,233 @@
-import requests
-import os
+import asyncio
+import uuid
+from typing import Optional
+import orjson
+from dependencies import database
+from dependencies.config import get_config
+from domains.users.repositories import SocialRepository, UserRepository
+from .bans import BanIndex
+from .backplane import BrokerBackplane, create_backplane
+from .chatlog import ChatLogWriter
+from .heartbeat import Heartbeat
+from .lexicon import LexiconFilter
+from .notify import BrokerNotificationHub, LiveNotifier
+from .moderation import BAD_LABEL, ModerationCache, ModerationClient, TieredModerator
+from .ratelimit import RateLimiter
+from .rooms import Room, RoomManager
+from .shedding import LoadShedder
 
 
 # Hugging Face API 설정
-API_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-API_URL = "https://api-inference.huggingface.co/models/smilegate-ai/kor_unsmile"
-headers = {
-    "Authorization": f"Bearer {API_TOKEN}",
-    "Content-Type": "application/json"
-}
+config = get_config()
+moderation_client = ModerationClient.from_config(config)
+moderation_cache = ModerationCache.from_config(moderation_client, config)
+lexicon_filter = LexiconFilter.from_file(config.moderation_lexicon_path, BAD_LABEL)
+moderator = TieredModerator(lexicon_filter, moderation_cache)
+room_manager = RoomManager(config.chat_default_moderation_mode, config.chat_room_registry_size)
+backplane = create_backplane(config, room_manager)
+chat_log = ChatLogWriter.from_config(config)
+rate_limiter = RateLimiter.from_config(config)
+load_shedder = LoadShedder.from_config(config, room_manager)
+heartbeat = Heartbeat.from_config(config, room_manager)
+
+
+async def load_bans():
+    async with database.AsyncSessionLocal() as session:
+        return await SocialRepository(session).list_ban_pairs()
+
+
+ban_index = BanIndex.from_config(config, load_bans)
+
+
+async def load_followers(streamer: str, after_user_id: int, limit: int):
+    # 페이지마다 세션을 새로 열어서 큰 팬아웃 동안 커넥션을 오래 잡지 않는다
+    async with database.ReadSessionLocal() as session:
+        return await SocialRepository(session).get_follower_batch(streamer, after_user_id, limit)
+
+
+# 여러 워커가 브로커를 쓰면 접속 중인 팔로워와 밀린 알림도 브로커로 공유한다
+notification_hub = (
+    BrokerNotificationHub(backplane.broker, backplane.node_id, backplane.presence_interval)
+    if isinstance(backplane, BrokerBackplane)
+    else None
+)
+live_notifier = LiveNotifier.from_config(config, load_followers, notification_hub)
+
+STRICT = "strict"
+OPTIMISTIC = "optimistic"
+DONATION = "donation"
+# moderation 이벤트(앞서 보낸 메시지에 판정을 붙이는 패치)를 이해하는 클라이언트 버전.
+# 예전 클라이언트는 빈 채팅 말풍선으로 보여주므로 보내지 않는다
+MODERATION_PROTOCOL = 2
+
+_background_tasks = set()
 
 async def check_content(text):
+    return await moderator.classify(text)
+
+
+def new_message_id() -> str:
+    return uuid.uuid4().hex
+
+
+def encode_frame(message: dict) -> str:
+    return orjson.dumps(message).decode()
+
+
+def filter_result(category, score, tier) -> dict:
+    return {"category": category, "score": score, "tier": tier}
+
+
+def spawn(coro) -> asyncio.Task:
+    # 태스크가 GC되지 않도록 끝날 때까지 참조를 유지
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def publish_optimistic(room_name: str, message: dict):
+    # optimistic 모드: moderation 이벤트를 이해하는 클라이언트에게만 판정 전에 먼저 보낸다.
+    # 예전 클라이언트는 판정을 반영할 수 없으므로 strict 모드처럼 판정이 붙은 메시지만 받는다
+    await broadcast(room_name, message, min_protocol=MODERATION_PROTOCOL)
+    spawn(publish_verdict(room_name, message))
+
+
+async def publish_verdict(room_name: str, message: dict):
+    # 판정 결과를 moderation 이벤트로 뒤따라 보낸다. 기록에는 판정이 끝난 메시지만 남긴다
+    try:
+        category, score, tier = await moderator.classify_remote(message["message"])
+        result = filter_result(category, score, tier)
+        await broadcast(
+            room_name,
+            {"type": "moderation", "id": message["id"], "filter_result": result},
+            min_protocol=MODERATION_PROTOCOL,
+        )
+        moderated = dict(message, filter_result=result)
+        await broadcast(room_name, moderated, history_id=moderated["id"], max_protocol=MODERATION_PROTOCOL - 1)
+        await chat_log.submit(room_name, moderated)
+    except Exception as e:
+        print(f"Error in moderation verdict: {str(e)}")
+
+
+def rate_key(user: Optional[str], client_ip: str) -> str:
+    # 프레임의 username은 클라이언트가 마음대로 정하므로 쓰지 않는다.
+    # 웹소켓을 열 때 인증된 연결은 사용자 단위, 익명 연결은 IP 단위로 버킷과 벌점을 둔다
+    return f"user:{user}" if user is not None else f"ip:{client_ip}"
+
+
+async def load_chat_penalty(user: str) -> None:
+    # 인증된 사용자만 DB 벌점을 읽는다
     try:
-        payload = {"inputs": text}
-        response = requests.post(API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()[0]
-        
-        for category in result:
-            print(f"Category: {category['label']}, Score: {category['score']}")
-        
-        bad_content = next((item for item in result if item['label'] == '악플/욕설'), None)
-        
-        if bad_content and bad_content['score'] > 0.4:
-            return '악플/욕설', bad_content['score']
-        else:
-            return 'clean', 0.0
+        async with database.AsyncSessionLocal() as session:
+            penalty = await UserRepository(session).get_chat_penalty(user)
+        if penalty:
+            rate_limiter.set_penalty(rate_key(user, ""), penalty)
     except Exception as e:
-        print(f"Error in content check: {str(e)}")
-        return None, None
+        print(f"Error loading chat penalty: {str(e)}")
+
+
+async def escalate_chat_penalty(key: str, user: Optional[str]) -> None:
+    # 반복해서 제한에 걸리면 벌점을 올린다. User.chat_penalty는 인증된 사용자 본인 것만 올리고,
+    # 익명 연결(IP)은 메모리에만 반영한다
+    penalty = None
+    if user is not None:
+        try:
+            async with database.AsyncSessionLocal() as session:
+                penalty = await UserRepository(session).increment_chat_penalty(user)
+        except Exception as e:
+            print(f"Error updating chat penalty: {str(e)}")
+    if penalty is None:
+        penalty = rate_limiter.penalty(key) + 1
+    rate_limiter.set_penalty(key, penalty, mute=True)
+
+
+def admit(room: Room, key: str, connection, user: Optional[str] = None) -> bool:
+    """moderation/fan-out 전에 호출. key는 rate_key(). 제한에 걸리면 보낸 사람에게만 알리고 False."""
+    decision = rate_limiter.check(key, room.name, room.rate_burst, room.rate_refill_per_second)
+    if decision.allowed:
+        return True
+    if decision.escalate:
+        spawn(escalate_chat_penalty(key, user))
+    connection.send(encode_frame({
+        "type": "system",
+        "reason": "muted" if decision.muted else "rate_limited",
+        "retry_after": round(decision.retry_after, 2),
+        "message": "채팅이 일시적으로 제한되었습니다." if decision.muted else "메시지를 너무 빠르게 보내고 있습니다.",
+    }))
+    return False
+
+
+def reject_username(connection, username: str) -> None:
+    # 한 연결의 username은 처음 정해진 것(인증된 연결은 토큰의 사용자)에서 바꿀 수 없다
+    connection.send(encode_frame({
+        "type": "system",
+        "reason": "username_mismatch",
+        "message": f"이 연결에서는 {username}(으)로만 채팅할 수 있습니다.",
+    }))
+
+
+def reject_banned(room: Room, user: Optional[str], connection) -> bool:
+    """이 방 방송인에게 밴된 사용자면 보낸 사람에게만 알리고 True.
+
+    user는 웹소켓을 열 때 인증된 사용자. 익명 연결은 아무 이름이나 쓸 수 있어서 밴을 피할 수 있으므로
+    밴 목록이 있는 방에서는 로그인해야 채팅할 수 있다.
+    """
+    if user is None:
+        if not ban_index.has_bans(room.streamer):
+            return False
+        connection.send(encode_frame({
+            "type": "system",
+            "reason": "login_required",
+            "message": "이 방에서는 로그인해야 채팅할 수 있습니다.",
+        }))
+        return True
+    if not ban_index.is_banned(room.streamer, user):
+        return False
+    connection.send(encode_frame({
+        "type": "system",
+        "reason": "banned",
+        "message": "이 방에서 채팅이 금지되었습니다.",
+    }))
+    return True
+
+
+def is_priority(room: Room, user: Optional[str]) -> bool:
+    # 방송인 메시지는 부하를 줄일 때도 항상 전달한다. 프레임의 username이 아니라 인증된 사용자로 판단
+    return user is not None and user == room.streamer
+
+
+def shed(room: Room, user: Optional[str], message: dict, connection) -> bool:
+    """부하 제한으로 버릴 메시지면 보낸 사람 화면에만 남기고 True."""
+    if load_shedder.admit(room, is_priority(room, user)):
+        return False
+    connection.send(encode_frame(message))
+    return True
+
+
+def replay_history(room_name: str, connection, limit: int) -> None:
+    for frame in backplane.history.recent(room_name, limit):
+        connection.send(frame)
+
+
+async def publish_donation(room_name: str, username: str, amount, message: Optional[str]):
+    # 후원 프레임은 /rooms/{room}/donations에서 실제로 차감된 뒤 서버만 만든다.
+    # 부하 제한 없이 항상 전달한다
+    data = {"type": DONATION, "id": new_message_id(), "username": username, "amount": str(amount), "message": message or ""}
+    if message:
+        data["filter_result"] = filter_result(*await check_content(message))
+    await publish_moderated(room_name, data)
+
 
+async def publish_moderated(room_name: str, message: dict):
+    # 판정이 끝난 채팅 메시지: 전달하고, 최근 기록과 채팅 로그에 남긴다
+    await broadcast(room_name, message, history_id=message["id"])
+    await chat_log.submit(room_name, message)
 
 
-async def broadcast(room_name: str, message: dict, rooms: dict):
-    for connection in rooms[room_name]:
-        await connection.send_json(message)
+async def broadcast(
+    room_name: str, message: dict, history_id: str = None, min_protocol: int = 1, max_protocol: int = None
+):
+    # 한 번만 직렬화해서 backplane으로 보낸다. 각 노드는 같은 프레임을
+    # 로컬 연결의 송신 큐에 넣고, 실제 전송은 연결별 writer 태스크가 맡는다
+    await backplane.publish(room_name, encode_frame(message), history_id, min_protocol, max_protocol)
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy.exc import DataError, IntegrityError
+from dependencies import database
+from dependencies.config import DefaultConfig
+from domains.chats.models import ChatLog
+from domains.chats.repositories import ChatLogRepository
+
+_STOP = object()
+_ROOM_NAME_LENGTH = ChatLog.__table__.c.room_name.type.length
+_USERNAME_LENGTH = ChatLog.__table__.c.username.type.length
+
+
+class ChatLogWriter:
+    """채팅 메시지를 메모리에 모았다가 batch_size 또는 flush_interval마다 한 번에 DB에 쓴다.
+
+    대기열(max_pending)이 가득 차면 submit()이 자리가 날 때까지 기다리므로
+    DB가 밀리면 채팅 처리 쪽에 그대로 backpressure가 걸린다.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval_ms: float = 1000,
+        max_pending: int = 10000,
+        max_retries: int = 3,
+    ):
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = max(0.0, flush_interval_ms) / 1000
+        self._max_pending = max(1, max_pending)
+        self._max_retries = max_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.rows_rejected = 0
+        self.errors = 0
+        self.backpressure_waits = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.max_batch = 0
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig) -> "ChatLogWriter":
+        return cls(
+            batch_size=config.chat_log_batch_size,
+            flush_interval_ms=config.chat_log_flush_interval_ms,
+            max_pending=config.chat_log_max_pending,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None and not self._closing
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._closing = False
+        self._flusher = asyncio.ensure_future(self._run())
+
+    async def submit(self, room_name: str, message: dict) -> None:
+        if not self.running:
+            return
+        result = message.get("filter_result") or {}
+        row = {
+            "message_id": message["id"],
+            # 입구에서 길이를 막지만, 한 행 때문에 배치 전체가 실패하지 않게 여기서도 자른다
+            "room_name": room_name[:_ROOM_NAME_LENGTH],
+            "username": message["username"][:_USERNAME_LENGTH],
+            "message": message.get("message") or "",
+            "category": result.get("category"),
+            "score": result.get("score"),
+            "tier": result.get("tier"),
+            "created_at": datetime.now(timezone.utc),
+        }
+        if self._queue.full():
+            self.backpressure_waits += 1
+        await self._queue.put(row)
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            deadline = time.monotonic() + self._flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                timeout = deadline - time.monotonic()
+                if len(batch) >= self._batch_size or timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]) -> None:
+        for attempt in range(self._max_retries + 1):
+            start = time.perf_counter()
+            try:
+                await self._write(batch)
+            except (DataError, IntegrityError) as e:
+                # 행 자체가 잘못된 경우는 다시 보내도 같으므로 반씩 나눠 다시 쓰고, 문제 행만 버린다
+                self.errors += 1
+                if len(batch) == 1:
+                    self.rows_rejected += 1
+                    print(f"Chat log row rejected ({batch[0]['message_id']}): {str(e)}")
+                    return
+                middle = len(batch) // 2
+                await self._flush(batch[:middle])
+                await self._flush(batch[middle:])
+                return
+            except Exception as e:
+                self.errors += 1
+                print(f"Chat log flush failed ({attempt + 1}/{self._max_retries + 1}): {str(e)}")
+                if attempt < self._max_retries:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.rows_written += len(batch)
+            self.last_flush_ms = elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
+            self.total_flush_ms += elapsed
+            self.max_batch = max(self.max_batch, len(batch))
+            return
+        self.rows_dropped += len(batch)
+
+    async def _write(self, batch: List[dict]) -> None:
+        async with database.AsyncSessionLocal() as session:
+            await ChatLogRepository(session).bulk_insert(batch)
+
+    async def close(self) -> None:
+        # 새 메시지는 더 받지 않고, 대기열에 남은 것을 모두 내려쓴 뒤 종료
+        if not self.running:
+            return
+        self._closing = True
+        await self._queue.put(_STOP)
+        await self._flusher
+        self._flusher = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self._max_pending,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "rows_rejected": self.rows_rejected,
+            "errors": self.errors,
+            "backpressure_waits": self.backpressure_waits,
+            "last_flush_ms": self.last_flush_ms,
+            "avg_flush_ms": self.total_flush_ms / self.flushes if self.flushes else 0.0,
+            "max_flush_ms": self.max_flush_ms,
+            "avg_batch_size": self.rows_written / self.flushes if self.flushes else 0.0,
+            "max_batch_size": self.max_batch,
+        }
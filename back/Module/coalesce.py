@@ -0,0 +1,161 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+from dependencies.config import DefaultConfig
+from .rooms import RoomManager
+
+# 이 버전 이상 클라이언트는 {"type": "batch", "events": [...]} 프레임을 이해한다
+BATCH_PROTOCOL = 2
+
+
+def batch_frame(frames: List[str]) -> str:
+    # 각 프레임은 이미 JSON이므로 다시 직렬화하지 않고 이어 붙인다
+    return '{"type":"batch","events":[' + ",".join(frames) + "]}"
+
+
+class _RoomState:
+    __slots__ = ("window_start", "window_count", "rate", "batching", "calm_since", "pending")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.window_count = 0
+        self.rate = 0.0
+        self.batching = False
+        self.calm_since: Optional[float] = None
+        self.pending: List[str] = []
+
+
+class Coalescer:
+    """메시지가 많은 방에서 tick 동안 모인 이벤트를 한 프레임으로 묶어 보낸다.
+
+    방의 초당 메시지 수가 enable_rate 이상이면 묶음 모드를 켜고, disable_rate 미만이
+    cooldown 동안 이어지면 끈다. 묶음 프레임은 BATCH_PROTOCOL 이상인 클라이언트에게만
+    보내고, 예전 클라이언트는 계속 이벤트마다 한 프레임씩 받는다.
+    """
+
+    def __init__(
+        self,
+        rooms: RoomManager,
+        tick_ms: float = 75,
+        enable_rate: float = 50,
+        disable_rate: float = 20,
+        cooldown_seconds: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._rooms = rooms
+        self._tick = max(1.0, tick_ms) / 1000
+        self._enable_rate = enable_rate
+        self._disable_rate = disable_rate
+        self._cooldown = cooldown_seconds
+        self._clock = clock
+        self._states: Dict[str, _RoomState] = {}
+        self._ticker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.coalesced = 0
+        self.switches = 0
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig, rooms: RoomManager) -> "Coalescer":
+        return cls(
+            rooms,
+            tick_ms=config.chat_coalesce_tick_ms,
+            enable_rate=config.chat_coalesce_enable_rate,
+            disable_rate=config.chat_coalesce_disable_rate,
+            cooldown_seconds=config.chat_coalesce_cooldown_seconds,
+        )
+
+    async def start(self) -> None:
+        self._ticker = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        self.flush()
+
+    def offer(self, room_name: str, frame: str) -> bool:
+        """방이 묶음 모드면 frame을 보관하고 True를 돌려준다.
+
+        True이면 호출자는 예전 프로토콜 클라이언트에게만 frame을 바로 보내면 된다.
+        """
+        now = self._clock()
+        state = self._states.get(room_name)
+        if state is None:
+            state = _RoomState(now)
+            self._states[room_name] = state
+        self._update_rate(room_name, state, now)
+        state.window_count += 1
+        if not state.batching:
+            return False
+        state.pending.append(frame)
+        self.coalesced += 1
+        return True
+
+    def _update_rate(self, room_name: str, state: _RoomState, now: float) -> None:
+        elapsed = now - state.window_start
+        if elapsed < 1.0:
+            return
+        state.rate = state.window_count / elapsed
+        state.window_start = now
+        state.window_count = 0
+        if not state.batching:
+            if state.rate >= self._enable_rate:
+                state.batching = True
+                state.calm_since = None
+                self.switches += 1
+        elif state.rate < self._disable_rate:
+            if state.calm_since is None:
+                state.calm_since = now
+            elif now - state.calm_since >= self._cooldown:
+                # 끄기 전에 모아둔 것을 먼저 보내서 순서가 바뀌지 않게 한다
+                self._flush_room(room_name, state)
+                state.batching = False
+                state.calm_since = None
+                self.switches += 1
+        else:
+            state.calm_since = None
+
+    def _flush_room(self, room_name: str, state: _RoomState) -> None:
+        if not state.pending:
+            return
+        frame = batch_frame(state.pending)
+        state.pending = []
+        self.batches += 1
+        for connection in self._rooms.members(room_name):
+            if connection.protocol_version >= BATCH_PROTOCOL:
+                connection.send(frame)
+
+    def flush(self) -> None:
+        now = self._clock()
+        for room_name in list(self._states):
+            state = self._states[room_name]
+            self._flush_room(room_name, state)
+            if room_name not in self._rooms:
+                del self._states[room_name]
+            else:
+                # 메시지가 끊긴 방도 rate가 갱신되어야 묶음 모드를 켜고 끌 수 있다
+                self._update_rate(room_name, state, now)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._tick)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Coalescer flush error: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "tick_ms": self._tick * 1000,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "switches": self.switches,
+            "by_room": {
+                name: {"rate": round(state.rate, 2), "batching": state.batching}
+                for name, state in self._states.items()
+            },
+        }
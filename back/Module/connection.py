@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Optional
+from fastapi import WebSocket
+from .wire import JSON, MSGPACK, to_msgpack
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# 1013 Try Again Later: 큐가 넘쳐서 서버가 연결을 끊음
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# heartbeat에 응답하지 않아 서버가 끊음 (4000번대는 애플리케이션 정의 코드)
+HEARTBEAT_TIMEOUT_CLOSE_CODE = 4000
+
+
+class SendStats:
+    def __init__(self):
+        self.connections = set()
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.send_errors = 0
+
+    def stats(self) -> dict:
+        depths = [connection.queue_depth for connection in self.connections]
+        return {
+            "connections": len(depths),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "send_errors": self.send_errors,
+        }
+
+
+send_stats = SendStats()
+
+
+class Connection:
+    """웹소켓 하나와 그 전용 송신 큐/writer 태스크.
+
+    큐에는 이미 직렬화된 텍스트 프레임이 들어간다. broadcast는 큐에 넣기만 하므로 느린 클라이언트가 다른 사람의 전송을 막지 않는다.
+    encoding이 msgpack이면 JSON 프레임을 짧은 키의 MessagePack 바이너리 프레임으로 바꿔 보낸다.
+    큐가 가득 차면 overflow_policy에 따라 가장 오래된 메시지를 버리거나(drop_oldest)
+    연결을 끊는다(disconnect).
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int = 256,
+        overflow_policy: str = DROP_OLDEST,
+        stats: SendStats = send_stats,
+        protocol_version: int = 1,
+        encoding: str = JSON,
+    ):
+        self.websocket = websocket
+        self.protocol_version = protocol_version
+        self.encoding = encoding
+        self.closed = False
+        self.last_seen = time.monotonic()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self._policy = overflow_policy
+        self._stats = stats
+        self._writer: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def touch(self) -> None:
+        # 클라이언트에게서 프레임을 받을 때마다 호출 (heartbeat 판정용)
+        self.last_seen = time.monotonic()
+
+    def start(self) -> None:
+        self._stats.connections.add(self)
+        self._writer = asyncio.ensure_future(self._drain())
+
+    def send(self, frame: str) -> bool:
+        # frame은 항상 JSON 텍스트로 받는다
+        if self.closed:
+            return False
+        if self.encoding == MSGPACK:
+            frame = to_msgpack(frame)
+        if self._queue.full():
+            if self._policy == DISCONNECT:
+                self._stats.evicted += 1
+                self.evict(SLOW_CONSUMER_CLOSE_CODE)
+                return False
+            self._queue.get_nowait()
+            self._stats.dropped += 1
+        self._queue.put_nowait(frame)
+        self._stats.enqueued += 1
+        return True
+
+    async def _drain(self) -> None:
+        try:
+            while True:
+                frame = await self._queue.get()
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self._stats.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats.send_errors += 1
+            print(f"Error sending to websocket: {str(e)}")
+            self._mark_closed()
+
+    def _mark_closed(self) -> None:
+        self.closed = True
+        self._stats.connections.discard(self)
+
+    def evict(self, code: int) -> None:
+        # 송신을 멈추고 소켓 종료는 백그라운드로 보낸다. 수신 루프는 disconnect를 받고 정리된다
+        self._mark_closed()
+        if self._writer is not None:
+            self._writer.cancel()
+        self._closer = asyncio.ensure_future(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        self._mark_closed()
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+from dependencies.config import DefaultConfig
+from .connection import HEARTBEAT_TIMEOUT_CLOSE_CODE
+from .rooms import RoomManager
+
+# 이 버전 이상 클라이언트만 ping을 받고 pong으로 답한다. 예전 클라이언트는
+# 모르는 프레임을 채팅으로 보여주므로 보내지 않는다
+HEARTBEAT_PROTOCOL = 2
+PING_FRAME = '{"type":"ping"}'
+PONG_FRAME = '{"type":"pong"}'
+
+
+class Heartbeat:
+    """interval마다 ping을 보내고, 죽은 연결을 방에서 한꺼번에 빼는 reaper.
+
+    timeout 동안 아무 프레임도 보내지 않은 연결(heartbeat 대상만)과 송신 실패로 이미
+    닫힌 연결을 stale로 본다. 빠진 방이 비면 지우고, 접속자 없이 timeout 넘게 남아 있던
+    방도 함께 지운다.
+    """
+
+    def __init__(
+        self,
+        rooms: RoomManager,
+        interval: float = 15.0,
+        timeout: float = 45.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._rooms = rooms
+        self._interval = max(0.1, interval)
+        self._timeout = timeout
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.pings = 0
+        self.reaped = 0
+        self.rooms_deleted = 0
+        self.last_cycle_ms = 0.0
+        self.max_cycle_ms = 0.0
+        self.total_cycle_ms = 0.0
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig, rooms: RoomManager) -> "Heartbeat":
+        return cls(
+            rooms,
+            interval=config.chat_heartbeat_interval_seconds,
+            timeout=config.chat_heartbeat_timeout_seconds,
+        )
+
+    async def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reap(self) -> int:
+        start = time.perf_counter()
+        now = self._clock()
+        stale: Dict[str, list] = {}
+        for name in self._rooms.names():
+            for connection in self._rooms.members(name):
+                heartbeat = connection.protocol_version >= HEARTBEAT_PROTOCOL
+                if connection.closed or (heartbeat and now - connection.last_seen > self._timeout):
+                    stale.setdefault(name, []).append(connection)
+                elif heartbeat:
+                    connection.send(PING_FRAME)
+                    self.pings += 1
+        evicted, deleted = self._rooms.evict(stale, empty_grace=self._timeout)
+        for connections in stale.values():
+            for connection in connections:
+                if not connection.closed:
+                    connection.evict(HEARTBEAT_TIMEOUT_CLOSE_CODE)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.cycles += 1
+        self.reaped += evicted
+        self.rooms_deleted += deleted
+        self.last_cycle_ms = elapsed
+        self.max_cycle_ms = max(self.max_cycle_ms, elapsed)
+        self.total_cycle_ms += elapsed
+        return evicted
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Heartbeat reap error: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self._interval,
+            "timeout_seconds": self._timeout,
+            "cycles": self.cycles,
+            "pings": self.pings,
+            "reaped": self.reaped,
+            "rooms_deleted": self.rooms_deleted,
+            "last_cycle_ms": self.last_cycle_ms,
+            "avg_cycle_ms": self.total_cycle_ms / self.cycles if self.cycles else 0.0,
+            "max_cycle_ms": self.max_cycle_ms,
+        }
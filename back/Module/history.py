@@ -0,0 +1,91 @@
+import sys
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+
+class RoomHistory:
+    """방 하나의 최근 메시지 링 버퍼. 개수와 바이트 수 두 가지 한도를 모두 지킨다."""
+
+    def __init__(self, max_messages: int, max_bytes: int):
+        self._max_messages = max(1, max_messages)
+        self._max_bytes = max(1, max_bytes)
+        self._entries = deque()  # (seq, message_id, frame, size)
+        self._seq_by_id: Dict[str, int] = {}
+        self._next_seq = 0
+        self.bytes = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, message_id: str, frame: str) -> None:
+        size = sys.getsizeof(frame)
+        if size > self._max_bytes or message_id in self._seq_by_id:
+            return
+        self._entries.append((self._next_seq, message_id, frame, size))
+        self._seq_by_id[message_id] = self._next_seq
+        self._next_seq += 1
+        self.bytes += size
+        while len(self._entries) > self._max_messages or self.bytes > self._max_bytes:
+            _, old_id, _, old_size = self._entries.popleft()
+            del self._seq_by_id[old_id]
+            self.bytes -= old_size
+            self.evicted += 1
+
+    def recent(self, limit: int) -> List[str]:
+        if limit <= 0:
+            return []
+        start = max(0, len(self._entries) - limit)
+        return [self._entries[i][2] for i in range(start, len(self._entries))]
+
+    def page(self, before: Optional[str], limit: int) -> List[str]:
+        """before 메시지보다 이전 메시지를 오래된 순서로 최대 limit개 돌려준다."""
+        end = len(self._entries)
+        if before is not None:
+            seq = self._seq_by_id.get(before)
+            if seq is None:
+                return []
+            end = seq - self._entries[0][0]
+        start = max(0, end - limit)
+        return [self._entries[i][2] for i in range(start, end)]
+
+
+class HistoryStore:
+    """방별 RoomHistory 모음. 방 수도 max_rooms로 제한하고 가장 오래 안 쓰인 방부터 버린다."""
+
+    def __init__(self, max_messages: int = 200, max_bytes: int = 256 * 1024, max_rooms: int = 1000):
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        self._max_rooms = max(1, max_rooms)
+        self._rooms: "OrderedDict[str, RoomHistory]" = OrderedDict()
+
+    def record(self, room_name: str, message_id: str, frame: str) -> None:
+        history = self._rooms.get(room_name)
+        if history is None:
+            history = RoomHistory(self._max_messages, self._max_bytes)
+            self._rooms[room_name] = history
+            while len(self._rooms) > self._max_rooms:
+                self._rooms.popitem(last=False)
+        else:
+            self._rooms.move_to_end(room_name)
+        history.append(message_id, frame)
+
+    def recent(self, room_name: str, limit: int) -> List[str]:
+        history = self._rooms.get(room_name)
+        return history.recent(limit) if history is not None else []
+
+    def page(self, room_name: str, before: Optional[str], limit: int) -> List[str]:
+        history = self._rooms.get(room_name)
+        return history.page(before, limit) if history is not None else []
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self._rooms),
+            "max_messages_per_room": self._max_messages,
+            "max_bytes_per_room": self._max_bytes,
+            "bytes": sum(history.bytes for history in self._rooms.values()),
+            "by_room": {
+                name: {"messages": len(history), "bytes": history.bytes, "evicted": history.evicted}
+                for name, history in self._rooms.items()
+            },
+        }
@@ -0,0 +1,199 @@
+import json
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BLOCK = "block"
+SUSPECT = "suspect"
+ALLOW = "allow"
+# 접기(_FOLD) 없이 원래 자모 그대로 맞아야 차단하는 욕설. "씹"을 접으면 "십"(열, 십자가)과 같아진다
+EXACT = "exact"
+
+DEFAULT_LEXICON = {
+    # 확실한 욕설: 음절 단위로 정확히 맞으면 모델 없이 바로 차단
+    BLOCK: [
+        "씨발", "시발", "ㅅㅂ", "ㅆㅂ", "병신", "ㅂㅅ", "개새끼", "개새기",
+        "좆", "좇같", "지랄", "ㅈㄹ", "니애미", "느금마", "엠창",
+    ],
+    EXACT: ["씹"],
+    # 문맥에 따라 달라지는 표현: 걸리면 모델로 넘긴다
+    SUSPECT: [
+        "미친", "ㅁㅊ", "존나", "ㅈㄴ", "닥쳐", "꺼져", "븅신", "또라이",
+        "한남", "김치녀", "틀딱", "짱깨", "급식충",
+    ],
+    # 욕설이 포함되어 있지만 정상적인 단어 / 메시지 전체가 이와 같으면 바로 통과
+    ALLOW: [
+        "시발점", "시발역", "시발택시", "씹다", "씹어", "씹고", "병신년",
+        "ㅋㅋ", "ㅎㅎ", "ㅠㅠ", "안녕", "안녕하세요", "하이", "gg", "굿",
+    ],
+}
+
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = [
+    "", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+    "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+]
+_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+}
+# 된소리와 헷갈리기 쉬운 모음을 하나로 접어서 "씨발"/"시발", "새끼"/"세끼"를 같게 본다
+_FOLD = str.maketrans("ㄲㄸㅃㅆㅉㅔㅖ", "ㄱㄷㅂㅅㅈㅐㅒ")
+# 이 문자들로만 이루어진 메시지(웃음, 울음, 숫자, 이모지/문장부호)는 검사할 필요가 없다
+_TRIVIAL = set("ㅋㅎㅠㅜㄷㅇㅡ0123456789")
+
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_LAST = 0xD7A3
+
+
+def _decompose(char: str) -> str:
+    code = ord(char)
+    if _SYLLABLE_BASE <= code <= _SYLLABLE_LAST:
+        index = code - _SYLLABLE_BASE
+        cho, rest = divmod(index, 21 * 28)
+        jung, jong = divmod(rest, 28)
+        return _CHO[cho] + _JUNG[jung] + _JONG[jong]
+    return _COMPOUND_JAMO.get(char, char)
+
+
+def normalize(text: str, fold: bool = True) -> Tuple[str, List[bool], List[bool], List[bool]]:
+    """텍스트를 공백/문장부호 없는 자모열로 바꾼다. fold면 된소리 등을 _FOLD로 접는다(위치는 그대로).
+
+    자모열과 함께 각 위치가 원래 글자(음절)의 시작인지, 끝인지,
+    바로 앞에 띄어쓰기가 있었는지를 돌려준다.
+    """
+    jamo: List[str] = []
+    unit_start: List[bool] = []
+    unit_end: List[bool] = []
+    gap_before: List[bool] = []
+    gap = False
+    for char in text:
+        code = ord(char)
+        if not (_SYLLABLE_BASE <= code <= _SYLLABLE_LAST or 0x3131 <= code <= 0x318E):
+            char = unicodedata.normalize("NFKC", char).casefold()
+        if not char.isalnum():
+            # 문장부호 끼워넣기("씨!!발")는 우회 시도로 보고, 띄어쓰기만 단어 경계로 취급
+            if jamo and char.isspace():
+                gap = True
+            continue
+        for part in char:
+            unit = _decompose(part)
+            for i, j in enumerate(unit):
+                jamo.append(j)
+                unit_start.append(i == 0)
+                unit_end.append(i == len(unit) - 1)
+                gap_before.append(gap and i == 0)
+            gap = False
+    jamo = "".join(jamo)
+    return jamo.translate(_FOLD) if fold else jamo, unit_start, unit_end, gap_before
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for pattern, kind in patterns:
+            self._add(pattern, kind)
+        self._build()
+
+    def _add(self, pattern: str, kind: str) -> None:
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), kind))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> List[Tuple[int, int, str]]:
+        """(시작, 끝, 종류) 목록을 돌려준다."""
+        hits = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, kind in self._out[node]:
+                hits.append((index + 1 - length, index + 1, kind))
+        return hits
+
+
+class LexiconFilter:
+    """모델 앞단에서 확실한 경우만 로컬로 판정하는 1차 필터.
+
+    check()는 확실히 욕설/정상인 경우 (category, score)를, 애매하면 None을 돌려준다.
+    """
+
+    def __init__(self, lexicon: Dict[str, List[str]], bad_label: str):
+        self._bad_label = bad_label
+        self._allow = set()
+        patterns = []
+        for kind in (BLOCK, SUSPECT, ALLOW):
+            for term in lexicon.get(kind, []):
+                jamo = normalize(term)[0]
+                patterns.append((jamo, kind))
+                if kind == ALLOW:
+                    self._allow.add(jamo)
+        self._automaton = AhoCorasick(patterns)
+        # EXACT는 접지 않은 자모열에서 따로 찾고, 찾으면 BLOCK과 똑같이 다룬다
+        self._exact = AhoCorasick((normalize(term, fold=False)[0], BLOCK) for term in lexicon.get(EXACT, []))
+
+    @classmethod
+    def from_file(cls, path: Optional[str], bad_label: str) -> "LexiconFilter":
+        lexicon = DEFAULT_LEXICON
+        if path:
+            with open(path, encoding="utf-8") as f:
+                lexicon = json.load(f)
+        return cls(lexicon, bad_label)
+
+    def check(self, text: Optional[str]) -> Optional[Tuple[str, float]]:
+        if not text:
+            return 'clean', 0.0
+        raw, unit_start, unit_end, gap_before = normalize(text, fold=False)
+        jamo = raw.translate(_FOLD)
+        if not jamo or all(char in _TRIVIAL for char in jamo):
+            return 'clean', 0.0
+
+        hits = self._automaton.search(jamo) + self._exact.search(raw)
+        allowed = [(start, end) for start, end, kind in hits if kind == ALLOW]
+        escalate = False
+        for start, end, kind in hits:
+            if kind == ALLOW:
+                continue
+            if any(a_start <= start and end <= a_end for a_start, a_end in allowed):
+                continue
+            aligned = (
+                unit_start[start]
+                and unit_end[end - 1]
+                and not any(gap_before[start + 1:end])
+            )
+            if kind == BLOCK and aligned:
+                return self._bad_label, 1.0
+            # 음절 경계에 걸쳐 있거나 띄어쓰기로 쪼갠 경우는 오탐일 수 있으니 모델에 맡긴다
+            escalate = True
+
+        if not escalate and jamo in self._allow:
+            return 'clean', 0.0
+        return None
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+import httpx
+from dependencies.cache import TTLCache
+from dependencies.config import DefaultConfig
+from .lexicon import LexiconFilter
+
+BAD_LABEL = '악플/욕설'
+BAD_THRESHOLD = 0.4
+
+
+def parse_scores(result: List[dict]) -> Tuple[str, float]:
+    bad_content = next((item for item in result if item['label'] == BAD_LABEL), None)
+    if bad_content and bad_content['score'] > BAD_THRESHOLD:
+        return BAD_LABEL, bad_content['score']
+    return 'clean', 0.0
+
+
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+
+
+def normalize_text(text: str) -> str:
+    # 대소문자, 공백, 3번 이상 반복되는 문자("ㅋㅋㅋㅋ" -> "ㅋㅋ")를 정규화
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = " ".join(text.split())
+    return _REPEAT_RE.sub(r"\1\1", text)
+
+
+def cache_key(normalized: str) -> bytes:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class ModerationClient:
+    """kor_unsmile 추론 엔드포인트용 비동기 클라이언트.
+
+    flush_ms 안에 들어온 메시지를 모아 하나의 {"inputs": [...]} 요청으로 보내고,
+    각 호출자에게는 자기 메시지의 (category, score)만 돌려준다.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_token: str = "",
+        batch_size: int = 16,
+        flush_ms: float = 5.0,
+        max_concurrency: int = 4,
+        timeout: float = 10.0,
+    ):
+        self._api_url = api_url
+        self._api_token = api_token
+        self._batch_size = max(1, batch_size)
+        self._flush_delay = max(0.0, flush_ms) / 1000
+        self._max_concurrency = max(1, max_concurrency)
+        self._timeout = timeout
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig) -> "ModerationClient":
+        return cls(
+            api_url=config.moderation_api_url,
+            api_token=config.huggingface_api_token,
+            batch_size=config.moderation_batch_size,
+            flush_ms=config.moderation_flush_ms,
+            max_concurrency=config.moderation_max_concurrency,
+            timeout=config.moderation_timeout_seconds,
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Content-Type": "application/json"}
+            if self._api_token:
+                headers["Authorization"] = f"Bearer {self._api_token}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=self._timeout,
+                limits=httpx.Limits(
+                    max_connections=self._max_concurrency,
+                    max_keepalive_connections=self._max_concurrency,
+                ),
+            )
+        return self._client
+
+    async def classify(self, text: str) -> Tuple[Optional[str], Optional[float]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._flush_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch = self._pending[:self._batch_size]
+            self._pending = self._pending[self._batch_size:]
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            async with self._semaphore:
+                response = await self._get_client().post(self._api_url, json={"inputs": texts})
+                response.raise_for_status()
+                results = response.json()
+            if len(results) != len(batch):
+                raise ValueError(f"expected {len(batch)} results, got {len(results)}")
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(parse_scores(result))
+        except Exception as e:
+            print(f"Error in content check: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_result((None, None))
+
+    async def close(self) -> None:
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ModerationCache:
+    """정규화된 텍스트 기준으로 모더레이션 결과를 캐싱한다.
+
+    같은 키에 대한 동시 조회는 하나의 원격 호출을 공유하고(single-flight),
+    오류 결과 (None, None)는 캐싱하지 않는다.
+    """
+
+    def __init__(self, client: ModerationClient, maxsize: int = 10000, ttl: float = 300.0):
+        self._client = client
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+        self.coalesced = 0
+
+    @classmethod
+    def from_config(cls, client: ModerationClient, config: DefaultConfig) -> "ModerationCache":
+        return cls(
+            client,
+            maxsize=config.moderation_cache_size,
+            ttl=config.moderation_cache_ttl_seconds,
+        )
+
+    async def classify(self, text: str) -> Tuple[Optional[str], Optional[float]]:
+        normalized = normalize_text(text)
+        key = cache_key(normalized)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, normalized))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # 한 호출자가 취소되어도 같은 키를 기다리는 다른 호출자에게는 영향이 없도록 shield
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: bytes, normalized: str) -> Tuple[Optional[str], Optional[float]]:
+        result = await self._client.classify(normalized)
+        if result[0] is not None:
+            self._cache.set(key, result)
+        return result
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stats["coalesced"] = self.coalesced
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+
+class TieredModerator:
+    """로컬 사전 필터(1차)로 확실한 경우를 처리하고, 애매한 메시지만 모델(2차)로 보낸다."""
+
+    TIERS = ("lexicon", "model")
+
+    def __init__(self, lexicon: LexiconFilter, model: ModerationCache):
+        self._lexicon = lexicon
+        self._model = model
+        self._counts = dict.fromkeys(self.TIERS, 0)
+
+    def classify_local(self, text: str) -> Optional[Tuple[str, float, str]]:
+        verdict = self._lexicon.check(text)
+        if verdict is None:
+            return None
+        self._counts["lexicon"] += 1
+        return verdict[0], verdict[1], "lexicon"
+
+    async def classify_remote(self, text: str) -> Tuple[Optional[str], Optional[float], str]:
+        self._counts["model"] += 1
+        category, score = await self._model.classify(text)
+        return category, score, "model"
+
+    async def classify(self, text: str) -> Tuple[Optional[str], Optional[float], str]:
+        result = self.classify_local(text)
+        if result is not None:
+            return result
+        return await self.classify_remote(text)
+
+    async def close(self) -> None:
+        await self._model.close()
+
+    def stats(self) -> dict:
+        total = sum(self._counts.values())
+        return {
+            "total": total,
+            "tiers": {
+                tier: {
+                    "count": count,
+                    "fraction": count / total if total else 0.0,
+                }
+                for tier, count in self._counts.items()
+            },
+            "cache": self._model.stats(),
+        }
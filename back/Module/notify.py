@@ -0,0 +1,251 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import orjson
+from dependencies.cache import TTLCache
+from dependencies.config import DefaultConfig
+
+# 이 버전 이상 클라이언트만 live 알림 프레임을 받는다. 그보다 낮은 연결만 있으면 접속하지 않은 것으로 보고 쌓아 둔다
+NOTIFY_PROTOCOL = 2
+# 다른 노드에 접속한 팔로워에게 보낼 알림을 전달하는 채널
+NOTIFY_CHANNEL = "chat:notify"
+
+FollowerLoader = Callable[[str, int, int], Awaitable[List[Tuple[int, str]]]]
+
+
+class BrokerNotificationHub:
+    """여러 노드가 브로커(Redis 또는 MemoryBroker)로 접속 중인 사용자와 밀린 알림을 공유한다.
+
+    노드마다 접속 중인 username 집합을 ttl로 올려 두고 주기적으로 연장한다(노드가 죽으면 사라진다).
+    어느 노드에든 접속 중인 팔로워에게는 NOTIFY_CHANNEL로 보내고, 아무 데도 없으면 공유 큐에 쌓는다.
+    """
+
+    def __init__(self, broker, node_id: str, refresh_seconds: float = 2.0):
+        self._broker = broker
+        self.node_id = node_id
+        self._refresh = refresh_seconds
+        self._ttl = refresh_seconds * 3
+        self._deliver: Optional[Callable[[List[str], str], int]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.errors = 0
+
+    async def start(self, deliver: Callable[[List[str], str], int]) -> None:
+        self._deliver = deliver
+        await self._broker.subscribe(NOTIFY_CHANNEL, self._on_message)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self._broker.clear_online(self.node_id)
+        except Exception as e:
+            print(f"Notification hub close error: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh)
+            try:
+                await self._broker.refresh_online(self.node_id, self._ttl)
+            except Exception as e:
+                self.errors += 1
+                print(f"Notification hub refresh error: {str(e)}")
+
+    async def online(self, username: str) -> List[str]:
+        """이 노드에 username이 처음 접속했을 때. 다른 노드에서 쌓인 알림을 꺼내 돌려준다."""
+        try:
+            await self._broker.add_online(self.node_id, username, self._ttl)
+            return await self._broker.take_frames(username)
+        except Exception as e:
+            self.errors += 1
+            print(f"Notification hub online error: {str(e)}")
+            return []
+
+    async def offline(self, username: str) -> None:
+        try:
+            await self._broker.remove_online(self.node_id, username)
+        except Exception as e:
+            self.errors += 1
+            print(f"Notification hub offline error: {str(e)}")
+
+    async def fan_out(self, usernames: List[str], frame: str, ttl: float, limit: int) -> int:
+        """접속 중인 사용자 수를 돌려준다. 이 노드의 연결에는 deliver로 바로 보낸다."""
+        online = await self._broker.filter_online(usernames)
+        offline = [username for username in usernames if username not in online]
+        if online:
+            targets = list(online)
+            self._deliver(targets, frame)
+            await self._broker.publish(
+                NOTIFY_CHANNEL, orjson.dumps({"origin": self.node_id, "usernames": targets, "frame": frame}).decode()
+            )
+        if offline:
+            await self._broker.queue_frames(offline, frame, ttl, limit)
+        return len(online)
+
+    def _on_message(self, channel: str, message: str) -> None:
+        data = orjson.loads(message)
+        if data["origin"] != self.node_id:
+            self._deliver(data["usernames"], data["frame"])
+
+
+class LiveNotifier:
+    """방송 시작 알림을 팔로워에게 보낸다.
+
+    팔로워는 loader(streamer, after_user_id, limit)로 follow_user_id 순서의 keyset 페이지를
+    batch_size씩 읽는다. 이 노드에 접속 중인 팔로워에게는 바로 보내고, 나머지는
+    pending에 쌓아 두었다가 접속하면(register) 보낸다. 프레임은 한 번만 만들어 모두가 같이 쓴다.
+    hub가 있으면 접속 여부와 pending을 노드끼리 공유해서 다른 노드에 접속한 팔로워도 받는다.
+    """
+
+    def __init__(
+        self,
+        loader: Optional[FollowerLoader] = None,
+        batch_size: int = 5000,
+        pending_size: int = 200000,
+        pending_ttl: float = 3600.0,
+        pending_per_user: int = 10,
+        hub: Optional[BrokerNotificationHub] = None,
+    ):
+        self._loader = loader
+        self._hub = hub
+        self._pending_ttl = pending_ttl
+        self._batch_size = max(1, batch_size)
+        self._pending_per_user = max(1, pending_per_user)
+        self._pending = TTLCache(pending_size, pending_ttl)
+        self._online: Dict[str, Set] = {}
+        self.fanouts = 0
+        self.followers = 0
+        self.pushed = 0
+        self.queued = 0
+        self.delivered_later = 0
+        self.failed = 0
+        self.last_fanout_ms = 0.0
+        self.last_followers_per_sec = 0.0
+
+    @classmethod
+    def from_config(
+        cls,
+        config: DefaultConfig,
+        loader: Optional[FollowerLoader] = None,
+        hub: Optional[BrokerNotificationHub] = None,
+    ) -> "LiveNotifier":
+        return cls(
+            loader,
+            batch_size=config.notify_batch_size,
+            pending_size=config.notify_pending_size,
+            pending_ttl=config.notify_pending_ttl_seconds,
+            pending_per_user=config.notify_pending_per_user,
+            hub=hub,
+        )
+
+    async def start(self) -> None:
+        if self._hub is not None:
+            await self._hub.start(self._push_many)
+
+    async def close(self) -> None:
+        if self._hub is not None:
+            await self._hub.close()
+
+    async def register(self, username: str, connection) -> None:
+        if connection.protocol_version < NOTIFY_PROTOCOL:
+            return
+        first = username not in self._online
+        self._online.setdefault(username, set()).add(connection)
+        frames = self._pending.pop(username) or ()
+        if first and self._hub is not None:
+            frames = tuple(frames) + tuple(await self._hub.online(username))
+        if frames:
+            for frame in frames:
+                connection.send(frame)
+            self.delivered_later += len(frames)
+
+    async def unregister(self, username: str, connection) -> None:
+        connections = self._online.get(username)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self._online[username]
+                if self._hub is not None:
+                    await self._hub.offline(username)
+
+    async def notify_live(self, streamer: str, room_name: str) -> dict:
+        start = time.perf_counter()
+        frame = orjson.dumps({
+            "type": "live",
+            "streamer": streamer,
+            "room": room_name,
+            "message": f"{streamer} 님이 방송을 시작했습니다.",
+        }).decode()
+        followers = pushed = 0
+        after = 0
+        try:
+            while True:
+                batch = await self._loader(streamer, after, self._batch_size)
+                if not batch:
+                    break
+                if self._hub is not None:
+                    pushed += await self._hub.fan_out(
+                        [username for _, username in batch], frame, self._pending_ttl, self._pending_per_user
+                    )
+                else:
+                    for _, username in batch:
+                        if self._push(username, frame):
+                            pushed += 1
+                        else:
+                            self._queue(username, frame)
+                followers += len(batch)
+                after = batch[-1][0]
+                if len(batch) < self._batch_size:
+                    break
+                # 다음 페이지를 읽기 전에 다른 태스크(채팅)에 루프를 넘긴다
+                await asyncio.sleep(0)
+        except Exception as e:
+            self.failed += 1
+            print(f"Error notifying followers of {streamer}: {str(e)}")
+        elapsed = time.perf_counter() - start
+        self.fanouts += 1
+        self.followers += followers
+        self.pushed += pushed
+        self.queued += followers - pushed
+        self.last_fanout_ms = elapsed * 1000
+        self.last_followers_per_sec = followers / elapsed if elapsed else 0.0
+        return {"followers": followers, "pushed": pushed, "queued": followers - pushed}
+
+    def _push(self, username: str, frame: str) -> bool:
+        connections = self._online.get(username)
+        if not connections:
+            return False
+        for connection in connections:
+            connection.send(frame)
+        return True
+
+    def _push_many(self, usernames: List[str], frame: str) -> int:
+        # 이 노드에 연결이 없는 사용자는 다른 노드가 맡는다
+        return sum(1 for username in usernames if self._push(username, frame))
+
+    def _queue(self, username: str, frame: str) -> None:
+        # list 대신 tuple: 문자열만 담은 tuple은 GC 추적에서 빠져서 수십만 명을 쌓아도 GC 멈춤이 커지지 않는다
+        frames = self._pending.get(username, ())
+        if len(frames) < self._pending_per_user:
+            self._pending.set(username, frames + (frame,))
+
+    def stats(self) -> dict:
+        return {
+            "online_users": len(self._online),
+            "shared": self._hub is not None,
+            "hub_errors": self._hub.errors if self._hub is not None else 0,
+            "pending_users": len(self._pending),
+            "fanouts": self.fanouts,
+            "followers": self.followers,
+            "pushed": self.pushed,
+            "queued": self.queued,
+            "delivered_later": self.delivered_later,
+            "failed": self.failed,
+            "last_fanout_ms": self.last_fanout_ms,
+            "last_followers_per_sec": self.last_followers_per_sec,
+        }
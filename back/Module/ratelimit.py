@@ -0,0 +1,174 @@
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Tuple
+from dependencies.config import DefaultConfig
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: float = 0.0
+    muted: bool = False
+    escalate: bool = False
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+
+class _Offender:
+    __slots__ = ("penalty", "violations", "window_start", "muted_until", "updated")
+
+    def __init__(self, now: float):
+        self.penalty = 0
+        self.violations = 0
+        self.window_start = now
+        self.muted_until = 0.0
+        self.updated = now
+
+
+class RateLimiter:
+    """(사용자, 방) 단위 토큰 버킷.
+
+    chat_penalty가 높을수록 버킷이 작고 느리게 찬다. violation_window 안에
+    violation_threshold번 넘게 막히면 escalate=True를 돌려주고, 호출자는
+    chat_penalty를 올린 뒤 set_penalty()로 반영한다. 벌점이 mute_penalty 이상이 되면
+    일정 시간 동안 모든 메시지를 막는다.
+    오래 쓰이지 않은 상태는 idle_seconds 후에 지워서 활성 사용자 수만큼만 메모리를 쓴다.
+    """
+
+    def __init__(
+        self,
+        burst: int = 5,
+        refill_per_second: float = 1.0,
+        idle_seconds: float = 300.0,
+        violation_threshold: int = 10,
+        violation_window: float = 60.0,
+        mute_penalty: int = 3,
+        mute_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._burst = max(1, burst)
+        self._refill = refill_per_second
+        self._idle = idle_seconds
+        self._violation_threshold = violation_threshold
+        self._violation_window = violation_window
+        self._mute_penalty = mute_penalty
+        self._mute_seconds = mute_seconds
+        self._clock = clock
+        self._buckets: "OrderedDict[Tuple[str, str], _Bucket]" = OrderedDict()
+        self._users: "OrderedDict[str, _Offender]" = OrderedDict()
+        self.allowed = 0
+        self.throttled = 0
+        self.muted = 0
+        self.escalations = 0
+        self.expired = 0
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig) -> "RateLimiter":
+        return cls(
+            burst=config.chat_rate_burst,
+            refill_per_second=config.chat_rate_refill_per_second,
+            idle_seconds=config.chat_rate_idle_seconds,
+            violation_threshold=config.chat_rate_violation_threshold,
+            violation_window=config.chat_rate_violation_window_seconds,
+            mute_penalty=config.chat_mute_penalty,
+            mute_seconds=config.chat_mute_seconds,
+        )
+
+    def penalty(self, user: str) -> int:
+        offender = self._users.get(user)
+        return offender.penalty if offender is not None else 0
+
+    def _user(self, user: str, now: float) -> _Offender:
+        offender = self._users.get(user)
+        if offender is None:
+            offender = _Offender(now)
+            self._users[user] = offender
+        else:
+            self._users.move_to_end(user)
+        offender.updated = now
+        return offender
+
+    def _expire(self, now: float) -> None:
+        # 마지막 사용 순서로 정렬되어 있으므로 앞에서부터 오래된 것만 지우면 된다
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < self._idle:
+                break
+            del self._buckets[key]
+            self.expired += 1
+        while self._users:
+            user, offender = next(iter(self._users.items()))
+            if now - offender.updated < self._idle or offender.muted_until > now:
+                break
+            del self._users[user]
+
+    def set_penalty(self, user: str, penalty: int, mute: bool = False) -> None:
+        now = self._clock()
+        offender = self._user(user, now)
+        offender.penalty = penalty or 0
+        if mute and offender.penalty >= self._mute_penalty:
+            steps = offender.penalty - self._mute_penalty + 1
+            offender.muted_until = now + self._mute_seconds * steps
+
+    def check(
+        self,
+        user: str,
+        room_name: str,
+        burst: Optional[int] = None,
+        refill_per_second: Optional[float] = None,
+    ) -> Decision:
+        now = self._clock()
+        self._expire(now)
+        offender = self._user(user, now)
+        if offender.muted_until > now:
+            self.muted += 1
+            return Decision(False, offender.muted_until - now, muted=True)
+
+        # 벌점만큼 버킷을 줄이고 충전 속도를 늦춘다
+        scale = 1 + offender.penalty
+        capacity = max(1, (burst or self._burst) // scale)
+        rate = (refill_per_second or self._refill) / scale
+
+        key = (user, room_name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(capacity, now)
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            self.allowed += 1
+            return Decision(True)
+
+        self.throttled += 1
+        if now - offender.window_start > self._violation_window:
+            offender.window_start = now
+            offender.violations = 0
+        offender.violations += 1
+        escalate = offender.violations >= self._violation_threshold
+        if escalate:
+            offender.violations = 0
+            offender.window_start = now
+            self.escalations += 1
+        retry_after = (1 - bucket.tokens) / rate if rate > 0 else self._idle
+        return Decision(False, retry_after, escalate=escalate)
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self._buckets),
+            "users": len(self._users),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "muted": self.muted,
+            "escalations": self.escalations,
+            "expired": self.expired,
+        }
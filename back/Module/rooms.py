@@ -0,0 +1,260 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class RoomSettings:
+    """방이 지워져도 이름별로 남겨 두는 값. /create_room에서 정한 방송인과 설정."""
+
+    __slots__ = ("streamer", "moderation_mode", "rate_burst", "rate_refill_per_second")
+
+    def __init__(
+        self,
+        streamer: Optional[str] = None,
+        moderation_mode: Optional[str] = None,
+        rate_burst: Optional[int] = None,
+        rate_refill_per_second: Optional[float] = None,
+    ):
+        self.streamer = streamer
+        self.moderation_mode = moderation_mode
+        self.rate_burst = rate_burst
+        self.rate_refill_per_second = rate_refill_per_second
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RoomSettings":
+        return cls(**{key: data.get(key) for key in cls.__slots__})
+
+
+class Room:
+    def __init__(
+        self,
+        name: str,
+        moderation_mode: str,
+        rate_burst: Optional[int] = None,
+        rate_refill_per_second: Optional[float] = None,
+        streamer: Optional[str] = None,
+    ):
+        self.name = name
+        self.streamer = streamer
+        self.moderation_mode = moderation_mode
+        # None이면 RateLimiter 기본값을 쓴다
+        self.rate_burst = rate_burst
+        self.rate_refill_per_second = rate_refill_per_second
+        self.created_at = time.time()
+        self.peak_viewers = 0
+        self._members = set()
+        self._snapshot: Optional[tuple] = None
+
+    def settings(self) -> RoomSettings:
+        return RoomSettings(self.streamer, self.moderation_mode, self.rate_burst, self.rate_refill_per_second)
+
+    @property
+    def viewers(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, connection) -> bool:
+        return connection in self._members
+
+    def add(self, connection) -> None:
+        self._members.add(connection)
+        self._snapshot = None
+        self.peak_viewers = max(self.peak_viewers, len(self._members))
+
+    def discard(self, connection) -> None:
+        self._members.discard(connection)
+        self._snapshot = None
+
+    def members(self) -> tuple:
+        # 멤버십이 바뀔 때만 새 스냅샷을 만든다(copy-on-write).
+        # broadcast 중에 join/leave가 일어나도 순회 중인 튜플은 바뀌지 않는다
+        if self._snapshot is None:
+            self._snapshot = tuple(self._members)
+        return self._snapshot
+
+    def info(self) -> dict:
+        return {
+            "name": self.name,
+            "moderation_mode": self.moderation_mode,
+            "streamer": self.streamer,
+            "rate_burst": self.rate_burst,
+            "rate_refill_per_second": self.rate_refill_per_second,
+            "created_at": self.created_at,
+            "viewers": self.viewers,
+            "peak_viewers": self.peak_viewers,
+        }
+
+
+class RoomManager:
+    """방 목록과 방별 접속자(set)를 관리한다. join/leave는 O(1)."""
+
+    def __init__(self, default_moderation_mode: str = "strict", max_remembered: int = 10000):
+        self._default_moderation_mode = default_moderation_mode
+        self._rooms: Dict[str, Room] = {}
+        # 방 이름 -> 방송인과 설정. 빈 방이 지워졌다가 join으로 다시 생겨도 밴 확인 대상, moderation 모드,
+        # 속도 제한이 유지되도록 방보다 오래 남긴다. 오래 쓰이지 않은 이름부터 잊는다(LRU)
+        self._registry: "OrderedDict[str, RoomSettings]" = OrderedDict()
+        self._max_remembered = max_remembered
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        # 방이 생기거나 없어질 때 호출된다(backplane 구독 갱신용)
+        self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            callback()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rooms
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def get(self, name: str) -> Optional[Room]:
+        return self._rooms.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._rooms)
+
+    def streamer(self, name: str) -> Optional[str]:
+        settings = self._registry.get(name)
+        return settings.streamer if settings is not None else None
+
+    def settings(self, name: str) -> Optional[RoomSettings]:
+        return self._registry.get(name)
+
+    def _remember(self, room: Room) -> None:
+        settings = room.settings()
+        # join으로 기본값 그대로 생긴 방은 기억할 것이 없다
+        if (
+            settings.streamer is None
+            and settings.moderation_mode == self._default_moderation_mode
+            and settings.rate_burst is None
+            and settings.rate_refill_per_second is None
+        ):
+            return
+        self._store(room.name, settings)
+
+    def _store(self, name: str, settings: RoomSettings) -> None:
+        self._registry[name] = settings
+        self._registry.move_to_end(name)
+        while len(self._registry) > self._max_remembered:
+            self._registry.popitem(last=False)
+
+    def apply_settings(self, name: str, settings: RoomSettings) -> None:
+        """다른 노드에서 정한 방 설정을 반영한다. 이 노드에 이미 있는 방에도 바로 적용한다."""
+        self._store(name, settings)
+        room = self._rooms.get(name)
+        if room is None:
+            return
+        room.streamer = settings.streamer
+        room.moderation_mode = settings.moderation_mode or self._default_moderation_mode
+        room.rate_burst = settings.rate_burst
+        room.rate_refill_per_second = settings.rate_refill_per_second
+
+    def create(
+        self,
+        name: str,
+        moderation_mode: Optional[str] = None,
+        rate_burst: Optional[int] = None,
+        rate_refill_per_second: Optional[float] = None,
+        streamer: Optional[str] = None,
+    ) -> Tuple[Room, bool]:
+        """(방, 새로 만들었거나 방송인이 방을 가져갔으면 True).
+
+        이미 다른 방송인이 쓰던 이름이면 그 방송인과 설정을 유지한다. 호출자는 room.streamer로 확인한다.
+        """
+        remembered = self._registry.get(name)
+        owner = remembered.streamer if remembered is not None else None
+        room = self._rooms.get(name)
+        if room is not None:
+            # 시청자가 먼저 들어와 방송인 없이 생긴 방은 기록된 방송인(기록이 없으면 처음 요청한 사람)이 가져가고
+            # 그 사람이 정한 설정을 적용한다
+            if streamer is not None and room.streamer is None and owner in (None, streamer):
+                room.streamer = streamer
+                if moderation_mode is not None:
+                    room.moderation_mode = moderation_mode
+                if rate_burst is not None:
+                    room.rate_burst = rate_burst
+                if rate_refill_per_second is not None:
+                    room.rate_refill_per_second = rate_refill_per_second
+                self._remember(room)
+                return room, True
+            return room, False
+        if remembered is not None:
+            if streamer is None or owner not in (None, streamer):
+                # join이나 다른 사용자의 요청으로 다시 생기는 방은 기억해 둔 값을 그대로 쓴다
+                streamer = owner
+                moderation_mode = remembered.moderation_mode
+                rate_burst = remembered.rate_burst
+                rate_refill_per_second = remembered.rate_refill_per_second
+            else:
+                # 방송인 본인이 다시 만들면 새로 정한 값을 쓰고, 정하지 않은 값은 이전 값을 쓴다
+                moderation_mode = moderation_mode or remembered.moderation_mode
+                rate_burst = rate_burst if rate_burst is not None else remembered.rate_burst
+                if rate_refill_per_second is None:
+                    rate_refill_per_second = remembered.rate_refill_per_second
+        room = Room(
+            name, moderation_mode or self._default_moderation_mode, rate_burst, rate_refill_per_second, streamer
+        )
+        self._rooms[name] = room
+        self._remember(room)
+        self._notify()
+        return room, True
+
+    def join(self, name: str, connection) -> Room:
+        room, _ = self.create(name)
+        room.add(connection)
+        return room
+
+    def leave(self, name: str, connection) -> None:
+        room = self._rooms.get(name)
+        # reaper가 이미 뺀 연결이면 같은 이름으로 새로 생긴 방을 건드리지 않는다
+        if room is None or connection not in room:
+            return
+        room.discard(connection)
+        if not room.viewers:
+            del self._rooms[name]
+            self._remember(room)
+            self._notify()
+
+    def evict(self, stale: Dict[str, list], empty_grace: Optional[float] = None) -> Tuple[int, int]:
+        """방 이름 -> 끊을 연결 목록을 한 번에 빼고 빈 방을 지운다. (뺀 연결 수, 지운 방 수)
+
+        empty_grace가 있으면 접속자 없이 그 시간(초) 넘게 남아 있던 방도 지운다.
+        """
+        evicted = 0
+        for name, connections in stale.items():
+            room = self._rooms.get(name)
+            if room is None:
+                continue
+            for connection in connections:
+                room.discard(connection)
+            evicted += len(connections)
+        now = time.time()
+        empty = [
+            name
+            for name, room in self._rooms.items()
+            if not room.viewers
+            and (name in stale or (empty_grace is not None and now - room.created_at > empty_grace))
+        ]
+        for name in empty:
+            self._remember(self._rooms.pop(name))
+        if empty:
+            self._notify()
+        return evicted, len(empty)
+
+    def members(self, name: str) -> tuple:
+        room = self._rooms.get(name)
+        return room.members() if room is not None else ()
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self._rooms),
+            "viewers": sum(room.viewers for room in self._rooms.values()),
+            "remembered_rooms": len(self._registry),
+            "by_room": [room.info() for room in self._rooms.values()],
+        }
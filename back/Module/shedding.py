@@ -0,0 +1,98 @@
+import time
+from typing import Callable, Dict
+from dependencies.config import DefaultConfig
+from .rooms import Room, RoomManager
+
+
+class _ShedState:
+    __slots__ = ("window_start", "window_count", "rate", "sample_rate", "credit", "offered", "shed", "priority")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.window_count = 0
+        self.rate = 0.0
+        self.sample_rate = 1.0
+        self.credit = 0.0
+        self.offered = 0
+        self.shed = 0
+        self.priority = 0
+
+
+class LoadShedder:
+    """아주 큰 방에서 채팅 메시지 일부만 골라 moderation/fan-out 한다.
+
+    접속자가 min_viewers 이상이고 초당 메시지가 max_rate를 넘으면
+    sample_rate = max_rate / rate 비율로만 통과시킨다. 무작위 대신 누적 credit으로
+    고르기 때문에 통과 간격이 고르다. priority 메시지(방송인)는 항상 통과하고
+    비율 계산에만 포함된다. 시스템 메시지는 이 경로를 거치지 않는다.
+    """
+
+    def __init__(
+        self,
+        rooms: RoomManager,
+        min_viewers: int = 1000,
+        max_rate: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._rooms = rooms
+        self._min_viewers = min_viewers
+        self._max_rate = max(0.1, max_rate)
+        self._clock = clock
+        self._states: Dict[str, _ShedState] = {}
+        rooms.add_listener(self._prune)
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig, rooms: RoomManager) -> "LoadShedder":
+        return cls(rooms, min_viewers=config.chat_shed_min_viewers, max_rate=config.chat_shed_max_rate)
+
+    def _prune(self) -> None:
+        for name in [name for name in self._states if name not in self._rooms]:
+            del self._states[name]
+
+    def admit(self, room: Room, priority: bool = False) -> bool:
+        now = self._clock()
+        state = self._states.get(room.name)
+        if state is None:
+            state = _ShedState(now)
+            self._states[room.name] = state
+        elapsed = now - state.window_start
+        if elapsed >= 1.0:
+            state.rate = state.window_count / elapsed
+            state.window_start = now
+            state.window_count = 0
+            if room.viewers >= self._min_viewers and state.rate > self._max_rate:
+                state.sample_rate = self._max_rate / state.rate
+            else:
+                state.sample_rate = 1.0
+                state.credit = 0.0
+        state.window_count += 1
+        state.offered += 1
+
+        if priority:
+            state.priority += 1
+            return True
+        if state.sample_rate >= 1.0:
+            return True
+        state.credit += state.sample_rate
+        if state.credit >= 1.0:
+            state.credit -= 1.0
+            return True
+        state.shed += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "min_viewers": self._min_viewers,
+            "max_rate": self._max_rate,
+            "shed": sum(state.shed for state in self._states.values()),
+            "by_room": {
+                name: {
+                    "rate": round(state.rate, 2),
+                    "sample_rate": round(state.sample_rate, 4),
+                    "offered": state.offered,
+                    "shed": state.shed,
+                    "priority": state.priority,
+                }
+                for name, state in self._states.items()
+            },
+        }
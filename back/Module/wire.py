@@ -0,0 +1,55 @@
+from functools import lru_cache
+import orjson
+from .moderation import BAD_LABEL
+
+try:
+    import msgpack
+except ImportError:  # msgpack이 없으면 JSON만 쓴다
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# 자주 나오는 키와 moderation 라벨을 짧게 줄인다. 새 키는 그대로 전달된다
+SHORT_KEYS = {
+    "type": "t",
+    "id": "i",
+    "username": "u",
+    "message": "m",
+    "timestamp": "ts",
+    "filter_result": "f",
+    "category": "c",
+    "score": "s",
+    "tier": "r",
+    "events": "e",
+    "amount": "a",
+    "reason": "why",
+    "retry_after": "ra",
+}
+CATEGORY_CODES = {"clean": 0, BAD_LABEL: 1}
+
+
+def negotiate(encoding: str) -> str:
+    """클라이언트가 요청한 인코딩 중 서버가 지원하는 것. 모르면 JSON."""
+    if encoding == MSGPACK and msgpack is not None:
+        return MSGPACK
+    return JSON
+
+
+def _shorten(value):
+    if isinstance(value, dict):
+        compact = {}
+        for key, item in value.items():
+            if key == "category" and item in CATEGORY_CODES:
+                item = CATEGORY_CODES[item]
+            compact[SHORT_KEYS.get(key, key)] = _shorten(item)
+        return compact
+    if isinstance(value, list):
+        return [_shorten(item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=256)
+def to_msgpack(frame: str) -> bytes:
+    # broadcast는 같은 frame 객체를 모든 연결에 넘기므로 변환은 프레임당 한 번만 일어난다
+    return msgpack.packb(_shorten(orjson.loads(frame)), use_single_float=True)
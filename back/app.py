@@ -1,21 +1,18 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Path, WebSocket, WebSocketDisconnect
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import requests
-import os
-import json
+from Module.chat import (
+    backplane, broadcast, check_content, filter_result, heartbeat, moderator, new_message_id,
+    publish_moderated, replay_history, room_manager,
+)
+from Module.connection import Connection
+from Module.heartbeat import PONG_FRAME
+from Module.wire import JSON, negotiate
+from dependencies.config import get_config
+from domains.users.dto import ROOM_NAME_MAX_LENGTH, ChatMessage, RoomCreateRequest
 
 app = FastAPI()
 
-class RoomCreateRequest(BaseModel):
-    name: str
-
-class ChatMessage(BaseModel):
-    type: str
-    username: str
-    message: str = None
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,82 +21,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-rooms = {}
+config = get_config()
 
-# Hugging Face API 설정
-API_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-API_URL = "https://api-inference.huggingface.co/models/smilegate-ai/kor_unsmile"
-headers = {
-    "Authorization": f"Bearer {API_TOKEN}",
-    "Content-Type": "application/json"
-}
+@app.on_event("startup")
+async def startup():
+    await backplane.start()
+    await heartbeat.start()
 
-async def check_content(text):
-    try:
-        payload = {"inputs": text}
-        response = requests.post(API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()[0]
-        
-        for category in result:
-            print(f"Category: {category['label']}, Score: {category['score']}")
-        
-        bad_content = next((item for item in result if item['label'] == '악플/욕설'), None)
-        
-        if bad_content and bad_content['score'] > 0.4:
-            return '악플/욕설', bad_content['score']
-        else:
-            return 'clean', 0.0
-    except Exception as e:
-        print(f"Error in content check: {str(e)}")
-        return None, None
+@app.on_event("shutdown")
+async def shutdown():
+    await heartbeat.close()
+    await backplane.close()
+    await moderator.close()
 
 @app.websocket("/ws/{room_name}")
-async def websocket_endpoint(websocket: WebSocket, room_name: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    room_name: str = Path(max_length=ROOM_NAME_MAX_LENGTH),
+    v: int = 1,
+    enc: str = JSON,
+):
+    # v: 클라이언트 프로토콜 버전 (2 이상이면 batch 프레임을 받는다)
+    # enc: 서버 -> 클라이언트 프레임 인코딩 (json 기본, msgpack이면 바이너리). 클라이언트가 보내는 건 항상 JSON
     await websocket.accept()
-    if room_name not in rooms:
-        rooms[room_name] = []
-    rooms[room_name].append(websocket)
+    connection = Connection(
+        websocket,
+        config.chat_send_queue_size,
+        config.chat_send_queue_policy,
+        protocol_version=v,
+        encoding=negotiate(enc),
+    )
+    connection.start()
+    await backplane.load_room(room_name)
+    room_manager.join(room_name, connection)
     try:
         while True:
-            data = await websocket.receive_json()
-            chat_message = ChatMessage(**data)
-            
+            raw = await websocket.receive_text()
+            connection.touch()
+            if raw == PONG_FRAME:
+                continue
+            chat_message = ChatMessage.model_validate_json(raw)
+            data = chat_message.model_dump(exclude_none=True)
+
             if chat_message.type == 'join':
+                replay_history(room_name, connection, config.chat_history_replay)
                 join_message = f"{chat_message.username} has joined the room."
                 await broadcast(room_name, {"type": "system", "message": join_message})
             elif chat_message.type == 'message':
-                category, score = await check_content(chat_message.message)
-                
+                category, score, tier = await check_content(chat_message.message)
+
                 print(f"Original message: {chat_message.message}")
-                print(f"Content check result: category={category}, score={score}")
+                print(f"Content check result: category={category}, score={score}, tier={tier}")
 
-                data["filter_result"] = {
-                    "category": category,
-                    "score": score
-                }
+                data["id"] = new_message_id()
+                data["filter_result"] = filter_result(category, score, tier)
 
-                await broadcast(room_name, data)
+                await publish_moderated(room_name, data)
     except WebSocketDisconnect:
-        rooms[room_name].remove(websocket)
-        if not rooms[room_name]:
-            del rooms[room_name]
-
-async def broadcast(room_name: str, message: dict):
-    for connection in rooms[room_name]:
-        await connection.send_json(message)
+        pass
+    finally:
+        await connection.close()
+        room_manager.leave(room_name, connection)
 
 @app.get("/get_rooms")
 async def get_rooms():
-    return list(rooms.keys())
+    return list(await backplane.room_counts())
 
 @app.post("/create_room")
 async def create_room(payload: RoomCreateRequest):
-    if payload.name not in rooms:
-        rooms[payload.name] = []
+    _, created = room_manager.create(payload.name)
+    if created:
         return {"success": True, "message": f"Room '{payload.name}' created successfully"}
     else:
         return {"success": False, "message": f"Room '{payload.name}' already exists"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # permessage-deflate는 클라이언트가 제안할 때만 협상된다(브라우저는 기본으로 제안)
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=config.chat_ws_per_message_deflate)
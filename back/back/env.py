@@ -6,6 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 from dependencies.database import Base
 from domains.users.models import *
+from domains.chats.models import *
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -0,0 +1,40 @@
+"""add chat_messages
+
+Revision ID: 7c1e5a9d2b40
+Revises: 304139f869a2
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e5a9d2b40'
+down_revision: Union[str, None] = '304139f869a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('chat_messages',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('message_id', sa.String(length=32), nullable=False),
+    sa.Column('room_name', sa.String(length=100), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('category', sa.String(length=20), nullable=True),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('tier', sa.String(length=10), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('message_id')
+    )
+    op.create_index('ix_chat_messages_room_name_created_at', 'chat_messages', ['room_name', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_room_name_created_at', table_name='chat_messages')
+    op.drop_table('chat_messages')
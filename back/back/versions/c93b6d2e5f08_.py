@@ -0,0 +1,64 @@
+"""pair indexes, uniqueness and follower/like counters
+
+Revision ID: c93b6d2e5f08
+Revises: a41f3c8e9b17
+Create Date: 2026-10-18 15:21:09.406118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93b6d2e5f08'
+down_revision: Union[str, None] = 'a41f3c8e9b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # unique 제약 전에 중복 follow/like는 가장 먼저 생긴 행만 남긴다
+    op.execute(
+        "DELETE FROM follows a USING follows b "
+        "WHERE a.follow_user_id = b.follow_user_id AND a.follow_streamer_id = b.follow_streamer_id AND a.id > b.id"
+    )
+    op.execute(
+        "DELETE FROM likes a USING likes b "
+        "WHERE a.liked_user_id = b.liked_user_id AND a.liked_streamer_id = b.liked_streamer_id AND a.id > b.id"
+    )
+    op.create_unique_constraint('uq_follows_user_streamer', 'follows', ['follow_user_id', 'follow_streamer_id'])
+    op.create_index('ix_follows_streamer_user', 'follows', ['follow_streamer_id', 'follow_user_id'], unique=False)
+    op.create_unique_constraint('uq_likes_user_streamer', 'likes', ['liked_user_id', 'liked_streamer_id'])
+    op.create_index('ix_likes_streamer_user', 'likes', ['liked_streamer_id', 'liked_user_id'], unique=False)
+    op.create_index('ix_bans_streamer_user', 'bans', ['ben_streamer_id', 'ben_user_id'], unique=False)
+    op.create_index('ix_bans_user_id', 'bans', ['ben_user_id'], unique=False)
+    op.create_index('ix_clips_streamer_id_created_at', 'clips', ['streamer_id', 'created_at'], unique=False)
+    op.create_index('ix_clips_creater_id', 'clips', ['creater_id'], unique=False)
+
+    op.add_column('users', sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE users SET follower_count = c.n FROM "
+        "(SELECT follow_streamer_id AS id, count(*) AS n FROM follows GROUP BY follow_streamer_id) c "
+        "WHERE users.id = c.id"
+    )
+    op.execute(
+        "UPDATE users SET like_count = c.n FROM "
+        "(SELECT liked_streamer_id AS id, count(*) AS n FROM likes GROUP BY liked_streamer_id) c "
+        "WHERE users.id = c.id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'like_count')
+    op.drop_column('users', 'follower_count')
+    op.drop_index('ix_clips_creater_id', table_name='clips')
+    op.drop_index('ix_clips_streamer_id_created_at', table_name='clips')
+    op.drop_index('ix_bans_user_id', table_name='bans')
+    op.drop_index('ix_bans_streamer_user', table_name='bans')
+    op.drop_index('ix_likes_streamer_user', table_name='likes')
+    op.drop_constraint('uq_likes_user_streamer', 'likes', type_='unique')
+    op.drop_index('ix_follows_streamer_user', table_name='follows')
+    op.drop_constraint('uq_follows_user_streamer', 'follows', type_='unique')
@@ -0,0 +1,39 @@
+"""keyset pagination indexes for clips, follows and likes
+
+Revision ID: e5b2a7d31c94
+Revises: c93b6d2e5f08
+Create Date: 2026-10-18 17:42:51.230817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2a7d31c94'
+down_revision: Union[str, None] = 'c93b6d2e5f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (created_at, id) 비교에서 NULL 행은 빠지므로 채운 뒤 NOT NULL로 바꾼다
+    for table in ('clips', 'follows', 'likes'):
+        op.execute(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL")
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+
+    op.drop_index('ix_clips_streamer_id_created_at', table_name='clips')
+    op.create_index('ix_clips_streamer_id_created_at_id', 'clips', ['streamer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_follows_user_id_created_at_id', 'follows', ['follow_user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_likes_streamer_id_created_at_id', 'likes', ['liked_streamer_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_likes_streamer_id_created_at_id', table_name='likes')
+    op.drop_index('ix_follows_user_id_created_at_id', table_name='follows')
+    op.drop_index('ix_clips_streamer_id_created_at_id', table_name='clips')
+    op.create_index('ix_clips_streamer_id_created_at', 'clips', ['streamer_id', 'created_at'], unique=False)
+    for table in ('clips', 'follows', 'likes'):
+        op.alter_column(table, 'created_at', existing_type=sa.DateTime(timezone=True), nullable=True)
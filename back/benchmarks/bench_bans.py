@@ -0,0 +1,63 @@
+"""밴 인덱스 벤치마크: 메모리 사용량과 조회 지연(set만 vs Bloom filter + set).
+
+방송인 STREAMERS명에게 밴 BANS건을 나눠 넣고(인기 방송인에 몰리게), 대부분이 밴되지 않은
+사용자인 실제 채팅과 비슷한 조회를 LOOKUPS번 한다. DB는 쓰지 않는다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_bans [bans]
+"""
+import random
+import sys
+import time
+from Module.bans import BanIndex
+
+STREAMERS = 5000
+LOOKUPS = 1000000
+# 조회 중 실제로 밴된 사용자 비율
+HIT_RATIO = 0.01
+
+
+def make_pairs(bans: int, rng: random.Random):
+    return [
+        (f"streamer{int(rng.random() ** 2 * STREAMERS)}", f"user{rng.randrange(bans * 10)}")
+        for _ in range(bans)
+    ]
+
+
+def make_lookups(pairs, rng: random.Random):
+    lookups = []
+    for _ in range(LOOKUPS):
+        if rng.random() < HIT_RATIO:
+            lookups.append(rng.choice(pairs))
+        else:
+            lookups.append((f"streamer{int(rng.random() ** 2 * STREAMERS)}", f"viewer{rng.randrange(10 ** 7)}"))
+    return lookups
+
+
+def run(name: str, index: BanIndex, lookups) -> None:
+    is_banned = index.is_banned
+    start = time.perf_counter()
+    for streamer, username in lookups:
+        is_banned(streamer, username)
+    elapsed = time.perf_counter() - start
+    stats = index.stats()
+    print(
+        f"{name:>12}: {elapsed / len(lookups) * 1e9:7.0f} ns/lookup, "
+        f"memory {stats['memory_bytes'] / 2 ** 20:7.1f} MiB, hits {stats['hits']}, "
+        f"bloom negatives {stats['bloom_negatives']}, load {stats['last_load_ms']:.0f} ms"
+    )
+
+
+def main(bans: int):
+    rng = random.Random(0)
+    pairs = make_pairs(bans, rng)
+    lookups = make_lookups(pairs, rng)
+    print(f"{bans} bans over {STREAMERS} streamers, {LOOKUPS} lookups ({HIT_RATIO:.0%} banned)")
+    for name, threshold in (("set", 0), ("bloom + set", 1)):
+        index = BanIndex(bloom_threshold=threshold)
+        index.load(pairs)
+        run(name, index, lookups)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,61 @@
+"""broadcast 직렬화 비용 비교: 연결마다 send_json vs 한 번 직렬화한 프레임 공유.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_broadcast
+"""
+import asyncio
+import json
+import time
+from Module.chat import encode_frame
+
+VIEWERS = [10, 1_000, 10_000]
+MESSAGES = 50
+
+message = {
+    "type": "message",
+    "username": "viewer_1234",
+    "message": "오늘 방송 너무 재밌네요 ㅋㅋㅋ 다음에도 또 올게요",
+    "timestamp": "2024-10-01T12:34:56.789Z",
+    "id": "0c8dce6f3cca4f25aa7f23a767c2b922",
+    "filter_result": {"category": "clean", "score": 0.0, "tier": "model"},
+}
+
+
+class FakeWebSocket:
+    async def send_text(self, data: str):
+        pass
+
+    async def send_json(self, data):
+        # starlette WebSocket.send_json과 같은 방식으로 직렬화
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+
+async def per_connection(sockets):
+    for ws in sockets:
+        await ws.send_json(message)
+
+
+async def serialize_once(sockets):
+    frame = encode_frame(message)
+    for ws in sockets:
+        await ws.send_text(frame)
+
+
+async def measure(fn, sockets) -> float:
+    start = time.process_time()
+    for _ in range(MESSAGES):
+        await fn(sockets)
+    return (time.process_time() - start) / MESSAGES
+
+
+async def main():
+    print(f"{'viewers':>8} {'send_json (ms/msg)':>20} {'encode once (ms/msg)':>22} {'speedup':>8}")
+    for viewers in VIEWERS:
+        sockets = [FakeWebSocket() for _ in range(viewers)]
+        legacy = await measure(per_connection, sockets)
+        once = await measure(serialize_once, sockets)
+        print(f"{viewers:>8} {legacy * 1000:>20.3f} {once * 1000:>22.3f} {legacy / once:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""충전 동시성 벤치마크: 같은 계정에 CHARGES건을 병렬로 충전하고 최종 잔액과 지연 시간을 확인한다.
+
+이어서 같은 idempotency key로 모두 다시 보내서 잔액이 그대로인지도 확인한다(캐시 없이 DB 제약만으로).
+DefaultConfig의 PostgreSQL에 접속하며, bench_charge_* 사용자를 하나 만든다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_charge [charges] [concurrency]
+"""
+import asyncio
+import sys
+import time
+import uuid
+from decimal import Decimal
+from sqlalchemy import func, select
+from dependencies import database
+from dependencies.config import get_config
+from domains.users.dto import TopUpDTO, UserSignUpDTO
+from domains.users.models import Account, AccountLedger
+from domains.users.repositories import UserRepository
+from domains.users.services import UserService, charge_cache
+
+AMOUNT = Decimal("1.00")
+
+
+async def create_bench_user() -> int:
+    name = f"bench_charge_{uuid.uuid4().hex[:8]}"
+    async with database.AsyncSessionLocal() as session:
+        user = await UserRepository(session).create_user(UserSignUpDTO(
+            username=name, email=f"{name}@example.com", password="-", full_name=name,
+        ))
+        return user.id
+
+
+async def fire(user_id: int, charges: int, concurrency: int, prefix: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def charge(n: int):
+        async with semaphore:
+            start = time.perf_counter()
+            async with database.AsyncSessionLocal() as session:
+                await UserService(session).top_up_account(user_id, TopUpDTO(amount=AMOUNT), f"{prefix}-{n}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(charge(n) for n in range(charges)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "charges/s": charges / elapsed,
+        "p50 ms": latencies[len(latencies) // 2] * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max ms": latencies[-1] * 1000,
+    }
+
+
+async def balance_and_ledger(user_id: int):
+    async with database.AsyncSessionLocal() as session:
+        balance = (await session.execute(select(Account.balance).where(Account.user_id == user_id))).scalar_one()
+        entries = (await session.execute(
+            select(func.count()).select_from(AccountLedger).where(AccountLedger.user_id == user_id)
+        )).scalar_one()
+        return balance, entries
+
+
+async def main(charges: int, concurrency: int):
+    database.init_db(get_config())
+    user_id = await create_bench_user()
+    prefix = uuid.uuid4().hex
+    for phase in ("charge", "replay"):
+        # replay는 캐시를 비우고 돌려서 원장 unique 제약으로 중복을 막는 경로를 잰다
+        charge_cache.clear()
+        result = await fire(user_id, charges, concurrency, prefix)
+        balance, entries = await balance_and_ledger(user_id)
+        expected = AMOUNT * charges
+        status = "OK" if balance == expected and entries == charges else "MISMATCH"
+        print(f"{phase:>7}: " + ", ".join(f"{key} {value:.1f}" for key, value in result.items()))
+        print(f"         balance {balance} (expected {expected}), ledger rows {entries} -> {status}")
+    await database.close_db()
+
+
+if __name__ == "__main__":
+    charges = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(main(charges, concurrency))
@@ -0,0 +1,71 @@
+"""로그인 폭주 중 이벤트 루프 지연 비교: bcrypt를 루프에서 직접 vs 전용 스레드 풀.
+
+동시에 LOGINS개의 비밀번호 검증을 돌리는 동안 5ms마다 깨어나는 태스크의 지연을 잰다.
+이 지연이 곧 같은 워커의 채팅 웹소켓이 멈춰 있는 시간이다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_login
+"""
+import asyncio
+import statistics
+import time
+from dependencies.passwords import PasswordHasher, pwd_context
+
+LOGINS = 20
+TICK = 0.005
+
+hashed = pwd_context.hash("correct horse battery staple")
+
+
+def inline_verify():
+    async def verify():
+        return pwd_context.verify("correct horse battery staple", hashed)
+
+    return verify
+
+
+def pooled_verify(hasher: PasswordHasher):
+    async def verify():
+        return await hasher.verify("correct horse battery staple", hashed)
+
+    return verify
+
+
+async def probe(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def measure(verify):
+    lags = []
+    stop = asyncio.Event()
+    prober = asyncio.ensure_future(probe(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(verify() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    lags.sort()
+    return {
+        "logins/s": LOGINS / elapsed,
+        "lag p50 ms": statistics.median(lags) * 1000,
+        "lag p99 ms": lags[int(len(lags) * 0.99)] * 1000,
+        "lag max ms": lags[-1] * 1000,
+    }
+
+
+async def main():
+    hasher = PasswordHasher(pwd_context, max_workers=4, max_pending=LOGINS)
+    print(f"{LOGINS} concurrent logins")
+    print(f"{'mode':>8} {'logins/s':>10} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for name, verify in [("inline", inline_verify()), ("pool", pooled_verify(hasher))]:
+        result = await measure(verify)
+        print(f"{name:>8} " + " ".join(f"{value:>{len(key) + 1}.1f}" for key, value in result.items()))
+    hasher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
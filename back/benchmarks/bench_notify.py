@@ -0,0 +1,77 @@
+"""방송 시작 알림 팬아웃 벤치마크: 팔로워 FOLLOWERS명 중 ONLINE 비율이 접속 중일 때 처리량과 루프 지연.
+
+팔로워 조회는 keyset 페이지를 흉내 낸 메모리 loader로 대신하고, 페이지마다 DB 왕복 대신
+asyncio.sleep(PAGE_LATENCY)를 넣는다. 팬아웃 중 1ms마다 깨어나는 태스크의 지연이 채팅이 멈춘 시간이다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_notify [followers] [batch_size]
+"""
+import asyncio
+import random
+import sys
+import time
+from Module.notify import NOTIFY_PROTOCOL, LiveNotifier
+
+ONLINE = 0.1
+PAGE_LATENCY = 0.002
+TICK = 0.001
+
+
+class FakeConnection:
+    protocol_version = NOTIFY_PROTOCOL
+
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, frame) -> None:
+        self.sent += 1
+
+
+def make_loader(followers: int):
+    usernames = [f"user{i}" for i in range(followers)]
+
+    async def loader(streamer: str, after_user_id: int, limit: int):
+        await asyncio.sleep(PAGE_LATENCY)
+        return [(i + 1, usernames[i]) for i in range(after_user_id, min(after_user_id + limit, followers))]
+
+    return loader
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def main(followers: int, batch_size: int):
+    notifier = LiveNotifier(make_loader(followers), batch_size=batch_size, pending_size=followers)
+    rng = random.Random(0)
+    connections = []
+    for i in range(followers):
+        if rng.random() < ONLINE:
+            connection = FakeConnection()
+            await notifier.register(f"user{i}", connection)
+            connections.append(connection)
+
+    stop = asyncio.Event()
+    lags = []
+    lag_task = asyncio.ensure_future(measure_lag(stop, lags))
+    result = await notifier.notify_live("streamer", "room")
+    stop.set()
+    await lag_task
+
+    stats = notifier.stats()
+    lags.sort()
+    print(f"{followers} followers, batch {batch_size}: {result}")
+    print(
+        f"fan-out {stats['last_fanout_ms']:.0f} ms ({stats['last_followers_per_sec']:.0f} followers/s), "
+        f"loop lag p50 {lags[len(lags) // 2] * 1000:.2f} ms, max {lags[-1] * 1000:.2f} ms"
+    )
+    assert sum(connection.sent for connection in connections) == result["pushed"]
+
+
+if __name__ == "__main__":
+    followers = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    asyncio.run(main(followers, batch_size))
@@ -0,0 +1,101 @@
+"""깊은 페이지 벤치마크: OFFSET vs keyset (created_at, id), COUNT(*) vs 캐시된 개수.
+
+bench_pages 스키마에 방송인 한 명의 클립 ROWS개를 만들고(created_at이 겹치는 행 포함)
+목록 API와 같은 인덱스 (streamer_id, created_at, id)를 건 뒤, 여러 깊이에서 한 페이지를 읽는 시간을 잰다.
+keyset은 그 깊이의 마지막 행을 커서로 미리 구해 두고 잰다.
+DefaultConfig의 PostgreSQL에 접속하며, 끝나면 스키마를 지운다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_pages [rows] [page_size]
+"""
+import asyncio
+import sys
+import time
+from sqlalchemy import text
+from dependencies import database
+from dependencies.cache import TTLCache
+from dependencies.config import get_config
+from dependencies.pagination import decode_cursor, encode_cursor
+
+SCHEMA = "bench_pages"
+REPEAT = 20
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"CREATE TABLE {SCHEMA}.clips (id serial PRIMARY KEY, streamer_id integer NOT NULL, "
+    "title varchar NOT NULL, created_at timestamptz NOT NULL)",
+]
+
+# 초 단위로 잘라서 created_at이 같은 행이 여럿 생기게 한다(id로 순서를 가른다)
+FILL = (
+    f"INSERT INTO {SCHEMA}.clips (streamer_id, title, created_at) "
+    "SELECT 1, 'clip ' || g, date_trunc('second', now() - g * interval '100 milliseconds') "
+    "FROM generate_series(1, {rows}) g"
+)
+
+INDEX = f"CREATE INDEX ix_bench_clips_streamer_created_id ON {SCHEMA}.clips (streamer_id, created_at, id)"
+
+OFFSET_PAGE = (
+    f"SELECT id, title, created_at FROM {SCHEMA}.clips WHERE streamer_id = 1 "
+    "ORDER BY created_at DESC, id DESC LIMIT :limit OFFSET :offset"
+)
+KEYSET_PAGE = (
+    f"SELECT id, title, created_at FROM {SCHEMA}.clips WHERE streamer_id = 1 "
+    "AND (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT :limit"
+)
+COUNT = f"SELECT count(*) FROM {SCHEMA}.clips WHERE streamer_id = 1"
+
+
+async def timed(connection, statement, params) -> float:
+    latencies = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await connection.execute(statement, params)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000
+
+
+async def main(rows: int, page_size: int):
+    database.init_db(get_config())
+    async with database.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in SETUP:
+            await connection.execute(text(statement))
+        await connection.execute(text(FILL.format(rows=rows)))
+        await connection.execute(text(INDEX))
+        await connection.execute(text(f"ANALYZE {SCHEMA}.clips"))
+
+        print(f"{rows} clips, page size {page_size}, median of {REPEAT}")
+        print(f"{'depth':>10}{'OFFSET ms':>12}{'keyset ms':>12}")
+        for depth in (1000, 10000, 100000, rows // 2, rows - page_size):
+            if depth <= 0 or depth >= rows:
+                continue
+            offset_ms = await timed(connection, text(OFFSET_PAGE), {"limit": page_size, "offset": depth})
+            # 클라이언트가 들고 오는 커서와 같은 값: 바로 앞 페이지 마지막 행
+            last = (await connection.execute(
+                text(OFFSET_PAGE), {"limit": 1, "offset": depth - 1}
+            )).one()
+            created_at, row_id = decode_cursor(encode_cursor(last.created_at, last.id))
+            keyset_ms = await timed(
+                connection, text(KEYSET_PAGE), {"limit": page_size, "created_at": created_at, "id": row_id}
+            )
+            print(f"{depth:>10}{offset_ms:>12.2f}{keyset_ms:>12.2f}")
+
+        count_ms = await timed(connection, text(COUNT), {})
+        cache = TTLCache(1000, 30)
+        cache.set(("clips", 1), rows)
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            cache.get(("clips", 1))
+        cached_ms = (time.perf_counter() - start) / REPEAT * 1000
+        print(f"total: COUNT(*) {count_ms:.2f} ms, cached {cached_ms * 1000:.2f} us")
+        await connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    await database.close_db()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(rows, page_size))
@@ -0,0 +1,129 @@
+"""follow/like/ban 조회 벤치마크: 인덱스 추가 전과 후, COUNT(*)와 카운터 컬럼 비교.
+
+bench_social 스키마에 follows/likes/bans ROWS행씩 합성 데이터를 만들고
+"방송인 X의 팔로워 수", "Y가 X를 팔로우하는지", "Y가 X에서 밴인지", "X의 팔로워 목록"을
+인덱스 없이 한 번, 마이그레이션 c93b6d2e5f08과 같은 인덱스를 만든 뒤 한 번 잰다.
+DefaultConfig의 PostgreSQL에 접속하며, 끝나면 스키마를 지운다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_social [rows] [queries]
+"""
+import asyncio
+import random
+import sys
+import time
+from sqlalchemy import text
+from dependencies import database
+from dependencies.config import get_config
+
+SCHEMA = "bench_social"
+STREAMERS = 2000
+USERS = 200000
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"CREATE TABLE {SCHEMA}.users (id integer PRIMARY KEY, follower_count integer NOT NULL DEFAULT 0, "
+    "like_count integer NOT NULL DEFAULT 0)",
+    f"CREATE TABLE {SCHEMA}.follows (id serial PRIMARY KEY, follow_user_id integer NOT NULL, "
+    "follow_streamer_id integer NOT NULL)",
+    f"CREATE TABLE {SCHEMA}.likes (id serial PRIMARY KEY, liked_user_id integer NOT NULL, "
+    "liked_streamer_id integer NOT NULL)",
+    f"CREATE TABLE {SCHEMA}.bans (id serial PRIMARY KEY, ben_user_id integer NOT NULL, "
+    "ben_streamer_id integer NOT NULL)",
+    f"INSERT INTO {SCHEMA}.users (id) SELECT generate_series(1, {USERS})",
+]
+
+# 방송인 쪽은 제곱으로 치우치게 해서 인기 방송인에 팔로워가 몰리게 한다
+FILL = (
+    "INSERT INTO {schema}.{table} ({user}, {streamer}) "
+    "SELECT DISTINCT ON (u, s) u, s FROM ("
+    "SELECT (random() * ({users} - 1))::int + 1 AS u, "
+    "(power(random(), 2) * ({streamers} - 1))::int + 1 AS s "
+    "FROM generate_series(1, {rows})) g"
+)
+
+TABLES = [
+    ("follows", "follow_user_id", "follow_streamer_id"),
+    ("likes", "liked_user_id", "liked_streamer_id"),
+    ("bans", "ben_user_id", "ben_streamer_id"),
+]
+
+INDEXES = [
+    f"ALTER TABLE {SCHEMA}.follows ADD CONSTRAINT uq_follows_user_streamer UNIQUE (follow_user_id, follow_streamer_id)",
+    f"CREATE INDEX ix_follows_streamer_user ON {SCHEMA}.follows (follow_streamer_id, follow_user_id)",
+    f"ALTER TABLE {SCHEMA}.likes ADD CONSTRAINT uq_likes_user_streamer UNIQUE (liked_user_id, liked_streamer_id)",
+    f"CREATE INDEX ix_likes_streamer_user ON {SCHEMA}.likes (liked_streamer_id, liked_user_id)",
+    f"CREATE INDEX ix_bans_streamer_user ON {SCHEMA}.bans (ben_streamer_id, ben_user_id)",
+    f"UPDATE {SCHEMA}.users SET follower_count = c.n FROM (SELECT follow_streamer_id AS id, count(*) AS n "
+    f"FROM {SCHEMA}.follows GROUP BY follow_streamer_id) c WHERE users.id = c.id",
+    f"UPDATE {SCHEMA}.users SET like_count = c.n FROM (SELECT liked_streamer_id AS id, count(*) AS n "
+    f"FROM {SCHEMA}.likes GROUP BY liked_streamer_id) c WHERE users.id = c.id",
+]
+
+QUERIES = {
+    "follower COUNT(*)": f"SELECT count(*) FROM {SCHEMA}.follows WHERE follow_streamer_id = :s",
+    "follower counter": f"SELECT follower_count FROM {SCHEMA}.users WHERE id = :s",
+    "is following": f"SELECT 1 FROM {SCHEMA}.follows WHERE follow_user_id = :u AND follow_streamer_id = :s",
+    "is banned": f"SELECT 1 FROM {SCHEMA}.bans WHERE ben_streamer_id = :s AND ben_user_id = :u LIMIT 1",
+    "followers page": f"SELECT follow_user_id FROM {SCHEMA}.follows WHERE follow_streamer_id = :s "
+                      "ORDER BY follow_user_id LIMIT 50",
+}
+
+
+async def execute_all(connection, statements):
+    for statement in statements:
+        await connection.execute(text(statement))
+
+
+async def measure(connection, queries: int) -> dict:
+    rng = random.Random(0)
+    result = {}
+    for name, query in QUERIES.items():
+        statement = text(query)
+        latencies = []
+        for _ in range(queries):
+            params = {"s": rng.randint(1, 50), "u": rng.randint(1, USERS)}
+            params = {key: value for key, value in params.items() if f":{key}" in query}
+            start = time.perf_counter()
+            await connection.execute(statement, params)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        result[name] = (latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000)
+    return result
+
+
+async def main(rows: int, queries: int):
+    database.init_db(get_config())
+    async with database.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        start = time.perf_counter()
+        await execute_all(connection, SETUP)
+        for table, user, streamer in TABLES:
+            # bans는 follows/likes보다 훨씬 적다
+            count = rows if table != "bans" else rows // 10
+            await connection.execute(text(FILL.format(
+                schema=SCHEMA, table=table, user=user, streamer=streamer,
+                users=USERS, streamers=STREAMERS, rows=count,
+            )))
+        await connection.execute(text(f"ANALYZE {SCHEMA}.follows, {SCHEMA}.likes, {SCHEMA}.bans, {SCHEMA}.users"))
+        print(f"setup: {time.perf_counter() - start:.1f}s")
+
+        before = await measure(connection, queries)
+        start = time.perf_counter()
+        await execute_all(connection, INDEXES)
+        await connection.execute(text(f"ANALYZE {SCHEMA}.follows, {SCHEMA}.likes, {SCHEMA}.bans, {SCHEMA}.users"))
+        print(f"indexes + counter backfill: {time.perf_counter() - start:.1f}s")
+        after = await measure(connection, queries)
+
+        print(f"{'query':<20}{'before p50/p99 ms':>22}{'after p50/p99 ms':>22}")
+        for name in QUERIES:
+            print(f"{name:<20}{before[name][0]:>12.2f}/{before[name][1]:<9.2f}{after[name][0]:>12.2f}/{after[name][1]:<9.2f}")
+        await connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    await database.close_db()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(rows, queries))
@@ -0,0 +1,95 @@
+"""인코딩별 전송 바이트와 서버 CPU 비교: JSON / MessagePack, 각각 permessage-deflate 유무.
+
+broadcast 1k번을 VIEWERS명에게 보내는 경우를 잰다. 직렬화는 broadcast당 한 번이지만
+permessage-deflate는 연결마다 압축 문맥이 따로 있어서 압축 비용이 접속자 수만큼 든다.
+
+back 디렉토리에서 실행:
+    python -m benchmarks.bench_wire
+"""
+import random
+import time
+import zlib
+from Module.chat import encode_frame, filter_result
+from Module.moderation import BAD_LABEL
+from Module.wire import to_msgpack
+
+BROADCASTS = 1_000
+VIEWERS = 100
+
+LINES = [
+    "오늘 방송 너무 재밌네요 ㅋㅋㅋ",
+    "안녕하세요~ 처음 왔어요",
+    "ㅋㅋㅋㅋㅋㅋㅋㅋ",
+    "이거 어떻게 하는 거예요?",
+    "다음 판도 화이팅!!",
+    "gg",
+    "와 방금 그거 대박이다",
+    "채팅 속도 무슨 일이야",
+]
+
+
+def make_messages():
+    rng = random.Random(0)
+    messages = []
+    for n in range(BROADCASTS):
+        bad = rng.random() < 0.05
+        messages.append({
+            "type": "message",
+            "username": f"viewer_{rng.randrange(10_000)}",
+            "message": rng.choice(LINES),
+            "timestamp": f"2024-10-01T12:{n // 60 % 60:02d}:{n % 60:02d}.000Z",
+            "id": f"{rng.getrandbits(128):032x}",
+            "filter_result": filter_result(BAD_LABEL, 0.93, "model") if bad else filter_result("clean", 0.0, "lexicon"),
+        })
+    return messages
+
+
+def deflate_stream():
+    # RFC 7692: raw deflate, 문맥 유지, 메시지마다 sync flush 후 끝 4바이트 제거
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def compress(payload: bytes) -> bytes:
+        return (compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4]
+
+    return compress
+
+
+def run(messages, packed: bool, deflate: bool):
+    to_msgpack.cache_clear()
+    compressors = [deflate_stream() for _ in range(VIEWERS)] if deflate else None
+    wire_bytes = 0
+    start = time.process_time()
+    for message in messages:
+        frame = encode_frame(message)
+        payload = to_msgpack(frame) if packed else frame.encode()
+        if compressors is None:
+            wire_bytes += len(payload)
+            continue
+        for compress in compressors:
+            size = len(compress(payload))
+        wire_bytes += size
+    cpu = time.process_time() - start
+    return wire_bytes, cpu
+
+
+def main():
+    messages = make_messages()
+    print(f"{BROADCASTS} broadcasts x {VIEWERS} viewers")
+    print(f"{'encoding':>16} {'bytes/frame':>12} {'KB/viewer':>10} {'CPU ms/1k':>10} {'vs json':>8}")
+    baseline = None
+    for name, packed, deflate in [
+        ("json", False, False),
+        ("json+deflate", False, True),
+        ("msgpack", True, False),
+        ("msgpack+deflate", True, True),
+    ]:
+        wire_bytes, cpu = run(messages, packed, deflate)
+        baseline = baseline or wire_bytes
+        print(
+            f"{name:>16} {wire_bytes / BROADCASTS:>12.1f} {wire_bytes / 1024:>10.1f} "
+            f"{cpu * 1000:>10.1f} {wire_bytes / baseline:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
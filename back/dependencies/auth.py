@@ -1,27 +1,69 @@
+import time
 from datetime import datetime, timedelta
+from typing import Dict, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from domains.users.models import User
 from domains.users.repositories import UserRepository
+from .cache import TTLCache
 from .config import get_config
 from .database import get_db
+from .passwords import password_hasher
 
 config = get_config()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+
+class PrincipalCache:
+    """토큰 subject(username) -> 인증된 User.
+
+    세션이 닫힌 뒤의 User(expire_on_commit=False라 속성이 남아 있음)를 짧은 TTL 동안 재사용한다.
+    행이 바뀌면 user id로 invalidate한다. username이 바뀌어도 찾을 수 있게 id -> subject를 따로 둔다.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = max(1, maxsize)
+        self._users = TTLCache(self._maxsize, ttl)
+        self._subjects: Dict[int, str] = {}
+        self.invalidations = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        return self._users.get(subject)
+
+    def set(self, subject: str, user: User) -> None:
+        self._users.set(subject, user)
+        self._subjects[user.id] = subject
+        if len(self._subjects) > self._maxsize * 2:
+            # 캐시에서 이미 빠진 항목의 id 매핑 정리
+            self._subjects = {user_id: name for user_id, name in self._subjects.items() if name in self._users}
+
+    def invalidate(self, user_id: int) -> None:
+        subject = self._subjects.pop(user_id, None)
+        if subject is not None:
+            self._users.pop(subject)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        stats = self._users.stats()
+        stats["invalidations"] = self.invalidations
+        return stats
+
+
+# 토큰 문자열 -> subject. 만료 시각까지 유지
+token_cache = TTLCache(config.auth_token_cache_size, ttl=config.jwt_expire_minutes * 60)
+principal_cache = PrincipalCache(config.auth_user_cache_size, config.auth_user_cache_ttl_seconds)
+
 class AuthService:
     @staticmethod
-    def verify_password(plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password, hashed_password):
+        return await password_hasher.verify(plain_password, hashed_password)
 
     @staticmethod
-    def get_password_hash(password):
-        return pwd_context.hash(password)
+    async def get_password_hash(password):
+        return await password_hasher.hash(password)
 
     @staticmethod
     async def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -35,26 +77,55 @@ class AuthService:
         return encoded_jwt
 
     @staticmethod
+    # 인증 조회는 primary에서 한다. 방금 가입한 사용자는 sticky 대상이 아니라서(가입 요청엔 토큰이 없음)
+    # replica에서 찾으면 지연 동안 401이 날 수 있다. 캐시에 없을 때만 조회하고, 쓰기 요청과는 세션을 공유한다
     async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        try:
-            payload = jwt.decode(token, config.jwt_secret_key, algorithms=[config.jwt_algorithm])
-            username: str = payload.get("sub")
-            if username is None:
-                raise credentials_exception
-        except JWTError:
+        username = AuthService.decode_subject(token)
+        if username is None:
             raise credentials_exception
-        
+
+        user = principal_cache.get(username)
+        if user is not None:
+            return user
         user_repo = UserRepository(db)
         user = await user_repo.get_user_by_username(username)
         if user is None:
             raise credentials_exception
+        principal_cache.set(username, user)
         return user
 
+    @staticmethod
+    def decode_subject(token: str) -> Optional[str]:
+        """토큰의 sub. 검증에 성공한 토큰은 만료될 때까지 다시 decode하지 않는다."""
+        username = token_cache.get(token)
+        if username is not None:
+            return username
+        try:
+            payload = jwt.decode(token, config.jwt_secret_key, algorithms=[config.jwt_algorithm])
+        except JWTError:
+            return None
+        username = payload.get("sub")
+        if username is None:
+            return None
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_cache.set(token, username, ttl=ttl)
+        return username
+
+    @staticmethod
+    def invalidate_user(user_id: int) -> None:
+        # 사용자 행(프로필, 잔액, 활성 여부)이 바뀌면 호출
+        principal_cache.invalidate(user_id)
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return {"tokens": token_cache.stats(), "users": principal_cache.stats()}
+
     @staticmethod
     async def get_current_active_user(current_user: User = Depends(get_current_user)):
         user = await current_user
@@ -8,12 +8,93 @@ class DefaultConfig(BaseSettings):
     postgresql_table: str = os.getenv("POSTGRESQL_TABLE", "test")
     postgresql_user: str = os.getenv("POSTGRESQL_USER", "root")
     postgresql_password: str = os.getenv("POSTGRESQL_PASSWORD", "3321")
+    db_echo: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout_seconds: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    db_pool_recycle_seconds: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    db_pool_prewarm: int = int(os.getenv("DB_POOL_PREWARM", "5"))
+    db_connect_timeout_seconds: float = float(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "10"))
+    db_command_timeout_seconds: float = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "30"))
+    db_statement_cache_size: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # 비워 두면 읽기도 primary 하나로 처리한다
+    db_replica_endpoint: str = os.getenv("DB_REPLICA_ENDPOINT", "")
+    db_replica_port: int = int(os.getenv("DB_REPLICA_PORT", "0"))
+    db_replica_retry_seconds: float = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+    db_read_your_writes_seconds: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
     jwt_secret_key: str = os.getenv(
         "JWT_SECRET_KEY",
         "5c2fea6305c8c209714e73b265958703e65c4b40dec4c388dddac06f3f791ec7",
     )
     jwt_algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
     jwt_expire_minutes: int = int(os.getenv("JWT_TOKEN_EXPIRE_MINUTES", "600"))
+    auth_token_cache_size: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    auth_user_cache_size: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    auth_user_cache_ttl_seconds: float = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+    charge_idempotency_cache_size: int = int(os.getenv("CHARGE_IDEMPOTENCY_CACHE_SIZE", "10000"))
+    charge_idempotency_ttl_seconds: float = float(os.getenv("CHARGE_IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+    # 0이면 min(4, CPU 수)
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    huggingface_api_token: str = os.getenv("HUGGINGFACEHUB_API_TOKEN", "")
+    moderation_api_url: str = os.getenv(
+        "MODERATION_API_URL",
+        "https://api-inference.huggingface.co/models/smilegate-ai/kor_unsmile",
+    )
+    moderation_batch_size: int = int(os.getenv("MODERATION_BATCH_SIZE", "16"))
+    moderation_flush_ms: float = float(os.getenv("MODERATION_FLUSH_MS", "5"))
+    moderation_max_concurrency: int = int(os.getenv("MODERATION_MAX_CONCURRENCY", "4"))
+    moderation_timeout_seconds: float = float(os.getenv("MODERATION_TIMEOUT_SECONDS", "10"))
+    moderation_cache_size: int = int(os.getenv("MODERATION_CACHE_SIZE", "10000"))
+    moderation_cache_ttl_seconds: float = float(os.getenv("MODERATION_CACHE_TTL_SECONDS", "300"))
+    moderation_lexicon_path: str = os.getenv("MODERATION_LEXICON_PATH", "")
+    chat_default_moderation_mode: str = os.getenv("CHAT_DEFAULT_MODERATION_MODE", "strict")
+    # 빈 방이 지워진 뒤에도 기억해 둘 방 이름 -> 방송인과 설정 수(LRU)
+    chat_room_registry_size: int = int(os.getenv("CHAT_ROOM_REGISTRY_SIZE", "10000"))
+    # 여러 노드가 공유하는 방 설정(브로커 backplane)을 마지막 변경 후 얼마나 남길지
+    chat_room_settings_ttl_seconds: float = float(os.getenv("CHAT_ROOM_SETTINGS_TTL_SECONDS", str(7 * 24 * 3600)))
+    chat_send_queue_size: int = int(os.getenv("CHAT_SEND_QUEUE_SIZE", "256"))
+    chat_send_queue_policy: str = os.getenv("CHAT_SEND_QUEUE_POLICY", "drop_oldest")
+    chat_backplane: str = os.getenv("CHAT_BACKPLANE", "inprocess")
+    chat_node_id: str = os.getenv("CHAT_NODE_ID", "")
+    chat_presence_interval_seconds: float = float(os.getenv("CHAT_PRESENCE_INTERVAL_SECONDS", "2"))
+    chat_history_size: int = int(os.getenv("CHAT_HISTORY_SIZE", "200"))
+    chat_history_max_bytes: int = int(os.getenv("CHAT_HISTORY_MAX_BYTES", str(256 * 1024)))
+    chat_history_max_rooms: int = int(os.getenv("CHAT_HISTORY_MAX_ROOMS", "1000"))
+    chat_history_replay: int = int(os.getenv("CHAT_HISTORY_REPLAY", "50"))
+    chat_coalesce_enabled: bool = os.getenv("CHAT_COALESCE_ENABLED", "true").lower() == "true"
+    chat_coalesce_tick_ms: float = float(os.getenv("CHAT_COALESCE_TICK_MS", "75"))
+    chat_coalesce_enable_rate: float = float(os.getenv("CHAT_COALESCE_ENABLE_RATE", "50"))
+    chat_coalesce_disable_rate: float = float(os.getenv("CHAT_COALESCE_DISABLE_RATE", "20"))
+    chat_coalesce_cooldown_seconds: float = float(os.getenv("CHAT_COALESCE_COOLDOWN_SECONDS", "5"))
+    chat_ws_per_message_deflate: bool = os.getenv("CHAT_WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
+    chat_heartbeat_interval_seconds: float = float(os.getenv("CHAT_HEARTBEAT_INTERVAL_SECONDS", "15"))
+    chat_heartbeat_timeout_seconds: float = float(os.getenv("CHAT_HEARTBEAT_TIMEOUT_SECONDS", "45"))
+    chat_shed_min_viewers: int = int(os.getenv("CHAT_SHED_MIN_VIEWERS", "1000"))
+    chat_shed_max_rate: float = float(os.getenv("CHAT_SHED_MAX_RATE", "30"))
+    chat_ban_refresh_seconds: float = float(os.getenv("CHAT_BAN_REFRESH_SECONDS", "60"))
+    chat_ban_bloom_threshold: int = int(os.getenv("CHAT_BAN_BLOOM_THRESHOLD", "0"))
+    chat_ban_bloom_error_rate: float = float(os.getenv("CHAT_BAN_BLOOM_ERROR_RATE", "0.01"))
+    listing_page_size_max: int = int(os.getenv("LISTING_PAGE_SIZE_MAX", "100"))
+    listing_count_cache_size: int = int(os.getenv("LISTING_COUNT_CACHE_SIZE", "10000"))
+    listing_count_ttl_seconds: float = float(os.getenv("LISTING_COUNT_TTL_SECONDS", "30"))
+    notify_batch_size: int = int(os.getenv("NOTIFY_BATCH_SIZE", "5000"))
+    notify_pending_size: int = int(os.getenv("NOTIFY_PENDING_SIZE", "200000"))
+    notify_pending_ttl_seconds: float = float(os.getenv("NOTIFY_PENDING_TTL_SECONDS", "3600"))
+    notify_pending_per_user: int = int(os.getenv("NOTIFY_PENDING_PER_USER", "10"))
+    chat_log_enabled: bool = os.getenv("CHAT_LOG_ENABLED", "true").lower() == "true"
+    chat_log_batch_size: int = int(os.getenv("CHAT_LOG_BATCH_SIZE", "500"))
+    chat_log_flush_interval_ms: float = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL_MS", "1000"))
+    chat_log_max_pending: int = int(os.getenv("CHAT_LOG_MAX_PENDING", "10000"))
+    chat_rate_burst: int = int(os.getenv("CHAT_RATE_BURST", "5"))
+    chat_rate_refill_per_second: float = float(os.getenv("CHAT_RATE_REFILL_PER_SECOND", "1"))
+    chat_rate_idle_seconds: float = float(os.getenv("CHAT_RATE_IDLE_SECONDS", "300"))
+    chat_rate_violation_threshold: int = int(os.getenv("CHAT_RATE_VIOLATION_THRESHOLD", "10"))
+    chat_rate_violation_window_seconds: float = float(os.getenv("CHAT_RATE_VIOLATION_WINDOW_SECONDS", "60"))
+    chat_mute_penalty: int = int(os.getenv("CHAT_MUTE_PENALTY", "3"))
+    chat_mute_seconds: float = float(os.getenv("CHAT_MUTE_SECONDS", "60"))
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 @lru_cache
 def get_config() -> DefaultConfig:
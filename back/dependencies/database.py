@@ -1,47 +1,249 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, Callable, Optional
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from .config import get_config, DefaultConfig
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .cache import TTLCache
+from .config import DefaultConfig
 
 Base = declarative_base()
 engine = None
 AsyncSessionLocal = None
+# replica가 없으면 read_engine은 primary를 가리킨다. 조회 세션은 둘 다 autocommit
+read_engine = None
+ReadSessionLocal = None
+PrimaryReadSessionLocal = None
+read_router = None
 
-def init_db(config: DefaultConfig) -> None:
-    global engine, AsyncSessionLocal
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """커넥션을 빌릴 때 기다린 시간과 실패(timeout, 연결 오류)를 기록하는 풀."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_errors = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.checkout_errors += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            self.checkouts += 1
+            self.total_wait_ms += waited
+            self.max_wait_ms = max(self.max_wait_ms, waited)
+
+
+class ReadRouter:
+    """읽기 전용 세션을 replica와 primary 중 어디로 보낼지 정한다.
 
-    postgres_endpoint = config.postgresql_endpoint
-    postgres_port = config.postgresql_port
-    postgres_table = config.postgresql_table
-    postgres_user = config.postgresql_user
-    postgres_password = config.postgresql_password
+    같은 사용자(Authorization 헤더)가 쓰기 요청을 하면 sticky_seconds 동안은 그 사용자의
+    읽기를 primary로 보낸다(read-your-writes). replica 연결에 실패하면 retry_seconds 동안
+    replica를 쓰지 않고 primary로 읽는다.
+    """
 
+    def __init__(
+        self,
+        has_replica: bool,
+        sticky_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.has_replica = has_replica
+        self._sticky = TTLCache(10000, sticky_seconds, clock) if sticky_seconds > 0 else None
+        self._retry = retry_seconds
+        self._clock = clock
+        self._down_until = 0.0
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.sticky_reads = 0
+        self.fallbacks = 0
+
+    def mark_write(self, key: Optional[str]) -> None:
+        if self._sticky is not None and key:
+            self._sticky.set(key, True)
+
+    def use_replica(self, key: Optional[str]) -> bool:
+        if not self.has_replica or self._down_until > self._clock():
+            return False
+        if self._sticky is not None and key and key in self._sticky:
+            self.sticky_reads += 1
+            return False
+        return True
+
+    def replica_failed(self) -> None:
+        self.fallbacks += 1
+        self._down_until = self._clock() + self._retry
+
+    def stats(self) -> dict:
+        return {
+            "has_replica": self.has_replica,
+            "replica_down": self._down_until > self._clock(),
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+            "sticky_reads": self.sticky_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def _create_engine(config: DefaultConfig, endpoint: str, port: int):
     db_url = (
-        f"postgresql+asyncpg://{postgres_user}:{postgres_password}"
-        f"@{postgres_endpoint}:{postgres_port}/{postgres_table}"
+        f"postgresql+asyncpg://{config.postgresql_user}:{config.postgresql_password}"
+        f"@{endpoint}:{port}/{config.postgresql_table}"
+        # SQLAlchemy asyncpg 방언의 prepared statement 캐시
+        f"?prepared_statement_cache_size={config.db_statement_cache_size}"
     )
-
     try:
-        engine = create_async_engine(db_url, echo=True)
-        AsyncSessionLocal = sessionmaker(
-            engine, class_=AsyncSession, expire_on_commit=False
+        return create_async_engine(
+            db_url,
+            echo=config.db_echo,
+            poolclass=TimedQueuePool,
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout_seconds,
+            pool_recycle=config.db_pool_recycle_seconds,
+            pool_pre_ping=config.db_pool_pre_ping,
+            connect_args={
+                # asyncpg 자체 statement 캐시. pgbouncer(transaction 모드)를 쓰면 둘 다 0
+                "statement_cache_size": config.db_statement_cache_size,
+                "timeout": config.db_connect_timeout_seconds,
+                "command_timeout": config.db_command_timeout_seconds,
+            },
         )
-        print("Database connection successful.")
     except Exception as e:
         print(f"Database connection failed. Reason: {str(e)}")
         print(f"Failed URL: {db_url}")
+        return None
+
+
+def _read_sessionmaker(target: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        target.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession, expire_on_commit=False
+    )
+
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+def init_db(config: DefaultConfig) -> None:
+    # 앱 lifespan에서 한 번만 호출한다
+    global engine, AsyncSessionLocal, read_engine, ReadSessionLocal, PrimaryReadSessionLocal, read_router
+
+    engine = _create_engine(config, config.postgresql_endpoint, config.postgresql_port)
+    if engine is None:
+        return
+    AsyncSessionLocal = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    print("Database connection successful.")
+
+    read_engine = engine
+    if config.db_replica_endpoint:
+        replica = _create_engine(
+            config, config.db_replica_endpoint, config.db_replica_port or config.postgresql_port
+        )
+        if replica is not None:
+            read_engine = replica
+    # 조회 전용 세션은 autocommit으로 연다. asyncpg는 트랜잭션을 시작하지 않으므로 BEGIN도,
+    # 세션을 닫거나 풀에 돌려줄 때의 ROLLBACK도 보내지 않는다. 대신 한 요청 안의 SELECT들이
+    # 같은 스냅샷을 보지는 않는다(목록과 개수가 잠깐 어긋날 수 있음)
+    ReadSessionLocal = _read_sessionmaker(read_engine)
+    PrimaryReadSessionLocal = _read_sessionmaker(engine)
+    read_router = ReadRouter(
+        read_engine is not engine,
+        sticky_seconds=config.db_read_your_writes_seconds,
+        retry_seconds=config.db_replica_retry_seconds,
+    )
+
+
+async def warm_pool(count: int) -> int:
+    """엔진마다 커넥션 count개를 동시에 열어 두었다가 풀에 돌려준다. 첫 요청이 연결 비용을 내지 않게."""
+    opened = 0
+    for target in {engine, read_engine}:
+        try:
+            async with AsyncExitStack() as stack:
+                for _ in range(min(count, target.pool.size())):
+                    connection = await stack.enter_async_context(target.connect())
+                    await connection.execute(text("SELECT 1"))
+                    opened += 1
+        except Exception as e:
+            print(f"Database pool warm-up failed after {opened} connections: {str(e)}")
+    return opened
+
+
+async def close_db() -> None:
+    if read_engine is not None and read_engine is not engine:
+        await read_engine.dispose()
+    if engine is not None:
+        await engine.dispose()
+
+
+def db_stats() -> dict:
+    if engine is None:
+        return {}
+    stats = {"primary": pool_stats(engine.pool)}
+    if read_engine is not engine:
+        stats["replica"] = pool_stats(read_engine.pool)
+    stats["reads"] = read_router.stats()
+    return stats
+
+
+def pool_stats(pool: TimedQueuePool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # 음수면 아직 pool_size만큼 연결을 만들지 않은 것
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "checkouts": pool.checkouts,
+        "checkout_errors": pool.checkout_errors,
+        "avg_wait_ms": pool.total_wait_ms / pool.checkouts if pool.checkouts else 0.0,
+        "max_wait_ms": pool.max_wait_ms,
+    }
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
             await session.commit()
+            if request.method not in READ_METHODS:
+                read_router.mark_write(request.headers.get("authorization"))
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
 
-# Initialize the database
-init_db(get_config())
\ No newline at end of file
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """조회 전용 autocommit 세션. 가능하면 replica에서 읽고, 닫을 때 추가 문장을 보내지 않는다."""
+    session = None
+    if read_router.use_replica(request.headers.get("authorization")):
+        session = ReadSessionLocal()
+        try:
+            # 연결을 미리 잡아서 replica가 죽었으면 여기서 primary로 넘긴다
+            await session.connection()
+            read_router.replica_reads += 1
+        except Exception as e:
+            print(f"Replica unavailable, reading from primary: {str(e)}")
+            await session.close()
+            read_router.replica_failed()
+            session = None
+    if session is None:
+        session = PrimaryReadSessionLocal()
+        read_router.primary_reads += 1
+    try:
+        yield session
+    finally:
+        await session.close()
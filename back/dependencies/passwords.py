@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from .config import DefaultConfig, get_config
+
+
+class PasswordHasher:
+    """bcrypt 해시/검증을 이벤트 루프 밖의 전용 스레드 풀에서 돌린다.
+
+    bcrypt는 해시 계산 중 GIL을 놓기 때문에 스레드로도 병렬로 돈다.
+    처리 중 + 대기 중인 작업이 max_pending에 도달하면 더 쌓지 않고 바로 503을 돌려준다.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_pending: int):
+        self._context = context
+        self._max_workers = max(1, max_workers)
+        self._max_pending = max(1, max_pending)
+        self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="password")
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+
+    @classmethod
+    def from_config(cls, config: DefaultConfig, context: CryptContext) -> "PasswordHasher":
+        return cls(
+            context,
+            max_workers=config.password_hash_workers or min(4, os.cpu_count() or 1),
+            max_pending=config.password_hash_max_pending,
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self._context.verify, plain_password, hashed_password)
+
+    async def _run(self, fn, *args):
+        if self._pending >= self._max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent login requests",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self.total_ms += (time.perf_counter() - start) * 1000
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self._max_workers,
+            "pending": self._pending,
+            "max_pending": self._max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": self.total_ms / self.completed if self.completed else 0.0,
+        }
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_many(passwords: List[str]) -> List[str]:
+    # 대량 가져오기에서 ProcessPoolExecutor 워커가 호출한다
+    return [pwd_context.hash(password) for password in passwords]
+
+
+password_hasher = PasswordHasher.from_config(get_config(), pwd_context)
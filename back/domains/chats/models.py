@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, Float, Text, Index
+from sqlalchemy.sql import func
+from dependencies.database import Base
+
+
+# ChatLog model
+class ChatLog(Base):
+    __tablename__ = "chat_messages"
+    id = Column(BigInteger, primary_key=True)
+    message_id = Column(String(32), unique=True, nullable=False)
+    room_name = Column(String(100), nullable=False)
+    username = Column(String(50), nullable=False)
+    message = Column(Text, nullable=False)
+    category = Column(String(20))
+    score = Column(Float)
+    tier = Column(String(10))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_chat_messages_room_name_created_at", "room_name", "created_at"),
+    )
@@ -0,0 +1,26 @@
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from .models import ChatLog
+
+# PostgreSQL 프로토콜의 문장당 바인드 파라미터 상한
+_MAX_PARAMS = 32767
+
+
+class ChatLogRepository:
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def bulk_insert(self, rows: List[dict]) -> None:
+        # execute(stmt, rows)는 asyncpg에서 행마다 실행하는 executemany가 되므로,
+        # VALUES에 여러 행을 넣은 INSERT 한 문장(문장당 왕복 한 번)으로 보낸다.
+        # 재시도로 같은 메시지가 다시 들어와도 message_id 기준으로 무시한다
+        chunk = max(1, _MAX_PARAMS // len(ChatLog.__table__.columns))
+        for start in range(0, len(rows), chunk):
+            stmt = (
+                insert(ChatLog)
+                .values(rows[start:start + chunk])
+                .on_conflict_do_nothing(index_elements=[ChatLog.message_id])
+            )
+            await self._session.execute(stmt)
+        await self._session.commit()
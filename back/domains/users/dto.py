@@ -1,8 +1,15 @@
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from decimal import Decimal
 
+# users.username, chat_messages.room_name 컬럼 길이와 같게
+USERNAME_MAX_LENGTH = 50
+ROOM_NAME_MAX_LENGTH = 100
+# 방별 속도 제한의 상한. 이보다 크면 제한이 사실상 꺼진다
+ROOM_RATE_BURST_MAX = 100
+ROOM_RATE_REFILL_MAX = 20
+
 class UserSignUpDTO(BaseModel):
     username: str
     email: EmailStr
@@ -41,17 +48,76 @@ class UserWithAccountDTO(UserProfileDTO):
     account: AccountDTO
 
 class TopUpDTO(BaseModel):
-    amount: Decimal
+    # 0 이하를 받으면 충전이 아니라 차감 원장이 된다
+    amount: Decimal = Field(gt=0)
 
 class TopUpResponseDTO(BaseModel):
     message: str
     new_balance: Decimal
     amount: Decimal  # 추가된 필드
+
+class DonationDTO(BaseModel):
+    amount: Decimal = Field(gt=0)
+    message: Optional[str] = Field(None, max_length=200)
+
+class DonationResponseDTO(BaseModel):
+    message: str
+    new_balance: Decimal
+    amount: Decimal
     
 class RoomCreateRequest(BaseModel):
-    name: str
+    name: str = Field(min_length=1, max_length=ROOM_NAME_MAX_LENGTH)
+    moderation_mode: Literal["strict", "optimistic"] = "strict"
+    rate_burst: Optional[int] = Field(default=None, gt=0, le=ROOM_RATE_BURST_MAX)
+    rate_refill_per_second: Optional[float] = Field(default=None, gt=0, le=ROOM_RATE_REFILL_MAX)
+
+class ClipDTO(BaseModel):
+    id: int
+    title: str
+    creater: str
+    created_at: datetime
+
+class FollowDTO(BaseModel):
+    id: int
+    streamer: str
+    created_at: datetime
+
+class LikeDTO(BaseModel):
+    id: int
+    username: str
+    created_at: datetime
+
+# next_cursor가 None이면 마지막 페이지. total은 짧은 TTL 캐시 값이라 잠깐 어긋날 수 있다
+class ClipPageDTO(BaseModel):
+    items: List[ClipDTO]
+    next_cursor: Optional[str] = None
+    total: int
+
+class FollowPageDTO(BaseModel):
+    items: List[FollowDTO]
+    next_cursor: Optional[str] = None
+    total: int
+
+class LikePageDTO(BaseModel):
+    items: List[LikeDTO]
+    next_cursor: Optional[str] = None
+    total: int
+
+class FollowStateDTO(BaseModel):
+    following: bool
+    follower_count: int
+
+class LikeStateDTO(BaseModel):
+    liked: bool
+    like_count: int
+
+class BanCreateRequest(BaseModel):
+    username: str
+    reason: str
+    what: str = "chat"
 
 class ChatMessage(BaseModel):
     type: str
-    username: str
-    message: str = None
\ No newline at end of file
+    username: str = Field(max_length=USERNAME_MAX_LENGTH)
+    message: str = None
+    timestamp: Optional[str] = None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Numeric, Boolean, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from dependencies.database import Base
@@ -17,6 +17,9 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     chat_penalty = Column(Integer, default=0)
     view_penalty = Column(Integer, default=0)
+    # 방송인 기준 카운터. follows/likes를 추가/삭제할 때 같은 문장에서 함께 바꾼다
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     clips = relationship("Clip", back_populates="creater", foreign_keys='Clip.creater_id')
@@ -36,6 +39,24 @@ class Account(Base):
 
     user = relationship("User", back_populates="account") 
 
+
+# 잔액 변경 기록. 추가만 하고 수정/삭제하지 않는다
+class AccountLedger(Base):
+    __tablename__ = "account_ledger"
+    id = Column(BigInteger, primary_key=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(20), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    balance_after = Column(Numeric(10, 2), nullable=False)
+    idempotency_key = Column(String(64))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # 같은 키로 두 번 충전되지 않게. 키가 없는(NULL) 행끼리는 충돌하지 않는다
+        UniqueConstraint("user_id", "idempotency_key", name="uq_account_ledger_user_id_idempotency_key"),
+    )
+
     
 
 # Clip model
@@ -45,12 +66,18 @@ class Clip(Base):
     creater_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     streamer_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     title = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     creater = relationship("User", foreign_keys=[creater_id], back_populates="clips")
     streamer = relationship("User", foreign_keys=[streamer_id])
 
+    __table_args__ = (
+        # 목록 API의 keyset 페이지 순서 (created_at, id)
+        Index("ix_clips_streamer_id_created_at_id", "streamer_id", "created_at", "id"),
+        Index("ix_clips_creater_id", "creater_id"),
+    )
+
 
 # Like model
 class Like(Base):
@@ -58,12 +85,19 @@ class Like(Base):
     id = Column(Integer, primary_key=True, index=True)
     liked_user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     liked_streamer_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     liked_user = relationship("User", foreign_keys=[liked_user_id])
     liked_streamer = relationship("User", foreign_keys=[liked_streamer_id])
 
+    __table_args__ = (
+        # (사용자, 방송인)당 한 번. 사용자 쪽 조회도 이 인덱스를 쓴다
+        UniqueConstraint("liked_user_id", "liked_streamer_id", name="uq_likes_user_streamer"),
+        Index("ix_likes_streamer_user", "liked_streamer_id", "liked_user_id"),
+        Index("ix_likes_streamer_id_created_at_id", "liked_streamer_id", "created_at", "id"),
+    )
+
 
 # Follow model
 class Follow(Base):
@@ -71,12 +105,18 @@ class Follow(Base):
     id = Column(Integer, primary_key=True, index=True)
     follow_user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     follow_streamer_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     follow_user = relationship("User", foreign_keys=[follow_user_id])
     follow_streamer = relationship("User", foreign_keys=[follow_streamer_id])
 
+    __table_args__ = (
+        UniqueConstraint("follow_user_id", "follow_streamer_id", name="uq_follows_user_streamer"),
+        Index("ix_follows_streamer_user", "follow_streamer_id", "follow_user_id"),
+        Index("ix_follows_user_id_created_at_id", "follow_user_id", "created_at", "id"),
+    )
+
 
 # Ban model
 class Ban(Base):
@@ -90,4 +130,10 @@ class Ban(Base):
 
     # Relationships
     ben_user = relationship("User", foreign_keys=[ben_user_id])
-    ben_streamer = relationship("User", foreign_keys=[ben_streamer_id])
\ No newline at end of file
+    ben_streamer = relationship("User", foreign_keys=[ben_streamer_id])
+
+    __table_args__ = (
+        # 제재 기록은 여러 번 남을 수 있으므로 unique는 걸지 않는다
+        Index("ix_bans_streamer_user", "ben_streamer_id", "ben_user_id"),
+        Index("ix_bans_user_id", "ben_user_id"),
+    )
\ No newline at end of file
@@ -1,12 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
+from sqlalchemy import Numeric, String, delete, func, insert, literal, text, tuple_, update
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from .models import User, Account
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from .models import User, Account, AccountLedger, Clip, Follow, Like, Ban
 from .dto import UserSignUpDTO, UserProfileDTO, TopUpDTO
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
+from typing import List, Optional, Tuple
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
@@ -16,32 +19,71 @@ class UserRepository:
         profile_picture_str = str(payload.profile_picture) if payload.profile_picture else None
         updated_at = datetime.utcnow()
 
-        user_entity = User(
-            username=payload.username,
-            email=payload.email,
-            hashed_password=payload.password,  # Assuming the password is already hashed
-            full_name=payload.full_name,
-            bio=payload.bio,
-            profile_picture=profile_picture_str,
-            updated_at=updated_at
+        # 사용자와 계정을 한 문장으로 만든다 (INSERT ... RETURNING을 CTE로 이어서)
+        new_user = (
+            insert(User)
+            .values(
+                username=payload.username,
+                email=payload.email,
+                hashed_password=payload.password,  # Assuming the password is already hashed
+                full_name=payload.full_name,
+                bio=payload.bio,
+                profile_picture=profile_picture_str,
+                updated_at=updated_at
+            )
+            .returning(*User.__table__.c)
+            .cte("new_user")
+        )
+        new_account = (
+            insert(Account)
+            .from_select(["user_id", "updated_at"], select(new_user.c.id, new_user.c.updated_at))
+            .cte("new_account")
         )
-        self._session.add(user_entity)
         try:
-            await self._session.flush()
-            await self._session.refresh(user_entity)
-            
-            account_entity = Account(
-                user_id=user_entity.id,
-                updated_at=updated_at  # 여기에 updated_at 필드를 추가합니다
-            )
-            self._session.add(account_entity)
-            
+            result = await self._session.execute(select(aliased(User, new_user)).add_cte(new_account))
+            user_entity = result.scalar_one()
             await self._session.commit()
         except IntegrityError as e:
             await self._session.rollback()
             raise HTTPException(status_code=400, detail="Database integrity error: " + str(e))
         return user_entity
 
+    async def copy_users(self, users: List[tuple]) -> int:
+        """(username, email, hashed_password, full_name, bio, profile_picture) 목록을 COPY로 넣고 계정도 만든다.
+
+        id를 시퀀스에서 미리 받아서 users와 accounts를 같은 트랜잭션 안에서 COPY한다.
+        """
+        if not users:
+            return 0
+        # SQLAlchemy로 먼저 실행해서 트랜잭션을 연 뒤 같은 asyncpg 연결로 COPY한다
+        result = await self._session.execute(
+            text("SELECT nextval(pg_get_serial_sequence('users', 'id')) FROM generate_series(1, :count)"),
+            {"count": len(users)},
+        )
+        ids = result.scalars().all()
+        connection = await self._session.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+        now = datetime.now(timezone.utc)
+        try:
+            await raw.copy_records_to_table(
+                User.__tablename__,
+                columns=[
+                    "id", "username", "email", "hashed_password", "full_name", "bio", "profile_picture",
+                    "is_active", "updated_at", "chat_penalty", "view_penalty",
+                ],
+                records=[(user_id, *user, True, now, 0, 0) for user_id, user in zip(ids, users)],
+            )
+            await raw.copy_records_to_table(
+                Account.__tablename__,
+                columns=["user_id", "balance", "updated_at"],
+                records=[(user_id, Decimal(0), now) for user_id in ids],
+            )
+            await self._session.commit()
+        except Exception:
+            await self._session.rollback()
+            raise
+        return len(ids)
+
     async def get_user_by_username(self, username: str) -> User:
         result = await self._session.execute(
             select(User).options(joinedload(User.account)).where(User.username == username)
@@ -72,25 +114,320 @@ class UserRepository:
         
         return user
 
-    async def top_up_account(self, user_id: int, amount: Decimal) -> Account:
-        result = await self._session.execute(select(Account).where(Account.user_id == user_id))
-        account = result.scalar_one_or_none()
-        if account is None:
-            raise HTTPException(status_code=404, detail="Account not found")
-        
-        account.balance += amount
-        account.last_topup_at = datetime.utcnow()
-        
+    async def top_up_account(
+        self, user_id: int, amount: Decimal, idempotency_key: Optional[str] = None
+    ) -> Optional[AccountLedger]:
+        """잔액 증가와 원장 기록을 한 문장(UPDATE ... RETURNING을 CTE로)으로 처리한다.
+
+        같은 idempotency_key가 이미 있으면 문장 전체가 롤백되고 기존 원장 행을 돌려준다.
+        계정이 없으면 None.
+        """
+        updated = (
+            update(Account)
+            .where(Account.user_id == user_id)
+            .values(balance=Account.balance + amount, last_topup_at=func.now(), updated_at=func.now())
+            .returning(Account.id, Account.user_id, Account.balance)
+            .cte("updated")
+        )
+        stmt = (
+            insert(AccountLedger)
+            .from_select(
+                ["account_id", "user_id", "kind", "amount", "balance_after", "idempotency_key"],
+                select(
+                    updated.c.id,
+                    updated.c.user_id,
+                    literal("topup", String),
+                    literal(amount, Numeric(10, 2)),
+                    updated.c.balance,
+                    literal(idempotency_key, String(64)),
+                ),
+            )
+            .add_cte(updated)
+            .returning(AccountLedger)
+        )
         try:
+            result = await self._session.execute(stmt)
+            entry = result.scalar_one_or_none()
             await self._session.commit()
-            await self._session.refresh(account)
         except IntegrityError as e:
             await self._session.rollback()
-            raise HTTPException(status_code=400, detail="Database integrity error: " + str(e))
-        
-        return account
-    
+            entry = await self.get_ledger_entry(user_id, idempotency_key) if idempotency_key else None
+            if entry is None:
+                raise HTTPException(status_code=400, detail="Database integrity error: " + str(e))
+        return entry
+
+    async def donate(
+        self, user_id: int, streamer_id: int, amount: Decimal, idempotency_key: Optional[str] = None
+    ) -> Tuple[Optional[AccountLedger], bool]:
+        """보낸 사람 잔액 차감, 방송인 잔액 증가, 원장 두 줄을 한 문장으로 처리한다.
+
+        잔액이 모자라거나 어느 한쪽 계정이 없으면 아무것도 바꾸지 않고 (None, False).
+        같은 idempotency_key로 이미 후원했으면 기존 차감 원장 행과 False를 돌려준다.
+        """
+        # 두 계정을 id 순서로 먼저 잠근다. A->B, B->A 후원이 동시에 와도 서로 반대 순서로 기다리며 교착되지 않는다.
+        # 두 행이 모두 있어야 차감한다(받는 계정이 없으면 아무것도 바꾸지 않음)
+        both = aliased(Account)
+        locked = (
+            select(both.id)
+            .where(both.user_id.in_([user_id, streamer_id]))
+            .order_by(both.id)
+            .with_for_update()
+            .cte("locked")
+        )
+        debited = (
+            update(Account)
+            .where(
+                Account.user_id == user_id,
+                Account.balance >= amount,
+                select(func.count()).select_from(locked).scalar_subquery() == 2,
+            )
+            .values(balance=Account.balance - amount, updated_at=func.now())
+            .returning(Account.id, Account.user_id, Account.balance)
+            .cte("debited")
+        )
+        credited = (
+            update(Account)
+            .where(Account.user_id == streamer_id, select(debited.c.id).exists())
+            .values(balance=Account.balance + amount, updated_at=func.now())
+            .returning(Account.id, Account.user_id, Account.balance)
+            .cte("credited")
+        )
+        stmt = (
+            insert(AccountLedger)
+            .from_select(
+                ["account_id", "user_id", "kind", "amount", "balance_after", "idempotency_key"],
+                select(
+                    debited.c.id,
+                    debited.c.user_id,
+                    literal("donation", String),
+                    literal(-amount, Numeric(10, 2)),
+                    debited.c.balance,
+                    literal(idempotency_key, String(64)),
+                ).union_all(
+                    select(
+                        credited.c.id,
+                        credited.c.user_id,
+                        literal("donation_received", String),
+                        literal(amount, Numeric(10, 2)),
+                        credited.c.balance,
+                        literal(None, String(64)),
+                    )
+                ),
+            )
+            .add_cte(debited)
+            .add_cte(credited)
+            .returning(AccountLedger)
+        )
+        try:
+            result = await self._session.execute(stmt)
+            entries = result.scalars().all()
+            await self._session.commit()
+        except IntegrityError as e:
+            await self._session.rollback()
+            entry = await self.get_ledger_entry(user_id, idempotency_key) if idempotency_key else None
+            if entry is None:
+                raise HTTPException(status_code=400, detail="Database integrity error: " + str(e))
+            return entry, False
+        entry = next((entry for entry in entries if entry.user_id == user_id), None)
+        return entry, entry is not None
+
+    async def get_ledger_entry(self, user_id: int, idempotency_key: str) -> Optional[AccountLedger]:
+        result = await self._session.execute(
+            select(AccountLedger).where(
+                AccountLedger.user_id == user_id, AccountLedger.idempotency_key == idempotency_key
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def set_active(self, user_id: int, is_active: bool) -> bool:
+        result = await self._session.execute(
+            update(User).where(User.id == user_id).values(is_active=is_active).returning(User.id)
+        )
+        updated = result.scalar_one_or_none() is not None
+        await self._session.commit()
+        return updated
+
     async def get_user_with_account(self, user_id: int) -> User:
         query = select(User).options(joinedload(User.account)).where(User.id == user_id)
         result = await self._session.execute(query)
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    async def get_chat_penalty(self, username: str) -> Optional[int]:
+        result = await self._session.execute(select(User.chat_penalty).where(User.username == username))
+        return result.scalar_one_or_none()
+
+    async def increment_chat_penalty(self, username: str) -> Optional[int]:
+        result = await self._session.execute(
+            update(User)
+            .where(User.username == username)
+            .values(chat_penalty=func.coalesce(User.chat_penalty, 0) + 1)
+            .returning(User.chat_penalty)
+        )
+        penalty = result.scalar_one_or_none()
+        await self._session.commit()
+        return penalty
+
+
+class SocialRepository:
+    """follow/like/ban 조회와 변경. follow/like는 방송인의 카운터를 같은 문장에서 함께 바꾼다."""
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def _change_counter(self, changed, column, delta: int) -> Optional[int]:
+        # changed: 실제로 추가/삭제된 행의 방송인 id를 돌려주는 CTE. 중복 follow나 없는 행이면 카운터는 그대로
+        result = await self._session.execute(
+            update(User)
+            .where(User.id.in_(select(changed.c.streamer_id)))
+            # updated_at은 프로필 변경 시각이므로 onupdate가 돌지 않게 그대로 둔다
+            .values({column: getattr(User, column) + delta, "updated_at": User.updated_at})
+            .returning(getattr(User, column))
+            .add_cte(changed)
+        )
+        count = result.scalar_one_or_none()
+        await self._session.commit()
+        return count
+
+    async def follow(self, user_id: int, streamer_id: int) -> Optional[int]:
+        """새로 follow했으면 방송인의 follower_count, 이미 follow 중이면 None."""
+        changed = (
+            pg_insert(Follow)
+            .values(follow_user_id=user_id, follow_streamer_id=streamer_id)
+            .on_conflict_do_nothing(constraint="uq_follows_user_streamer")
+            .returning(Follow.follow_streamer_id.label("streamer_id"))
+            .cte("changed")
+        )
+        return await self._change_counter(changed, "follower_count", 1)
+
+    async def unfollow(self, user_id: int, streamer_id: int) -> Optional[int]:
+        changed = (
+            delete(Follow)
+            .where(Follow.follow_user_id == user_id, Follow.follow_streamer_id == streamer_id)
+            .returning(Follow.follow_streamer_id.label("streamer_id"))
+            .cte("changed")
+        )
+        return await self._change_counter(changed, "follower_count", -1)
+
+    async def like(self, user_id: int, streamer_id: int) -> Optional[int]:
+        changed = (
+            pg_insert(Like)
+            .values(liked_user_id=user_id, liked_streamer_id=streamer_id)
+            .on_conflict_do_nothing(constraint="uq_likes_user_streamer")
+            .returning(Like.liked_streamer_id.label("streamer_id"))
+            .cte("changed")
+        )
+        return await self._change_counter(changed, "like_count", 1)
+
+    async def unlike(self, user_id: int, streamer_id: int) -> Optional[int]:
+        changed = (
+            delete(Like)
+            .where(Like.liked_user_id == user_id, Like.liked_streamer_id == streamer_id)
+            .returning(Like.liked_streamer_id.label("streamer_id"))
+            .cte("changed")
+        )
+        return await self._change_counter(changed, "like_count", -1)
+
+    async def is_following(self, user_id: int, streamer_id: int) -> bool:
+        result = await self._session.execute(
+            select(Follow.id).where(Follow.follow_user_id == user_id, Follow.follow_streamer_id == streamer_id)
+        )
+        return result.first() is not None
+
+    async def is_banned(self, user_id: int, streamer_id: int) -> bool:
+        result = await self._session.execute(
+            select(Ban.id).where(Ban.ben_streamer_id == streamer_id, Ban.ben_user_id == user_id).limit(1)
+        )
+        return result.first() is not None
+
+    async def get_follower_batch(self, streamer: str, after_user_id: int, limit: int) -> List[tuple]:
+        """streamer(username)의 팔로워 (user id, username)를 user id 순서로 after_user_id 다음부터 limit개.
+
+        (follow_streamer_id, follow_user_id) 인덱스를 그대로 따라가므로 OFFSET 없이 페이지마다 비용이 같다.
+        """
+        streamer_user = aliased(User)
+        follower = aliased(User)
+        result = await self._session.execute(
+            select(Follow.follow_user_id, follower.username)
+            .join(streamer_user, streamer_user.id == Follow.follow_streamer_id)
+            .join(follower, follower.id == Follow.follow_user_id)
+            .where(streamer_user.username == streamer, Follow.follow_user_id > after_user_id)
+            .order_by(Follow.follow_user_id)
+            .limit(limit)
+        )
+        return result.all()
+
+    async def ban(self, user_id: int, streamer_id: int, reason: str, what: str) -> Ban:
+        ban = Ban(ben_user_id=user_id, ben_streamer_id=streamer_id, reason=reason, what=what)
+        self._session.add(ban)
+        await self._session.commit()
+        return ban
+
+    async def unban(self, user_id: int, streamer_id: int) -> int:
+        result = await self._session.execute(
+            delete(Ban).where(Ban.ben_streamer_id == streamer_id, Ban.ben_user_id == user_id)
+        )
+        await self._session.commit()
+        return result.rowcount
+
+    async def list_ban_pairs(self) -> List[tuple]:
+        # 채팅 밴 인덱스용 (방송인 username, 밴된 username)
+        streamer = aliased(User)
+        banned = aliased(User)
+        result = await self._session.execute(
+            select(streamer.username, banned.username)
+            .distinct()
+            .select_from(Ban)
+            .join(streamer, streamer.id == Ban.ben_streamer_id)
+            .join(banned, banned.id == Ban.ben_user_id)
+        )
+        return result.all()
+
+    async def _keyset_page(self, query, created_at, row_id, after: Optional[Tuple[datetime, int]], limit: int):
+        # 최신순. OFFSET 대신 마지막으로 본 (created_at, id) 다음부터 읽어서 깊은 페이지도 인덱스 한 구간만 훑는다
+        if after is not None:
+            query = query.where(tuple_(created_at, row_id) < tuple_(literal(after[0]), literal(after[1])))
+        result = await self._session.execute(query.order_by(created_at.desc(), row_id.desc()).limit(limit))
+        return result.all()
+
+    async def list_clips(self, streamer_id: int, after: Optional[Tuple[datetime, int]], limit: int) -> List[tuple]:
+        query = (
+            select(Clip.id, Clip.title, User.username.label("creater"), Clip.created_at)
+            .join(User, User.id == Clip.creater_id)
+            .where(Clip.streamer_id == streamer_id)
+        )
+        return await self._keyset_page(query, Clip.created_at, Clip.id, after, limit)
+
+    async def list_follows(self, user_id: int, after: Optional[Tuple[datetime, int]], limit: int) -> List[tuple]:
+        query = (
+            select(Follow.id, User.username.label("streamer"), Follow.created_at)
+            .join(User, User.id == Follow.follow_streamer_id)
+            .where(Follow.follow_user_id == user_id)
+        )
+        return await self._keyset_page(query, Follow.created_at, Follow.id, after, limit)
+
+    async def list_likers(self, streamer_id: int, after: Optional[Tuple[datetime, int]], limit: int) -> List[tuple]:
+        query = (
+            select(Like.id, User.username, Like.created_at)
+            .join(User, User.id == Like.liked_user_id)
+            .where(Like.liked_streamer_id == streamer_id)
+        )
+        return await self._keyset_page(query, Like.created_at, Like.id, after, limit)
+
+    async def count_clips(self, streamer_id: int) -> int:
+        result = await self._session.execute(
+            select(func.count()).select_from(Clip).where(Clip.streamer_id == streamer_id)
+        )
+        return result.scalar_one()
+
+    async def count_follows(self, user_id: int) -> int:
+        result = await self._session.execute(
+            select(func.count()).select_from(Follow).where(Follow.follow_user_id == user_id)
+        )
+        return result.scalar_one()
+
+    async def get_counts(self, streamer_id: int) -> Optional[tuple]:
+        # COUNT(*) 대신 카운터 컬럼을 읽는다
+        result = await self._session.execute(
+            select(User.follower_count, User.like_count).where(User.id == streamer_id)
+        )
+        return result.first()
@@ -1,18 +1,30 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from domains.users.repositories import UserRepository
+from domains.users.repositories import SocialRepository, UserRepository
 from .dto import *
 from .models import User
+from dependencies.auth import AuthService
+from dependencies.cache import TTLCache
 from dependencies.database import get_db
+from dependencies.pagination import decode_cursor, encode_cursor
+from dependencies.passwords import hash_many, password_hasher
 from dependencies.config import get_config
 
 config = get_config()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# (user_id, idempotency key) -> 충전 응답. 캐시에서 빠진 키는 원장의 unique 제약으로 다시 찾는다
+charge_cache = TTLCache(config.charge_idempotency_cache_size, config.charge_idempotency_ttl_seconds)
+# (목록 종류, user_id) -> 전체 개수. 목록 요청마다 COUNT(*)를 돌리지 않는다
+count_cache = TTLCache(config.listing_count_cache_size, config.listing_count_ttl_seconds)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 class UserService:
@@ -21,15 +33,106 @@ class UserService:
         self._repository = UserRepository(session)
 
     async def create_user(self, payload: UserSignUpDTO) -> User:
-        hashed_password = self._hash_password(payload.password)
+        hashed_password = await self._hash_password(payload.password)
         payload.password = hashed_password
         return await self._repository.create_user(payload=payload)
 
+    async def import_users(
+        self,
+        rows: Iterable[dict],
+        batch_size: int = 1000,
+        workers: Optional[int] = None,
+        on_batch: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """사용자 행(dict)을 스트리밍으로 읽어 batch_size개씩 COPY로 넣는다.
+
+        비밀번호는 별도 프로세스 풀에서 병렬로 해시하고, 한 배치를 해시하는 동안 앞 배치를 COPY한다.
+        행에 hashed_password가 있으면 해시를 건너뛴다(다른 시스템에서 옮겨 올 때).
+        잘못된 행은 건너뛰고, 실패한 배치는 롤백한 뒤 다음 배치로 넘어간다.
+        """
+        workers = workers or os.cpu_count() or 1
+        loop = asyncio.get_running_loop()
+        stats = {"imported": 0, "skipped": 0, "failed": 0, "batches": 0}
+        start = time.perf_counter()
+
+        def report() -> dict:
+            elapsed = time.perf_counter() - start
+            stats["seconds"] = elapsed
+            stats["rows_per_sec"] = stats["imported"] / elapsed if elapsed else 0.0
+            return stats
+
+        async def hash_batch(users: List[dict]) -> List[tuple]:
+            plain = [index for index, user in enumerate(users) if not user.get("hashed_password")]
+            chunk = max(1, -(-len(plain) // workers))
+            chunks = [plain[i:i + chunk] for i in range(0, len(plain), chunk)]
+            hashed = await asyncio.gather(*(
+                loop.run_in_executor(pool, hash_many, [users[index]["password"] for index in indexes])
+                for indexes in chunks
+            ))
+            for indexes, hashes in zip(chunks, hashed):
+                for index, value in zip(indexes, hashes):
+                    users[index]["hashed_password"] = value
+            return [
+                (user["username"], user["email"], user["hashed_password"], user["full_name"],
+                 user.get("bio"), user.get("profile_picture"))
+                for user in users
+            ]
+
+        async def copy_batch(records: List[tuple]) -> None:
+            try:
+                stats["imported"] += await self._repository.copy_users(records)
+            except Exception as e:
+                stats["failed"] += len(records)
+                print(f"User import batch failed ({len(records)} rows): {str(e)}")
+            stats["batches"] += 1
+            if on_batch is not None:
+                on_batch(report())
+
+        rows = iter(rows)
+        previous = None
+        with ProcessPoolExecutor(workers) as pool:
+            while True:
+                chunk = list(islice(rows, batch_size))
+                users = []
+                for row in chunk:
+                    user = self._import_row(row)
+                    if user is None:
+                        stats["skipped"] += 1
+                    else:
+                        users.append(user)
+                hashing = asyncio.ensure_future(hash_batch(users))
+                if previous is not None:
+                    await copy_batch(previous)
+                previous = await hashing or None
+                if not chunk:
+                    break
+        return report()
+
+    def _import_row(self, row: dict) -> Optional[dict]:
+        hashed_password = row.get("hashed_password") or None
+        try:
+            user = UserSignUpDTO(
+                username=row.get("username"),
+                email=row.get("email"),
+                password=row.get("password") or hashed_password or "",
+                full_name=row.get("full_name"),
+                bio=row.get("bio") or None,
+                profile_picture=row.get("profile_picture") or None,
+            )
+        except ValidationError:
+            return None
+        if not hashed_password and not user.password:
+            return None
+        values = user.model_dump()
+        values["hashed_password"] = hashed_password
+        values["profile_picture"] = str(user.profile_picture) if user.profile_picture else None
+        return values
+
     async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         try:
             user = await self._repository.get_user_by_username(username)
             print(f"User found: {user}")  # 디버깅을 위한 로그
-            if not user or not self._verify_password(password, user.hashed_password):
+            if not user or not await self._verify_password(password, user.hashed_password):
                 return None
             return user
         except Exception as e:
@@ -61,11 +164,12 @@ class UserService:
             raise credentials_exception
         return user
 
-    def _hash_password(self, password: str) -> str:
-        return pwd_context.hash(password)
+    # bcrypt는 전용 스레드 풀에서 돈다. 풀이 가득 차면 503
+    async def _hash_password(self, password: str) -> str:
+        return await password_hasher.hash(password)
 
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
 
     async def login(self, login_data: UserLoginDTO) -> Token:
         user = await self.authenticate_user(login_data.username, login_data.password)
@@ -109,15 +213,137 @@ class UserService:
         user = await self._repository.update_user(user_id, payload)
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
+        AuthService.invalidate_user(user_id)
         return user
 
-    async def top_up_account(self, user_id: int, top_up_data: TopUpDTO) -> TopUpResponseDTO:
-        account = await self._repository.top_up_account(user_id, top_up_data.amount)
-        return TopUpResponseDTO(
+    async def deactivate_user(self, user_id: int) -> None:
+        if not await self._repository.set_active(user_id, False):
+            raise HTTPException(status_code=404, detail="User not found")
+        AuthService.invalidate_user(user_id)
+
+    async def list_clips(self, streamer: str, cursor: Optional[str], limit: int) -> ClipPageDTO:
+        social = SocialRepository(self._session)
+        user = await self._get_user_or_404(streamer)
+        rows = await social.list_clips(user.id, decode_cursor(cursor), limit + 1)
+        total = await self._cached_count("clips", user.id, lambda: social.count_clips(user.id))
+        return ClipPageDTO(**self._page(rows, limit), total=total)
+
+    async def list_follows(self, username: str, cursor: Optional[str], limit: int) -> FollowPageDTO:
+        social = SocialRepository(self._session)
+        user = await self._get_user_or_404(username)
+        rows = await social.list_follows(user.id, decode_cursor(cursor), limit + 1)
+        total = await self._cached_count("follows", user.id, lambda: social.count_follows(user.id))
+        return FollowPageDTO(**self._page(rows, limit), total=total)
+
+    async def list_likers(self, streamer: str, cursor: Optional[str], limit: int) -> LikePageDTO:
+        user = await self._get_user_or_404(streamer)
+        rows = await SocialRepository(self._session).list_likers(user.id, decode_cursor(cursor), limit + 1)
+        # 좋아요 수는 users.like_count 카운터를 그대로 쓴다
+        return LikePageDTO(**self._page(rows, limit), total=user.like_count)
+
+    async def _get_user_or_404(self, username: str) -> User:
+        user = await self._repository.get_user_by_username(username)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+
+    async def _cached_count(self, kind: str, user_id: int, count) -> int:
+        total = count_cache.get((kind, user_id))
+        if total is None:
+            total = await count()
+            count_cache.set((kind, user_id), total)
+        return total
+
+    def _page(self, rows: list, limit: int) -> dict:
+        # limit + 1개를 읽어서 한 개가 더 있으면 다음 페이지가 있다
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return {"items": [dict(row._mapping) for row in items], "next_cursor": next_cursor}
+
+    async def set_follow(self, user: User, streamer: str, following: bool) -> FollowStateDTO:
+        social = SocialRepository(self._session)
+        target = await self._get_social_target(user, streamer)
+        change = social.follow if following else social.unfollow
+        count = await change(user.id, target.id)
+        if count is None:
+            # 이미 그 상태였다. 카운터만 읽어서 돌려준다
+            count = (await social.get_counts(target.id)).follower_count
+        count_cache.pop(("follows", user.id))
+        return FollowStateDTO(following=following, follower_count=count)
+
+    async def set_like(self, user: User, streamer: str, liked: bool) -> LikeStateDTO:
+        social = SocialRepository(self._session)
+        target = await self._get_social_target(user, streamer)
+        change = social.like if liked else social.unlike
+        count = await change(user.id, target.id)
+        if count is None:
+            count = (await social.get_counts(target.id)).like_count
+        return LikeStateDTO(liked=liked, like_count=count)
+
+    async def _get_social_target(self, user: User, streamer: str) -> User:
+        target = await self._get_user_or_404(streamer)
+        if target.id == user.id:
+            raise HTTPException(status_code=400, detail="Cannot follow or like yourself")
+        return target
+
+    async def ban_user(self, streamer: User, payload: BanCreateRequest) -> None:
+        user = await self._repository.get_user_by_username(payload.username)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        await SocialRepository(self._session).ban(user.id, streamer.id, payload.reason, payload.what)
+
+    async def unban_user(self, streamer: User, username: str) -> None:
+        user = await self._repository.get_user_by_username(username)
+        if user is None or not await SocialRepository(self._session).unban(user.id, streamer.id):
+            raise HTTPException(status_code=404, detail="Ban not found")
+
+    async def top_up_account(
+        self, user_id: int, top_up_data: TopUpDTO, idempotency_key: Optional[str] = None
+    ) -> TopUpResponseDTO:
+        if idempotency_key:
+            cached = charge_cache.get((user_id, idempotency_key))
+            if cached is not None:
+                return self._replayed_charge(cached, top_up_data)
+        entry = await self._repository.top_up_account(user_id, top_up_data.amount, idempotency_key)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Account not found")
+        AuthService.invalidate_user(user_id)
+        response = TopUpResponseDTO(
             message="Top up successful",
-            new_balance=account.balance,
-            amount=top_up_data.amount
+            new_balance=entry.balance_after,
+            amount=entry.amount
         )
+        if idempotency_key:
+            charge_cache.set((user_id, idempotency_key), response)
+            return self._replayed_charge(response, top_up_data)
+        return response
+
+    async def donate(
+        self, sender: User, streamer: str, payload: DonationDTO, idempotency_key: Optional[str] = None
+    ) -> Tuple[DonationResponseDTO, bool]:
+        """실제로 차감된 경우에만 두 번째 값이 True. 같은 키로 다시 보내면 처음 결과와 False."""
+        receiver = await self._get_user_or_404(streamer)
+        if receiver.id == sender.id:
+            raise HTTPException(status_code=400, detail="Cannot donate to yourself")
+        entry, created = await self._repository.donate(sender.id, receiver.id, payload.amount, idempotency_key)
+        if entry is None:
+            raise HTTPException(status_code=400, detail="Insufficient balance")
+        if created:
+            AuthService.invalidate_user(sender.id)
+            AuthService.invalidate_user(receiver.id)
+        elif -entry.amount != payload.amount:
+            raise HTTPException(status_code=409, detail="Idempotency key already used with a different amount")
+        response = DonationResponseDTO(message="Donation successful", new_balance=entry.balance_after, amount=-entry.amount)
+        return response, created
+
+    def _replayed_charge(self, response: TopUpResponseDTO, top_up_data: TopUpDTO) -> TopUpResponseDTO:
+        # 같은 키를 다른 금액으로 다시 쓰면 거절
+        if response.amount != top_up_data.amount:
+            raise HTTPException(status_code=409, detail="Idempotency key already used with a different amount")
+        return response
 
     async def get_current_active_user(self, current_user: User = Depends(get_current_user)):
         if not current_user.is_active:
@@ -0,0 +1,56 @@
+"""CSV/JSONL 파일에서 사용자를 대량으로 가져온다.
+
+    python import_users.py users.csv --batch-size 1000 --workers 4
+
+열(키): username, email, password, full_name, bio, profile_picture.
+password 대신 이미 해시된 hashed_password가 있으면 그대로 쓴다.
+"""
+import argparse
+import asyncio
+import csv
+import json
+from typing import Iterator
+from dependencies import database
+from dependencies.config import get_config
+from domains.users.services import UserService
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    # 한 줄씩 읽어서 파일 전체를 메모리에 올리지 않는다
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def print_progress(stats: dict) -> None:
+    print(
+        f"batch {stats['batches']}: imported {stats['imported']}, skipped {stats['skipped']}, "
+        f"failed {stats['failed']} ({stats['rows_per_sec']:.0f} rows/s)"
+    )
+
+
+async def main(args) -> None:
+    database.init_db(get_config())
+    try:
+        async with database.AsyncSessionLocal() as session:
+            stats = await UserService(session).import_users(
+                read_rows(args.path), batch_size=args.batch_size, workers=args.workers, on_batch=print_progress
+            )
+    finally:
+        await database.close_db()
+    print(
+        f"done: imported {stats['imported']} users in {stats['seconds']:.1f}s "
+        f"({stats['rows_per_sec']:.0f} rows/s), skipped {stats['skipped']}, failed {stats['failed']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or JSONL")
+    parser.add_argument("path", help="users.csv 또는 users.jsonl")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="비밀번호 해시 프로세스 수 (기본: CPU 수)")
+    asyncio.run(main(parser.parse_args()))
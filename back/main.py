@@ -1,19 +1,49 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from typing import Optional
+import orjson
+from fastapi import FastAPI, Depends, Header, HTTPException, Path, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import WebSocket, WebSocketDisconnect
 from Module.chat import *
-from dependencies.database import get_db, init_db
+from Module.connection import Connection, send_stats
+from Module.heartbeat import PONG_FRAME
+from Module.wire import JSON, negotiate
+from dependencies.database import close_db, db_stats, get_db, get_read_db, init_db, warm_pool
 from dependencies.config import get_config
 from domains.users.models import User
 from domains.users.dto import *
 from domains.users.services import UserService
 from dependencies.auth import AuthService
+from dependencies.passwords import password_hasher
 
-app = FastAPI()
+config = get_config()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 엔진은 여기서 한 번만 만든다
+    init_db(config)
+    if config.db_pool_prewarm > 0:
+        await warm_pool(config.db_pool_prewarm)
+    await ban_index.start()
+    await backplane.start()
+    await live_notifier.start()
+    await heartbeat.start()
+    if config.chat_log_enabled:
+        await chat_log.start()
+    yield
+    await heartbeat.close()
+    await ban_index.close()
+    # 브로커는 backplane이 닫으므로 그 전에 닫는다
+    await live_notifier.close()
+    await backplane.close()
+    await moderator.close()
+    await chat_log.close()
+    password_hasher.close()
+    await close_db()
 
-rooms = {}
+app = FastAPI(lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -24,9 +54,6 @@ app.add_middleware(
     allow_headers=["*"],  # 모든 HTTP 헤더 허용
 )
 
-config = get_config()
-init_db(config)
-
 @app.post("/signup", response_model=UserProfileDTO)
 async def signup(user_data: UserSignUpDTO, db: AsyncSession = Depends(get_db)):
     user_service = UserService(db)
@@ -45,6 +72,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
             )
         access_token = await AuthService.create_access_token(data={"sub": user.username})
         return {"access_token": access_token, "token_type": "bearer"}
+    except HTTPException:
+        # 401, 과부하 503은 그대로 돌려준다
+        raise
     except Exception as e:
         print(f"Login error: {str(e)}")  # 디버깅을 위한 로그
         raise HTTPException(
@@ -55,7 +85,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 @app.get("/users/me", response_model=UserWithAccountDTO)
 async def read_users_me(
     current_user: User = Depends(AuthService.get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     user_service = UserService(db)
     return await user_service.get_user_profile(current_user)
@@ -75,55 +105,316 @@ async def update_user_me(
 async def charge_account(
     charge_data: TopUpDTO,
     current_user: User = Depends(AuthService.get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+):
+    # 같은 Idempotency-Key로 다시 요청하면 다시 충전하지 않고 처음 결과를 돌려준다
+    user_service = UserService(db)
+    return await user_service.top_up_account(current_user.id, charge_data, idempotency_key)
+
+@app.post("/rooms/{room_name}/donations", response_model=DonationResponseDTO)
+async def donate(
+    room_name: str,
+    donation: DonationDTO,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+):
+    # 방송인 계정으로 실제로 옮겨진 뒤에만 후원 메시지를 방에 보낸다. 같은 키로 다시 보내면 다시 보내지 않는다
+    # 이 워커에 접속자가 없는 방이어도 다른 워커가 정한 방송인을 찾는다
+    await backplane.load_room(room_name)
+    streamer = room_manager.streamer(room_name)
+    if streamer is None:
+        raise HTTPException(status_code=404, detail="Room has no streamer")
+    user_service = UserService(db)
+    response, created = await user_service.donate(current_user, streamer, donation, idempotency_key)
+    if created:
+        await publish_donation(room_name, current_user.username, response.amount, donation.message)
+    return response
+
+@app.get("/streamers/{username}/clips", response_model=ClipPageDTO)
+async def list_clips(
+    username: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=config.listing_page_size_max),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # cursor: 이전 응답의 next_cursor. 없으면 첫 페이지(최신순)
+    user_service = UserService(db)
+    return await user_service.list_clips(username, cursor, limit)
+
+@app.get("/users/{username}/follows", response_model=FollowPageDTO)
+async def list_follows(
+    username: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=config.listing_page_size_max),
+    db: AsyncSession = Depends(get_read_db),
+):
+    user_service = UserService(db)
+    return await user_service.list_follows(username, cursor, limit)
+
+@app.get("/streamers/{username}/likes", response_model=LikePageDTO)
+async def list_likers(
+    username: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=config.listing_page_size_max),
+    db: AsyncSession = Depends(get_read_db),
+):
+    user_service = UserService(db)
+    return await user_service.list_likers(username, cursor, limit)
+
+@app.post("/streamers/{username}/follow", response_model=FollowStateDTO)
+async def follow_streamer(
+    username: str,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # follower_count는 follows 변경과 같은 문장에서 바뀐다. 이미 follow 중이면 그대로
+    user_service = UserService(db)
+    return await user_service.set_follow(current_user, username, True)
+
+@app.delete("/streamers/{username}/follow", response_model=FollowStateDTO)
+async def unfollow_streamer(
+    username: str,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    user_service = UserService(db)
+    return await user_service.set_follow(current_user, username, False)
+
+@app.post("/streamers/{username}/like", response_model=LikeStateDTO)
+async def like_streamer(
+    username: str,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
 ):
     user_service = UserService(db)
-    return await user_service.top_up_account(current_user.id, charge_data)
+    return await user_service.set_like(current_user, username, True)
+
+@app.delete("/streamers/{username}/like", response_model=LikeStateDTO)
+async def unlike_streamer(
+    username: str,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    user_service = UserService(db)
+    return await user_service.set_like(current_user, username, False)
+
+@app.post("/bans")
+async def ban_user(
+    payload: BanCreateRequest,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    # 로그인한 사용자가 자기 방송에서 payload.username을 밴한다
+    user_service = UserService(db)
+    await user_service.ban_user(current_user, payload)
+    ban_index.ban(current_user.username, payload.username)
+    return {"success": True}
+
+@app.delete("/bans/{username}")
+async def unban_user(
+    username: str,
+    current_user: User = Depends(AuthService.get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    user_service = UserService(db)
+    await user_service.unban_user(current_user, username)
+    ban_index.unban(current_user.username, username)
+    return {"success": True}
 
 @app.get("/protected")
 async def protected_route(current_user: User = Depends(AuthService.get_current_active_user)):
     return {"message": "This is a protected route", "user": current_user.username}
 
 @app.websocket("/ws/{room_name}")
-async def websocket_endpoint(websocket: WebSocket, room_name: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    room_name: str = Path(max_length=ROOM_NAME_MAX_LENGTH),
+    v: int = 1,
+    enc: str = JSON,
+    token: Optional[str] = None,
+):
+    # v: 클라이언트 프로토콜 버전 (2 이상이면 batch 프레임을 받는다)
+    # enc: 서버 -> 클라이언트 프레임 인코딩 (json 기본, msgpack이면 바이너리). 클라이언트가 보내는 건 항상 JSON
+    # token: 로그인 토큰(access_token). 브라우저 WebSocket은 헤더를 못 붙여서 query로 받는다. 없으면 익명
+    user = None
+    if token:
+        user = AuthService.decode_subject(token)
+        if user is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
     await websocket.accept()
-    if room_name not in rooms:
-        rooms[room_name] = []
-    rooms[room_name].append(websocket)
+    connection = Connection(
+        websocket,
+        config.chat_send_queue_size,
+        config.chat_send_queue_policy,
+        protocol_version=v,
+        encoding=negotiate(enc),
+    )
+    connection.start()
+    # 다른 워커에서 만든 방이면 방송인과 설정을 먼저 읽어 온다
+    await backplane.load_room(room_name)
+    room = room_manager.join(room_name, connection)
+    key = rate_key(user, websocket.client.host if websocket.client else "")
+    # 익명 연결은 첫 프레임의 username으로 고정한다
+    username = user
+    if user is not None:
+        spawn(load_chat_penalty(user))
+        # 방송 시작 알림을 받을 수 있게 등록하고, 쌓여 있던 알림을 보낸다
+        await live_notifier.register(user, connection)
     try:
         while True:
-            data = await websocket.receive_json()
-            chat_message = ChatMessage(**data)
+            raw = await websocket.receive_text()
+            connection.touch()
+            if raw == PONG_FRAME:
+                continue
+            # 파싱과 검증을 한 번에
+            chat_message = ChatMessage.model_validate_json(raw)
+            if username is None:
+                username = chat_message.username
+            elif chat_message.username != username:
+                reject_username(connection, username)
+                continue
+            # 입장(join)과 모든 메시지에서 밴 여부를 메모리 인덱스로 확인한다. 프레임의 username이 아니라 인증된 사용자로
+            if reject_banned(room, user, connection):
+                continue
+            # moderation, fan-out 전에 먼저 속도 제한
+            if not admit(room, key, connection, user):
+                continue
+            data = chat_message.model_dump(exclude_none=True)
             
             if chat_message.type == 'join':
+                replay_history(room_name, connection, config.chat_history_replay)
                 join_message = f"{chat_message.username} has joined the room."
-                await broadcast(room_name, {"type": "system", "message": join_message}, rooms)
+                await broadcast(room_name, {"type": "system", "message": join_message})
             elif chat_message.type == 'message':
-                category, score = await check_content(chat_message.message)
+                data["id"] = new_message_id()
+                # 아주 큰 방에서는 moderation 전에 일부만 골라 전달한다
+                if shed(room, user, data, connection):
+                    continue
+                if room.moderation_mode == OPTIMISTIC:
+                    # 사전 필터로 판정되면 바로 붙여 보내고, 아니면 먼저 보낸 뒤 판정을 뒤따라 보낸다
+                    local_result = moderator.classify_local(chat_message.message)
+                    data["filter_result"] = filter_result(*local_result) if local_result else None
+                    if local_result is None:
+                        await publish_optimistic(room_name, data)
+                    else:
+                        await publish_moderated(room_name, data)
+                    continue
+
+                category, score, tier = await check_content(chat_message.message)
                 
                 print(f"Original message: {chat_message.message}")
-                print(f"Content check result: category={category}, score={score}")
+                print(f"Content check result: category={category}, score={score}, tier={tier}")
 
-                data["filter_result"] = {
-                    "category": category,
-                    "score": score
-                }
+                data["filter_result"] = filter_result(category, score, tier)
 
-                await broadcast(room_name, data, rooms)
+                await publish_moderated(room_name, data)
     except WebSocketDisconnect:
-        rooms[room_name].remove(websocket)
-        if not rooms[room_name]:
-            del rooms[room_name]
+        pass
+    finally:
+        await connection.close()
+        room_manager.leave(room_name, connection)
+        if user is not None:
+            await live_notifier.unregister(user, connection)
+
+
+@app.get("/stats/db")
+async def database_stats():
+    return db_stats()
 
+@app.get("/stats/auth")
+async def auth_stats():
+    return AuthService.cache_stats()
+
+@app.get("/stats/passwords")
+async def password_stats():
+    return password_hasher.stats()
+
+@app.get("/stats/moderation")
+async def moderation_stats():
+    return moderator.stats()
+
+@app.get("/stats/connections")
+async def connection_stats():
+    return send_stats.stats()
+
+@app.get("/stats/rooms")
+async def room_stats():
+    stats = room_manager.stats()
+    stats["cluster"] = await backplane.room_counts()
+    stats["backplane"] = backplane.stats()
+    if backplane.coalescer is not None:
+        stats["coalescing"] = backplane.coalescer.stats()
+    return stats
+
+@app.get("/stats/rate_limit")
+async def rate_limit_stats():
+    return rate_limiter.stats()
+
+@app.get("/stats/heartbeat")
+async def heartbeat_stats():
+    return heartbeat.stats()
+
+@app.get("/stats/bans")
+async def ban_stats():
+    return ban_index.stats()
+
+@app.get("/stats/notifications")
+async def notification_stats():
+    return live_notifier.stats()
+
+@app.get("/stats/shedding")
+async def shedding_stats():
+    return load_shedder.stats()
+
+@app.get("/stats/chat_log")
+async def chat_log_stats():
+    return chat_log.stats()
+
+@app.get("/stats/history")
+async def history_stats():
+    return backplane.history.stats()
+
+@app.get("/rooms/{room_name}/history")
+async def room_history(
+    room_name: str,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=config.chat_history_size),
+):
+    messages = [orjson.loads(frame) for frame in backplane.history.page(room_name, before, limit)]
+    return {
+        "messages": messages,
+        "before": messages[0]["id"] if messages else None,
+    }
 
 @app.get("/get_rooms")
 async def get_rooms():
-    return list(rooms.keys())
+    return list(await backplane.room_counts())
 
 @app.post("/create_room")
-async def create_room(payload: RoomCreateRequest):
-    if payload.name not in rooms:
-        rooms[payload.name] = []
+async def create_room(
+    payload: RoomCreateRequest,
+    current_user: User = Depends(AuthService.get_current_active_user),
+):
+    # 방을 만든 로그인 사용자가 방송인이다(밴 확인, 우선 전달, 팔로워 알림 기준)
+    streamer = current_user.username
+    await backplane.load_room(payload.name)
+    room, created = room_manager.create(
+        payload.name,
+        payload.moderation_mode,
+        payload.rate_burst,
+        payload.rate_refill_per_second,
+        streamer,
+    )
+    if room.streamer != streamer:
+        # 다른 방송인의 방 이름은 방이 비어 있어도 가져갈 수 없다(후원, 밴, 팔로워 알림이 그 사람 기준)
+        return {"success": False, "message": f"Room '{payload.name}' belongs to another streamer"}
+    if created:
+        await backplane.save_room(room)
+        # 팔로워 알림은 응답을 기다리게 하지 않고 백그라운드에서 나눠 보낸다
+        spawn(live_notifier.notify_live(streamer, payload.name))
         return {"success": True, "message": f"Room '{payload.name}' created successfully"}
     else:
         return {"success": False, "message": f"Room '{payload.name}' already exists"}
@@ -132,4 +423,5 @@ async def create_room(payload: RoomCreateRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # permessage-deflate는 클라이언트가 제안할 때만 협상된다(브라우저는 기본으로 제안)
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=config.chat_ws_per_message_deflate)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import asyncio
+from Module.backplane import BrokerBackplane, InProcessBackplane, MemoryBroker
+from Module.rooms import RoomManager
+
+
+class FakeConnection:
+    def __init__(self, protocol_version: int = 1):
+        self.protocol_version = protocol_version
+        self.sent = []
+        self.closed = False
+
+    def send(self, frame) -> None:
+        self.sent.append(frame)
+
+
+def test_min_protocol_skips_old_clients():
+    rooms = RoomManager()
+    old, new = FakeConnection(1), FakeConnection(2)
+    rooms.join("room", old)
+    rooms.join("room", new)
+    backplane = InProcessBackplane(rooms)
+    asyncio.run(backplane.publish("room", "chat"))
+    asyncio.run(backplane.publish("room", "patch", min_protocol=2))
+    assert old.sent == ["chat"]
+    assert new.sent == ["chat", "patch"]
+
+
+def test_min_protocol_crosses_nodes():
+    async def scenario():
+        broker = MemoryBroker()
+        rooms_a, rooms_b = RoomManager(), RoomManager()
+        node_a = BrokerBackplane(rooms_a, broker, node_id="a")
+        node_b = BrokerBackplane(rooms_b, broker, node_id="b")
+        old, new = FakeConnection(1), FakeConnection(2)
+        rooms_b.join("room", old)
+        rooms_b.join("room", new)
+        await node_b.start()
+        await asyncio.sleep(0)
+        await node_a.publish("room", "patch", min_protocol=2)
+        for node in (node_a, node_b):
+            for task in node._tasks:
+                task.cancel()
+        return old, new
+
+    old, new = asyncio.run(scenario())
+    assert old.sent == []
+    assert new.sent == ["patch"]
+
+
+class FailingBroker(MemoryBroker):
+    async def publish(self, channel: str, message: str) -> None:
+        raise ConnectionError("broker down")
+
+
+def test_broker_error_still_delivers_locally():
+    rooms = RoomManager()
+    connection = FakeConnection(2)
+    rooms.join("room", connection)
+    backplane = BrokerBackplane(rooms, FailingBroker(), node_id="a")
+    asyncio.run(backplane.publish("room", "chat", history_id="1"))
+    asyncio.run(backplane.record("room", "2", "late"))
+    assert connection.sent == ["chat"]
+    assert backplane.stats()["publish_errors"] == 2
+    assert [frame for frame in backplane.history.recent("room", 10)] == ["chat", "late"]
+
+
+def test_max_protocol_reaches_only_old_clients():
+    rooms = RoomManager()
+    old, new = FakeConnection(1), FakeConnection(2)
+    rooms.join("room", old)
+    rooms.join("room", new)
+    backplane = InProcessBackplane(rooms)
+    asyncio.run(backplane.publish("room", "moderated", history_id="1", max_protocol=1))
+    assert old.sent == ["moderated"]
+    assert new.sent == []
+    assert backplane.history.recent("room", 10) == ["moderated"]
+
+
+def test_max_protocol_crosses_nodes():
+    async def scenario():
+        broker = MemoryBroker()
+        node_a = BrokerBackplane(RoomManager(), broker, node_id="a")
+        rooms_b = RoomManager()
+        node_b = BrokerBackplane(rooms_b, broker, node_id="b")
+        old, new = FakeConnection(1), FakeConnection(2)
+        rooms_b.join("room", old)
+        rooms_b.join("room", new)
+        await node_b.start()
+        await asyncio.sleep(0)
+        await node_a.publish("room", "moderated", max_protocol=1)
+        for node in (node_a, node_b):
+            for task in node._tasks:
+                task.cancel()
+        return old, new
+
+    old, new = asyncio.run(scenario())
+    assert old.sent == ["moderated"]
+    assert new.sent == []
+
+
+def test_room_settings_reach_other_nodes():
+    async def scenario():
+        broker = MemoryBroker()
+        rooms_a, rooms_b, rooms_c = RoomManager(), RoomManager(), RoomManager()
+        node_a = BrokerBackplane(rooms_a, broker, node_id="a")
+        node_b = BrokerBackplane(rooms_b, broker, node_id="b")
+        node_c = BrokerBackplane(rooms_c, broker, node_id="c")
+        for node in (node_a, node_b):
+            await node.start()
+        # b에는 시청자가 먼저 들어와 기본값 방이 있다
+        rooms_b.join("room", FakeConnection(2))
+        room, _ = rooms_a.create("room", "optimistic", rate_burst=3, streamer="host")
+        await node_a.save_room(room)
+        # c는 구독하지 않은 늦게 뜬 노드: 접속 전에 공유 저장소에서 읽는다
+        await node_c.load_room("room")
+        joined = rooms_c.join("room", FakeConnection(2))
+        for node in (node_a, node_b):
+            for task in node._tasks:
+                task.cancel()
+        return rooms_b.get("room"), joined
+
+    remote, joined = asyncio.run(scenario())
+    for room in (remote, joined):
+        assert (room.streamer, room.moderation_mode, room.rate_burst) == ("host", "optimistic", 3)
@@ -0,0 +1,37 @@
+import asyncio
+from Module.bans import LATENCY_SAMPLE_EVERY, BanIndex
+
+
+def test_reload_replays_changes_made_while_loading():
+    async def scenario():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def loader():
+            # DB에서 읽은 뒤 결과를 돌려주기 전에 다른 요청이 끼어든다
+            started.set()
+            await release.wait()
+            return [("host", "old"), ("host", "forgiven")]
+
+        index = BanIndex(loader)
+        reload = asyncio.ensure_future(index.reload())
+        await started.wait()
+        index.ban("host", "new")
+        index.unban("host", "forgiven")
+        release.set()
+        await reload
+        return index
+
+    index = asyncio.run(scenario())
+    assert index.is_banned("host", "old")
+    assert index.is_banned("host", "new")
+    assert not index.is_banned("host", "forgiven")
+
+
+def test_stats_reports_lookup_latency():
+    index = BanIndex(bloom_threshold=1)
+    index.load([("host", "troll")])
+    assert index.stats()["lookup_ns_avg"] is None
+    for _ in range(LATENCY_SAMPLE_EVERY):
+        index.is_banned("host", "viewer")
+    assert index.stats()["lookup_ns_avg"] > 0
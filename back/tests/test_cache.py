@@ -0,0 +1,122 @@
+import asyncio
+from dependencies.cache import TTLCache
+from Module.moderation import ModerationCache, normalize_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeClient:
+    """ModerationClient 대신. 호출된 텍스트를 기록하고, release될 때까지 응답을 미룰 수 있다."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+        self.gate = None
+
+    async def classify(self, text: str):
+        self.calls.append(text)
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            return None, None
+        return "clean", 0.0
+
+    async def close(self) -> None:
+        pass
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.get("b") == 2
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # 조회하면 최근 사용으로 옮겨지므로 b가 밀려난다
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_normalization_folds_case_spacing_and_repeats():
+    assert normalize_text("  HELLO\tworld!!!!! ") == "hello world!!"
+    assert normalize_text("ㅋㅋㅋㅋㅋ") == normalize_text("ㅋㅋ")
+    # NFKC: 전각 문자도 같은 키
+    assert normalize_text("ＡＢＣ") == "abc"
+
+
+def test_equivalent_texts_share_one_cached_result():
+    async def scenario():
+        client = FakeClient()
+        cache = ModerationCache(client, maxsize=10, ttl=60)
+        first = await cache.classify("Hello   World!!!!")
+        second = await cache.classify("hello world!!")
+        return client, cache, first, second
+
+    client, cache, first, second = asyncio.run(scenario())
+    assert first == second == ("clean", 0.0)
+    assert client.calls == ["hello world!!"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_lookups_for_same_text_make_one_call():
+    async def scenario():
+        client = FakeClient()
+        client.gate = asyncio.Event()
+        cache = ModerationCache(client, maxsize=10, ttl=60)
+        waiters = [asyncio.ensure_future(cache.classify("same")) for _ in range(5)]
+        await asyncio.sleep(0)
+        inflight = cache.stats()["inflight"]
+        # 한 호출자가 취소되어도 나머지는 결과를 받는다
+        waiters[0].cancel()
+        client.gate.set()
+        results = await asyncio.gather(*waiters[1:])
+        return client, cache, inflight, results
+
+    client, cache, inflight, results = asyncio.run(scenario())
+    assert client.calls == ["same"]
+    assert inflight == 1
+    assert results == [("clean", 0.0)] * 4
+    stats = cache.stats()
+    assert stats["coalesced"] == 4
+    assert stats["inflight"] == 0
+    assert stats["size"] == 1
+
+
+def test_errors_are_not_cached():
+    async def scenario():
+        client = FakeClient()
+        client.fail = True
+        cache = ModerationCache(client, maxsize=10, ttl=60)
+        failed = await cache.classify("text")
+        client.fail = False
+        # 오류 뒤에는 다시 모델에 물어본다
+        recovered = await cache.classify("text")
+        return client, failed, recovered
+
+    client, failed, recovered = asyncio.run(scenario())
+    assert failed == (None, None)
+    assert recovered == ("clean", 0.0)
+    assert len(client.calls) == 2
@@ -0,0 +1,54 @@
+import asyncio
+import orjson
+from Module import chat
+
+
+class FakeConnection:
+    def __init__(self, protocol_version: int):
+        self.protocol_version = protocol_version
+        self.sent = []
+
+    def send(self, frame) -> None:
+        self.sent.append(orjson.loads(frame))
+
+
+def test_optimistic_room_sends_old_clients_only_the_verdict(monkeypatch):
+    async def classify_remote(text):
+        return "bad", 0.9, "remote"
+
+    monkeypatch.setattr(chat.moderator, "classify_remote", classify_remote)
+    old, new = FakeConnection(1), FakeConnection(2)
+    chat.room_manager.join("optimistic", old)
+    chat.room_manager.join("optimistic", new)
+
+    async def scenario():
+        await chat.publish_optimistic("optimistic", {"type": "message", "id": "m1", "username": "a", "message": "x"})
+        await asyncio.gather(*chat._background_tasks)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        chat.room_manager.leave("optimistic", old)
+        chat.room_manager.leave("optimistic", new)
+    # 예전 클라이언트는 판정 전 원문을 받지 않고, 판정이 붙은 메시지 하나만 받는다
+    assert [frame["filter_result"]["category"] for frame in old.sent] == ["bad"]
+    assert [frame["type"] for frame in new.sent] == ["message", "moderation"]
+    assert "filter_result" not in new.sent[0]
+
+
+def test_banned_user_cannot_bypass_ban_anonymously():
+    room, _ = chat.room_manager.create("banned-room", streamer="host")
+    chat.ban_index.ban("host", "troll")
+    connection = FakeConnection(2)
+    try:
+        # 토큰 없이 접속하면 예전 이름이든 새 이름이든 프레임의 username은 믿지 않는다
+        assert chat.reject_banned(room, None, connection)
+        assert connection.sent[-1]["reason"] == "login_required"
+        assert chat.reject_banned(room, "troll", connection)
+        assert connection.sent[-1]["reason"] == "banned"
+        assert not chat.reject_banned(room, "fan", connection)
+        # 밴 목록이 없는 방은 익명 채팅을 그대로 허용한다
+        open_room, _ = chat.room_manager.create("open-room", streamer="other")
+        assert not chat.reject_banned(open_room, None, connection)
+    finally:
+        chat.ban_index.unban("host", "troll")
@@ -0,0 +1,85 @@
+import asyncio
+from sqlalchemy.exc import DataError
+from Module.chatlog import ChatLogWriter
+
+
+class FakeWriter(ChatLogWriter):
+    """DB 대신 메모리에 쓰고, message가 "bad"인 행이 섞이면 배치 전체를 실패시킨다."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.written = []
+        self.calls = 0
+
+    async def _write(self, batch):
+        self.calls += 1
+        if any(row["message"] == "bad" for row in batch):
+            raise DataError("INSERT", {}, Exception("value too long"))
+        self.written.extend(batch)
+
+
+def message(n: int, text: str = "hi", username: str = "user") -> dict:
+    return {"id": f"m{n}", "username": username, "message": text}
+
+
+def test_bad_row_is_rejected_without_dropping_batch():
+    async def scenario():
+        writer = FakeWriter(batch_size=100, flush_interval_ms=10)
+        await writer.start()
+        for n in range(100):
+            await writer.submit("room", message(n, "bad" if n == 37 else "hi"))
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(writer.written) == 99
+    assert "m37" not in {row["message_id"] for row in writer.written}
+    stats = writer.stats()
+    assert stats["rows_rejected"] == 1
+    assert stats["rows_dropped"] == 0
+    # 반씩 나누므로 배치 크기의 로그 횟수 정도만 더 쓴다
+    assert writer.calls < 20
+
+
+def test_oversize_values_are_truncated():
+    async def scenario():
+        writer = FakeWriter(batch_size=10, flush_interval_ms=10)
+        await writer.start()
+        await writer.submit("r" * 500, message(1, username="u" * 500))
+        await writer.close()
+        return writer
+
+    row = asyncio.run(scenario()).written[0]
+    assert len(row["room_name"]) == 100
+    assert len(row["username"]) == 50
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, *args):
+        # 파라미터 목록(executemany)이 아니라 한 문장으로 와야 한다
+        assert not args
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_bulk_insert_sends_one_multi_row_statement_per_chunk():
+    from domains.chats.repositories import ChatLogRepository
+
+    rows = [
+        {"message_id": f"m{n}", "room_name": "room", "username": "user", "message": "hi"}
+        for n in range(5000)
+    ]
+    session = RecordingSession()
+    asyncio.run(ChatLogRepository(session).bulk_insert(rows[:10]))
+    assert len(session.statements) == 1 and session.commits == 1
+
+    # 바인드 파라미터 상한을 넘는 배치는 나눠 보내고 커밋은 한 번
+    session = RecordingSession()
+    asyncio.run(ChatLogRepository(session).bulk_insert(rows))
+    assert len(session.statements) == 2 and session.commits == 1
@@ -0,0 +1,42 @@
+from Module.coalesce import Coalescer
+from Module.rooms import RoomManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeConnection:
+    def __init__(self, protocol_version: int):
+        self.protocol_version = protocol_version
+        self.sent = []
+
+    def send(self, frame) -> None:
+        self.sent.append(frame)
+
+
+def test_quiet_batching_room_leaves_batching_mode():
+    rooms = RoomManager()
+    rooms.join("room", FakeConnection(2))
+    clock = FakeClock()
+    coalescer = Coalescer(rooms, enable_rate=50, disable_rate=20, cooldown_seconds=5, clock=clock)
+
+    # 1초 동안 100개 -> 다음 메시지에서 묶음 모드로
+    for i in range(100):
+        clock.now = i / 100
+        coalescer.offer("room", f'"m{i}"')
+    clock.now = 1.0
+    assert coalescer.offer("room", '"burst"')
+    coalescer.flush()
+    assert coalescer.stats()["by_room"]["room"]["batching"]
+
+    # 메시지가 완전히 끊겨도 flush가 rate를 갱신해서 cooldown 뒤에 묶음 모드를 끈다
+    for second in range(2, 9):
+        clock.now = float(second)
+        coalescer.flush()
+    assert not coalescer.stats()["by_room"]["room"]["batching"]
+    assert not coalescer.offer("room", '"after"')
@@ -0,0 +1,131 @@
+import asyncio
+import inspect
+from dependencies import database
+from dependencies.auth import AuthService
+from dependencies.config import DefaultConfig
+from dependencies.database import ReadRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRequest:
+    def __init__(self, authorization: str = None, method: str = "GET"):
+        self.method = method
+        self.headers = {"authorization": authorization} if authorization else {}
+
+
+class FakeSession:
+    def __init__(self, name: str, fail: bool = False):
+        self.name = name
+        self.fail = fail
+        self.calls = []
+
+    async def connection(self):
+        self.calls.append("connection")
+        if self.fail:
+            raise OSError("replica down")
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+    async def close(self):
+        self.calls.append("close")
+
+
+def test_writer_reads_stick_to_primary_until_window_ends():
+    clock = FakeClock()
+    router = ReadRouter(True, sticky_seconds=5, retry_seconds=30, clock=clock)
+    router.mark_write("Bearer a")
+    assert not router.use_replica("Bearer a")
+    # 다른 사용자와 익명 요청은 계속 replica
+    assert router.use_replica("Bearer b")
+    assert router.use_replica(None)
+
+    clock.now += 5
+    assert router.use_replica("Bearer a")
+    assert router.stats()["sticky_reads"] == 1
+
+
+def test_replica_failure_falls_back_until_retry():
+    clock = FakeClock()
+    router = ReadRouter(True, sticky_seconds=5, retry_seconds=30, clock=clock)
+    router.replica_failed()
+    assert not router.use_replica(None)
+    assert router.stats()["replica_down"]
+
+    clock.now += 30
+    assert router.use_replica(None)
+    assert router.stats()["fallbacks"] == 1
+
+
+def test_without_replica_everything_reads_primary():
+    router = ReadRouter(False)
+    router.mark_write("Bearer a")
+    assert not router.use_replica("Bearer a")
+    assert not router.use_replica(None)
+
+
+def read_once(monkeypatch, replica: FakeSession, primary: FakeSession, router: ReadRouter) -> FakeSession:
+    monkeypatch.setattr(database, "ReadSessionLocal", lambda: replica)
+    monkeypatch.setattr(database, "PrimaryReadSessionLocal", lambda: primary)
+    monkeypatch.setattr(database, "read_router", router)
+
+    async def scenario():
+        generator = database.get_read_db(FakeRequest())
+        session = await generator.__anext__()
+        await generator.aclose()
+        return session
+
+    return asyncio.run(scenario())
+
+
+def test_get_read_db_falls_back_to_primary_when_replica_is_down(monkeypatch):
+    replica, primary = FakeSession("replica", fail=True), FakeSession("primary")
+    router = ReadRouter(True)
+    assert read_once(monkeypatch, replica, primary, router) is primary
+    assert replica.calls == ["connection", "close"]
+    assert router.stats()["fallbacks"] == 1
+    assert router.stats()["primary_reads"] == 1
+
+
+def test_get_read_db_closes_without_commit_or_rollback(monkeypatch):
+    replica, primary = FakeSession("replica"), FakeSession("primary")
+    router = ReadRouter(True)
+    assert read_once(monkeypatch, replica, primary, router) is replica
+    assert replica.calls == ["connection", "close"]
+    assert primary.calls == []
+    assert router.stats()["replica_reads"] == 1
+
+
+def test_read_sessions_are_autocommit(monkeypatch):
+    for name in ("engine", "AsyncSessionLocal", "read_engine", "ReadSessionLocal", "PrimaryReadSessionLocal", "read_router"):
+        monkeypatch.setattr(database, name, getattr(database, name))
+    config = DefaultConfig(db_replica_endpoint="replica.internal", db_replica_port=5432)
+    # 엔진은 지연 연결이라 실제 DB 없이 만들 수 있다
+    database.init_db(config)
+    assert database.read_engine is not database.engine
+    assert database.read_router.has_replica
+
+    def isolation(factory):
+        return factory.kw["bind"].get_execution_options().get("isolation_level")
+
+    assert isolation(database.ReadSessionLocal) == "AUTOCOMMIT"
+    assert isolation(database.PrimaryReadSessionLocal) == "AUTOCOMMIT"
+    assert isolation(database.AsyncSessionLocal) is None
+    assert database.ReadSessionLocal.kw["bind"].url.host == "replica.internal"
+    assert database.PrimaryReadSessionLocal.kw["bind"].url.host == config.postgresql_endpoint
+
+
+def test_auth_lookups_use_the_primary():
+    # 가입 직후 replica 지연으로 401이 나지 않도록
+    db = inspect.signature(AuthService.get_current_user).parameters["db"].default
+    assert db.dependency is database.get_db
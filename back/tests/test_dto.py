@@ -0,0 +1,33 @@
+import pytest
+from pydantic import ValidationError
+from domains.users.dto import ROOM_RATE_BURST_MAX, ROOM_RATE_REFILL_MAX, RoomCreateRequest, TopUpDTO
+
+
+@pytest.mark.parametrize("field, value", [
+    ("rate_burst", 0),
+    ("rate_burst", -1),
+    ("rate_burst", ROOM_RATE_BURST_MAX + 1),
+    ("rate_refill_per_second", 0),
+    ("rate_refill_per_second", -0.5),
+    ("rate_refill_per_second", ROOM_RATE_REFILL_MAX + 1),
+])
+def test_room_rate_limits_are_bounded(field, value):
+    with pytest.raises(ValidationError):
+        RoomCreateRequest(name="room", **{field: value})
+
+
+def test_room_rate_limits_default_to_server_settings():
+    request = RoomCreateRequest(name="room", rate_burst=3, rate_refill_per_second=0.5)
+    assert (request.rate_burst, request.rate_refill_per_second) == (3, 0.5)
+    assert RoomCreateRequest(name="room").rate_burst is None
+
+
+@pytest.mark.parametrize("amount", ["0", "-100", "-0.01"])
+def test_top_up_rejects_non_positive_amounts(amount):
+    # 음수 충전은 잔액을 줄이는 원장 행을 남긴다
+    with pytest.raises(ValidationError):
+        TopUpDTO(amount=amount)
+
+
+def test_top_up_accepts_positive_amount():
+    assert str(TopUpDTO(amount="10.50").amount) == "10.50"
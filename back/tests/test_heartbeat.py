@@ -0,0 +1,100 @@
+import asyncio
+from Module.connection import HEARTBEAT_TIMEOUT_CLOSE_CODE
+from Module.heartbeat import PING_FRAME, Heartbeat
+from Module.rooms import RoomManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeConnection:
+    def __init__(self, protocol_version: int, last_seen: float, closed: bool = False):
+        self.protocol_version = protocol_version
+        self.last_seen = last_seen
+        self.closed = closed
+        self.sent = []
+        self.close_code = None
+
+    def send(self, frame) -> None:
+        self.sent.append(frame)
+
+    def evict(self, code: int) -> None:
+        self.closed = True
+        self.close_code = code
+
+
+def test_silent_connections_are_reaped_and_live_ones_pinged():
+    rooms, clock = RoomManager(), FakeClock()
+    heartbeat = Heartbeat(rooms, interval=15, timeout=45, clock=clock)
+    live = FakeConnection(2, last_seen=clock.now - 10)
+    silent = FakeConnection(2, last_seen=clock.now - 46)
+    # 예전 클라이언트는 pong을 못 보내므로 조용해도 끊지 않고 ping도 보내지 않는다
+    legacy = FakeConnection(1, last_seen=clock.now - 1000)
+    for connection in (live, silent, legacy):
+        rooms.join("room", connection)
+
+    assert heartbeat.reap() == 1
+    assert set(rooms.members("room")) == {live, legacy}
+    assert silent.close_code == HEARTBEAT_TIMEOUT_CLOSE_CODE
+    assert live.sent == [PING_FRAME]
+    assert legacy.sent == []
+    stats = heartbeat.stats()
+    assert (stats["cycles"], stats["pings"], stats["reaped"]) == (1, 1, 1)
+
+
+def test_connections_closed_by_send_failures_are_removed_from_every_room():
+    rooms, clock = RoomManager(), FakeClock()
+    heartbeat = Heartbeat(rooms, timeout=45, clock=clock)
+    broken = [FakeConnection(version, last_seen=clock.now, closed=True) for version in (1, 2)]
+    keep = FakeConnection(2, last_seen=clock.now)
+    for name in ("one", "two"):
+        rooms.join(name, keep)
+        for connection in broken:
+            rooms.join(name, connection)
+
+    assert heartbeat.reap() == 4
+    for name in ("one", "two"):
+        assert rooms.members(name) == (keep,)
+    # 이미 닫힌 연결은 다시 닫지 않는다
+    assert all(connection.close_code is None for connection in broken)
+
+
+def test_rooms_emptied_by_reaping_or_left_empty_are_deleted():
+    rooms, clock = RoomManager(), FakeClock()
+    heartbeat = Heartbeat(rooms, timeout=45, clock=clock)
+    rooms.join("dead", FakeConnection(2, last_seen=clock.now - 100))
+    rooms.create("abandoned")
+    rooms.get("abandoned").created_at -= 46
+    # 방금 만들어서 아직 아무도 들어오지 않은 방은 남긴다
+    rooms.create("new")
+
+    heartbeat.reap()
+    assert "dead" not in rooms
+    assert "abandoned" not in rooms
+    assert "new" in rooms
+    assert heartbeat.stats()["rooms_deleted"] == 2
+
+
+def test_background_loop_reaps_until_closed():
+    async def scenario():
+        rooms = RoomManager()
+        heartbeat = Heartbeat(rooms, interval=0.1, timeout=45)
+        connection = FakeConnection(2, last_seen=0.0)
+        rooms.join("room", connection)
+        await heartbeat.start()
+        await asyncio.sleep(0.25)
+        await heartbeat.close()
+        cycles = heartbeat.stats()["cycles"]
+        await asyncio.sleep(0.15)
+        return rooms, heartbeat, connection, cycles
+
+    rooms, heartbeat, connection, cycles = asyncio.run(scenario())
+    assert cycles >= 1
+    assert heartbeat.stats()["cycles"] == cycles
+    assert connection.close_code == HEARTBEAT_TIMEOUT_CLOSE_CODE
+    assert "room" not in rooms
@@ -0,0 +1,25 @@
+import pytest
+from Module.lexicon import DEFAULT_LEXICON, LexiconFilter
+
+BAD = "악플/욕설"
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return LexiconFilter(DEFAULT_LEXICON, BAD)
+
+
+@pytest.mark.parametrize("text", ["오십", "십분만 기다려", "십자가", "일십백천", "오십 분 뒤에 봐요"])
+def test_numbers_with_sip_are_not_blocked(lexicon, text):
+    # ㅆ -> ㅅ 접기 때문에 "십"이 "씹"으로 차단되던 오탐
+    assert lexicon.check(text) != (BAD, 1.0)
+
+
+@pytest.mark.parametrize("text", ["씹", "씹새", "씨발", "시발", "ㅆㅂ", "개새끼", "개세끼"])
+def test_block_terms(lexicon, text):
+    assert lexicon.check(text) == (BAD, 1.0)
+
+
+@pytest.mark.parametrize("text", ["씹다", "시발점", "안녕", "ㅋㅋㅋ"])
+def test_allowed(lexicon, text):
+    assert lexicon.check(text) == ("clean", 0.0)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from Module.moderation import BAD_LABEL, ModerationClient
+
+
+class StubServer:
+    """kor_unsmile 엔드포인트 흉내. "bad"가 들어간 입력에만 높은 악플 점수를 준다.
+
+    받은 요청의 inputs를 기록하고, status/delay/drop(결과 하나 빼먹기)으로 장애를 흉내 낸다.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.delay = 0.0
+        self.drop = False
+        self.active = 0
+        self.max_active = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/models/kor_unsmile"
+
+    async def close(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # keep-alive 연결로 여러 요청이 올 수 있다
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                inputs = json.loads(await reader.readexactly(length))["inputs"]
+                self.requests.append(inputs)
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                await asyncio.sleep(self.delay)
+                self.active -= 1
+                writer.write(self._response(inputs))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _response(self, inputs) -> bytes:
+        if self.status != 200:
+            body = b'{"error": "overloaded"}'
+        else:
+            results = [
+                [{"label": BAD_LABEL, "score": 0.9 if "bad" in text else 0.1}, {"label": "clean", "score": 0.5}]
+                for text in inputs
+            ]
+            if self.drop:
+                results = results[:-1]
+            body = json.dumps(results).encode()
+        return (
+            f"HTTP/1.1 {self.status} X\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode() + body
+
+
+def run(scenario):
+    async def wrapper():
+        server = StubServer()
+        url = await server.start()
+        try:
+            return server, await scenario(server, url)
+        finally:
+            await server.close()
+
+    return asyncio.run(wrapper())
+
+
+def test_concurrent_calls_share_one_request_and_get_their_own_result():
+    async def scenario(server, url):
+        client = ModerationClient(url, batch_size=16, flush_ms=20)
+        texts = [f"bad {i}" if i % 3 == 0 else f"hello {i}" for i in range(10)]
+        results = await asyncio.gather(*(client.classify(text) for text in texts))
+        await client.close()
+        return texts, results
+
+    server, (texts, results) = run(scenario)
+    assert server.requests == [texts]
+    for text, result in zip(texts, results):
+        assert result == ((BAD_LABEL, 0.9) if "bad" in text else ("clean", 0.0))
+
+
+def test_full_batch_is_sent_without_waiting():
+    async def scenario(server, url):
+        # flush_ms가 길어도 batch_size가 차면 바로 보낸다
+        client = ModerationClient(url, batch_size=16, flush_ms=10_000)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(client.classify(f"m{i}") for i in range(32))), timeout=2
+        )
+        await client.close()
+        return results
+
+    server, results = run(scenario)
+    assert [len(inputs) for inputs in server.requests] == [16, 16]
+    assert results == [("clean", 0.0)] * 32
+
+
+def test_partial_batch_waits_for_flush_delay():
+    async def scenario(server, url):
+        client = ModerationClient(url, batch_size=16, flush_ms=50)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = asyncio.ensure_future(client.classify("first"))
+        await asyncio.sleep(0.01)
+        # 지연 안에 들어온 메시지는 같은 요청에 실린다
+        second = asyncio.ensure_future(client.classify("second"))
+        await asyncio.gather(first, second)
+        elapsed = loop.time() - started
+        # 지연이 지난 뒤의 메시지는 새 요청
+        await client.classify("third")
+        await client.close()
+        return elapsed
+
+    server, elapsed = run(scenario)
+    assert elapsed >= 0.05
+    assert server.requests == [["first", "second"], ["third"]]
+
+
+def test_batches_beyond_max_concurrency_wait_their_turn():
+    async def scenario(server, url):
+        server.delay = 0.05
+        client = ModerationClient(url, batch_size=2, flush_ms=1, max_concurrency=1)
+        results = await asyncio.gather(*(client.classify(f"m{i}") for i in range(6)))
+        await client.close()
+        return results
+
+    server, results = run(scenario)
+    assert len(server.requests) == 3
+    assert server.max_active == 1
+    assert results == [("clean", 0.0)] * 6
+
+
+def test_failed_batch_resolves_every_caller_and_client_recovers():
+    async def scenario(server, url):
+        client = ModerationClient(url, batch_size=16, flush_ms=5)
+        server.status = 503
+        failed = await asyncio.gather(*(client.classify(f"m{i}") for i in range(3)))
+        server.status = 200
+        server.drop = True
+        # 결과 개수가 맞지 않으면 어느 결과가 누구 것인지 알 수 없으므로 배치 전체를 실패로 처리
+        mismatched = await asyncio.gather(*(client.classify(f"m{i}") for i in range(3)))
+        server.drop = False
+        recovered = await client.classify("bad again")
+        await client.close()
+        return failed, mismatched, recovered
+
+    server, (failed, mismatched, recovered) = run(scenario)
+    assert failed == [(None, None)] * 3
+    assert mismatched == [(None, None)] * 3
+    assert recovered == (BAD_LABEL, 0.9)
+    assert len(server.requests) == 3
+
+
+def test_unreachable_endpoint_resolves_callers():
+    async def scenario():
+        server = StubServer()
+        url = await server.start()
+        await server.close()
+        client = ModerationClient(url, flush_ms=1, timeout=1)
+        result = await asyncio.wait_for(client.classify("hello"), timeout=5)
+        await client.close()
+        return result
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_close_flushes_pending_messages():
+    async def scenario(server, url):
+        client = ModerationClient(url, batch_size=16, flush_ms=10_000)
+        pending = asyncio.ensure_future(client.classify("bad"))
+        await asyncio.sleep(0)
+        await client.close()
+        return await pending
+
+    server, result = run(scenario)
+    assert result == (BAD_LABEL, 0.9)
+    assert server.requests == [["bad"]]
@@ -0,0 +1,64 @@
+import asyncio
+import orjson
+from Module.backplane import MemoryBroker
+from Module.notify import BrokerNotificationHub, LiveNotifier
+
+
+class FakeConnection:
+    protocol_version = 2
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, frame) -> None:
+        self.sent.append(orjson.loads(frame))
+
+
+def make_loader(usernames):
+    async def loader(streamer, after, limit):
+        rows = [(i + 1, username) for i, username in enumerate(usernames)]
+        return [row for row in rows if row[0] > after][:limit]
+    return loader
+
+
+def test_followers_on_other_workers_get_live_notifications():
+    async def scenario():
+        broker = MemoryBroker()
+        loader = make_loader(["here", "there", "later"])
+        node_a = LiveNotifier(loader, batch_size=2, hub=BrokerNotificationHub(broker, "a"))
+        node_b = LiveNotifier(loader, batch_size=2, hub=BrokerNotificationHub(broker, "b"))
+        for notifier in (node_a, node_b):
+            await notifier.start()
+        here, there, later = FakeConnection(), FakeConnection(), FakeConnection()
+        await node_a.register("here", here)
+        await node_b.register("there", there)
+
+        result = await node_a.notify_live("host", "room")
+        # 접속하지 않았던 팔로워는 어느 워커에 접속하든 밀린 알림을 받는다
+        await node_b.register("later", later)
+        for notifier in (node_a, node_b):
+            await notifier.close()
+        return result, here, there, later
+
+    result, here, there, later = asyncio.run(scenario())
+    assert result == {"followers": 3, "pushed": 2, "queued": 1}
+    for connection in (here, there, later):
+        assert [frame["type"] for frame in connection.sent] == ["live"]
+
+
+def test_disconnected_follower_is_queued_not_pushed():
+    async def scenario():
+        broker = MemoryBroker()
+        notifier = LiveNotifier(make_loader(["fan"]), hub=BrokerNotificationHub(broker, "a"))
+        await notifier.start()
+        connection = FakeConnection()
+        await notifier.register("fan", connection)
+        await notifier.unregister("fan", connection)
+        result = await notifier.notify_live("host", "room")
+        await notifier.close()
+        return result, connection, await broker.take_frames("fan")
+
+    result, connection, queued = asyncio.run(scenario())
+    assert result["queued"] == 1
+    assert connection.sent == []
+    assert len(queued) == 1
@@ -0,0 +1,107 @@
+from Module.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def allowed(limiter: RateLimiter, user: str = "user:a", room: str = "room", **kwargs) -> int:
+    # 막힐 때까지 보낸 메시지 수
+    count = 0
+    while limiter.check(user, room, **kwargs).allowed:
+        count += 1
+    return count
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=5, refill_per_second=2, clock=clock)
+    assert allowed(limiter) == 5
+    decision = limiter.check("user:a", "room")
+    assert not decision.allowed and not decision.muted
+    assert decision.retry_after == 0.5
+
+    clock.now = 1.0
+    assert allowed(limiter) == 2
+    # 오래 쉬어도 burst 이상은 쌓이지 않는다
+    clock.now = 100.0
+    assert allowed(limiter) == 5
+
+
+def test_buckets_are_per_user_and_room():
+    limiter = RateLimiter(burst=3, refill_per_second=1, clock=FakeClock())
+    assert allowed(limiter, "user:a", "one") == 3
+    assert allowed(limiter, "user:a", "two") == 3
+    assert allowed(limiter, "ip:10.0.0.1", "one") == 3
+
+
+def test_room_overrides_bucket_size_and_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=5, refill_per_second=1, clock=clock)
+    assert allowed(limiter, burst=10, refill_per_second=5) == 10
+    clock.now = 1.0
+    assert allowed(limiter, burst=10, refill_per_second=5) == 5
+
+
+def test_penalty_shrinks_bucket_and_slows_refill():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=6, refill_per_second=3, clock=clock)
+    limiter.set_penalty("user:a", 2)
+    assert limiter.penalty("user:a") == 2
+    # 벌점 2 -> 1/3 크기, 1/3 속도
+    assert allowed(limiter) == 2
+    clock.now = 1.0
+    assert allowed(limiter) == 1
+    assert allowed(limiter, "user:b") == 6
+
+
+def test_repeated_violations_escalate_once_per_threshold():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=1, refill_per_second=0.01, violation_threshold=3, violation_window=60, clock=clock)
+    assert limiter.check("user:a", "room").allowed
+    escalations = [limiter.check("user:a", "room").escalate for _ in range(6)]
+    assert escalations == [False, False, True, False, False, True]
+    assert limiter.stats()["escalations"] == 2
+
+    # 창이 지나면 위반 횟수를 다시 센다
+    limiter.check("user:a", "room")
+    clock.now = 61.0
+    assert not limiter.check("user:a", "room").escalate
+    assert not limiter.check("user:a", "room").escalate
+
+
+def test_high_penalty_mutes_for_longer_each_step():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=5, mute_penalty=3, mute_seconds=60, clock=clock)
+    limiter.set_penalty("user:a", 2, mute=True)
+    assert limiter.check("user:a", "room").allowed
+
+    limiter.set_penalty("user:a", 4, mute=True)
+    decision = limiter.check("user:a", "other")
+    assert decision.muted and not decision.allowed
+    assert decision.retry_after == 120
+    clock.now = 119.0
+    assert limiter.check("user:a", "room").muted
+    clock.now = 120.0
+    assert limiter.check("user:a", "room").allowed
+    assert limiter.stats()["muted"] == 2
+
+
+def test_idle_state_is_expired_but_mutes_are_kept():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=5, idle_seconds=10, mute_penalty=1, mute_seconds=60, clock=clock)
+    limiter.check("user:a", "room")
+    limiter.set_penalty("user:b", 1, mute=True)
+    clock.now = 30.0
+    limiter.check("user:c", "room")
+    stats = limiter.stats()
+    assert stats["expired"] == 1
+    assert stats["buckets"] == 1
+    # 뮤트가 끝나지 않은 사용자는 지우지 않는다
+    assert stats["users"] == 2
+    assert limiter.penalty("user:b") == 1
+    assert limiter.check("user:b", "room").muted
@@ -0,0 +1,165 @@
+import asyncio
+import random
+from Module.rooms import RoomManager
+
+
+class FakeConnection:
+    def __init__(self, name: str):
+        self.name = name
+        self.received = []
+
+    def send(self, frame) -> None:
+        self.received.append(frame)
+
+
+def test_broadcast_snapshot_survives_concurrent_join_leave():
+    async def scenario():
+        rooms = RoomManager()
+        stayers = [FakeConnection(f"stay{i}") for i in range(50)]
+        for connection in stayers:
+            rooms.join("room", connection)
+        churn = [FakeConnection(f"churn{i}") for i in range(200)]
+        rng = random.Random(0)
+
+        async def broadcast(frame):
+            # 순회 중 다른 태스크에 양보해서 join/leave가 끼어들게 한다
+            for connection in rooms.members("room"):
+                connection.send(frame)
+                await asyncio.sleep(0)
+
+        async def churner():
+            for _ in range(500):
+                connection = rng.choice(churn)
+                if connection in rooms.get("room"):
+                    rooms.leave("room", connection)
+                else:
+                    rooms.join("room", connection)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(broadcast(f"m{i}") for i in range(20)), churner(), churner())
+        return rooms, stayers
+
+    rooms, stayers = asyncio.run(scenario())
+    frames = [f"m{i}" for i in range(20)]
+    # 처음부터 끝까지 방에 있던 연결은 모든 메시지를 정확히 한 번씩 받는다
+    for connection in stayers:
+        assert sorted(connection.received) == sorted(frames)
+    assert set(stayers) <= set(rooms.members("room"))
+
+
+def test_snapshot_is_reused_until_membership_changes():
+    rooms = RoomManager()
+    a, b = FakeConnection("a"), FakeConnection("b")
+    rooms.join("room", a)
+    first = rooms.members("room")
+    assert rooms.members("room") is first
+    rooms.join("room", b)
+    second = rooms.members("room")
+    assert second is not first
+    assert first == (a,)
+    assert set(second) == {a, b}
+
+
+def test_last_leave_deletes_room_and_notifies():
+    rooms = RoomManager()
+    events = []
+    rooms.add_listener(lambda: events.append(rooms.names()))
+    a, b = FakeConnection("a"), FakeConnection("b")
+    rooms.join("room", a)
+    rooms.join("room", b)
+    rooms.leave("room", a)
+    assert "room" in rooms
+    rooms.leave("room", b)
+    assert "room" not in rooms
+    assert rooms.members("room") == ()
+    assert events == [["room"], []]
+
+
+def test_stale_leave_does_not_touch_recreated_room():
+    rooms = RoomManager()
+    old, new = FakeConnection("old"), FakeConnection("new")
+    rooms.join("room", old)
+    rooms.evict({"room": [old]})
+    assert "room" not in rooms
+    rooms.join("room", new)
+    rooms.leave("room", old)
+    assert rooms.members("room") == (new,)
+
+
+def test_evict_deletes_rooms_empty_past_grace():
+    rooms = RoomManager()
+    rooms.create("idle")
+    rooms.get("idle").created_at -= 60
+    rooms.create("fresh")
+    evicted, deleted = rooms.evict({}, empty_grace=30)
+    assert (evicted, deleted) == (0, 1)
+    assert rooms.names() == ["fresh"]
+
+
+def test_recreated_room_keeps_streamer():
+    rooms = RoomManager()
+    rooms.create("room", streamer="host")
+    connection = FakeConnection("viewer")
+    rooms.join("room", connection)
+    rooms.leave("room", connection)
+    assert "room" not in rooms
+
+    # 빈 방이 지워진 뒤 join으로 다시 생겨도 방송인이 남아 있다
+    assert rooms.join("room", connection).streamer == "host"
+
+
+def test_another_streamer_cannot_take_over_empty_room():
+    rooms = RoomManager()
+    rooms.create("room", streamer="host")
+    viewer = FakeConnection("viewer")
+    rooms.join("room", viewer)
+    rooms.leave("room", viewer)
+
+    room, created = rooms.create("room", streamer="intruder")
+    assert room.streamer == "host"
+    assert rooms.streamer("room") == "host"
+
+
+def test_streamer_claims_room_a_viewer_opened_first():
+    rooms = RoomManager()
+    rooms.join("room", FakeConnection("viewer"))
+    room, claimed = rooms.create("room", streamer="host")
+    assert claimed and room.streamer == "host"
+    # 이미 방송인이 있으면 다시 가져갈 수 없다
+    room, claimed = rooms.create("room", streamer="intruder")
+    assert not claimed and room.streamer == "host"
+
+
+def test_remembered_streamers_are_capped():
+    rooms = RoomManager(max_remembered=2)
+    for i in range(5):
+        viewer = FakeConnection("viewer")
+        rooms.create(f"room{i}", streamer=f"host{i}")
+        rooms.join(f"room{i}", viewer)
+        rooms.leave(f"room{i}", viewer)
+    assert rooms.stats()["remembered_rooms"] == 2
+    assert rooms.streamer("room4") == "host4"
+    assert rooms.streamer("room0") is None
+
+
+def test_room_settings_survive_deletion_and_reaping():
+    rooms = RoomManager()
+    rooms.create("room", "optimistic", rate_burst=3, rate_refill_per_second=0.5, streamer="host")
+    viewer = FakeConnection("viewer")
+    rooms.join("room", viewer)
+    rooms.leave("room", viewer)
+    room = rooms.join("room", viewer)
+    assert (room.moderation_mode, room.rate_burst, room.rate_refill_per_second) == ("optimistic", 3, 0.5)
+
+    # reaper가 끊은 연결과 빈 방을 지운 뒤에도 같다
+    rooms.evict({"room": [viewer]})
+    assert "room" not in rooms
+    room = rooms.join("room", viewer)
+    assert (room.moderation_mode, room.rate_burst, room.streamer) == ("optimistic", 3, "host")
+
+
+def test_streamer_settings_apply_when_claiming_viewer_room():
+    rooms = RoomManager()
+    rooms.join("room", FakeConnection("viewer"))
+    room, _ = rooms.create("room", "optimistic", rate_burst=2, streamer="host")
+    assert (room.moderation_mode, room.rate_burst) == ("optimistic", 2)
@@ -0,0 +1,83 @@
+from Module.rooms import RoomManager
+from Module.shedding import LoadShedder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def crowded_room(rooms: RoomManager, name: str = "room", viewers: int = 100):
+    for i in range(viewers):
+        rooms.join(name, object())
+    return rooms.get(name)
+
+
+def send(shedder: LoadShedder, room, clock: FakeClock, second: int, count: int, priority: bool = False) -> int:
+    # second초 동안 고르게 count개를 보내고 통과한 수를 돌려준다
+    admitted = 0
+    for i in range(count):
+        clock.now = second + i / count
+        admitted += shedder.admit(room, priority)
+    return admitted
+
+
+def test_busy_large_room_is_sampled_down_to_max_rate():
+    rooms, clock = RoomManager(), FakeClock()
+    room = crowded_room(rooms)
+    shedder = LoadShedder(rooms, min_viewers=100, max_rate=30, clock=clock)
+    # 첫 1초는 rate를 모르므로 전부 통과
+    assert send(shedder, room, clock, 0, 120) == 120
+    # 이후에는 초당 max_rate 정도만 통과하고, 통과 간격이 고르다
+    admitted = [send(shedder, room, clock, second, 120) for second in range(1, 4)]
+    assert all(29 <= count <= 31 for count in admitted)
+    stats = shedder.stats()["by_room"]["room"]
+    assert stats["sample_rate"] == 0.25
+    assert stats["shed"] == 360 - sum(admitted)
+
+
+def test_small_or_quiet_rooms_are_not_sampled():
+    rooms, clock = RoomManager(), FakeClock()
+    small = crowded_room(rooms, "small", viewers=10)
+    quiet = crowded_room(rooms, "quiet", viewers=100)
+    shedder = LoadShedder(rooms, min_viewers=100, max_rate=30, clock=clock)
+    for second in range(3):
+        assert send(shedder, small, clock, second, 120) == 120
+        assert send(shedder, quiet, clock, second, 20) == 20
+    assert shedder.stats()["shed"] == 0
+
+
+def test_sampling_stops_when_room_calms_down():
+    rooms, clock = RoomManager(), FakeClock()
+    room = crowded_room(rooms)
+    shedder = LoadShedder(rooms, min_viewers=100, max_rate=30, clock=clock)
+    send(shedder, room, clock, 0, 120)
+    assert send(shedder, room, clock, 1, 120) < 120
+    send(shedder, room, clock, 2, 10)
+    assert send(shedder, room, clock, 3, 10) == 10
+    assert shedder.stats()["by_room"]["room"]["sample_rate"] == 1.0
+
+
+def test_priority_messages_always_pass_but_count_toward_rate():
+    rooms, clock = RoomManager(), FakeClock()
+    room = crowded_room(rooms)
+    shedder = LoadShedder(rooms, min_viewers=100, max_rate=30, clock=clock)
+    send(shedder, room, clock, 0, 60, priority=True)
+    send(shedder, room, clock, 0.5, 60)
+    assert send(shedder, room, clock, 1, 20, priority=True) == 20
+    # 방송인 메시지도 rate에 포함되어 일반 메시지가 샘플링된다
+    assert send(shedder, room, clock, 1.5, 60) < 60
+    assert shedder.stats()["by_room"]["room"]["priority"] == 80
+
+
+def test_state_is_dropped_with_the_room():
+    rooms, clock = RoomManager(), FakeClock()
+    connection = object()
+    rooms.join("room", connection)
+    shedder = LoadShedder(rooms, min_viewers=1, max_rate=30, clock=clock)
+    shedder.admit(rooms.get("room"))
+    rooms.leave("room", connection)
+    assert "room" not in shedder.stats()["by_room"]
@@ -94,7 +94,10 @@ export default function App() {
 
   const createRoom = async (roomName) => {
     try {
-      await axios.post('http://localhost:8000/create_room', { name: roomName });
+      // 방을 만든 로그인 사용자가 방송인이 된다
+      await axios.post('http://localhost:8000/create_room', { name: roomName }, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
       fetchRooms();
     } catch (error) {
       console.error('Error creating room:', error);
@@ -103,10 +106,37 @@ export default function App() {
 
   const connectToRoom = (roomName) => {
     if (wsRef.current) wsRef.current.close();
-    wsRef.current = new WebSocket(`ws://localhost:8000/ws/${roomName}`);
+    // v=2: 붐비는 방에서는 서버가 여러 이벤트를 batch 프레임 하나로 묶어 보내고, ping에 pong으로 답해야 한다
+    // token: 채팅 이름과 속도 제한은 로그인한 사용자 기준으로 정해진다
+    const auth = token ? `&token=${encodeURIComponent(token)}` : '';
+    wsRef.current = new WebSocket(`ws://localhost:8000/ws/${roomName}?v=2${auth}`);
+    const handleEvent = (data) => {
+      if (data.type === 'moderation') {
+        // optimistic 모드: 먼저 받은 메시지에 판정 결과를 반영
+        setMessages((prev) =>
+          prev.map((msg) => (msg.id === data.id ? { ...msg, filter_result: data.filter_result } : msg))
+        );
+        return;
+      }
+      if (data.type === 'live') {
+        // 팔로우한 방송인의 방송 시작 알림
+        setMessages((prev) => [...prev, { type: 'system', message: data.message }]);
+        return;
+      }
+      setMessages((prev) => [...prev, data]);
+    };
     wsRef.current.onmessage = (event) => {
       const data = JSON.parse(event.data);
-      setMessages((prev) => [...prev, data]);
+      if (data.type === 'ping') {
+        // 서버 heartbeat: 응답하지 않으면 죽은 연결로 보고 끊는다
+        wsRef.current.send(JSON.stringify({ type: 'pong' }));
+        return;
+      }
+      if (data.type === 'batch') {
+        data.events.forEach(handleEvent);
+        return;
+      }
+      handleEvent(data);
     };
     wsRef.current.onopen = () => {
       wsRef.current.send(JSON.stringify({ type: 'join', username: user.username }));